@@ -0,0 +1,364 @@
+# Benchmarks for the ML service
+"""
+Performance benchmarks for model artifacts and serving
+Run from the ml_model directory:
+
+    python benchmarks.py model-load [--model risk_model]
+    python benchmarks.py workers [--workers 3] [--format pickle]
+    python benchmarks.py synthetic [--couples 100000] [--questions 59]
+    python benchmarks.py search [--couples 500] [--modes grid,halving:n_samples,halving:n_estimators]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import urllib.request
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def read_memory_status(pid='self'):
+    """Return RSS figures in KiB from /proc/<pid>/status (Linux only)"""
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'RssAnon', 'RssFile', 'RssShmem'):
+                    fields[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return fields
+
+
+def read_smaps_rollup(pid='self'):
+    """Return Rss/Pss/Shared/Private totals in KiB from /proc/<pid>/smaps_rollup (Linux only)"""
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty'):
+                    fields[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return fields
+
+
+def _measure_model_load(fmt, name):
+    """Child-process body: load one model in the given format and report time and memory"""
+    import numpy as np  # Import heavy modules before the baseline so they don't count as model memory
+    import pickle
+    import sklearn.ensemble  # noqa: F401 - needed to unpickle forests
+    from compact_forest import load_compact_model
+
+    base = os.path.join(SCRIPT_DIR, name)
+    before = read_memory_status()
+    started = time.perf_counter()
+    if fmt == 'pickle':
+        with open(base + '.pkl', 'rb') as f:
+            model = pickle.load(f)
+    else:
+        model = load_compact_model(base)
+    load_seconds = time.perf_counter() - started
+    after_load = read_memory_status()
+
+    n_features = model.n_features_in_
+    row = np.full((1, n_features), 3.0)
+    model.predict(row)  # First call touches the pages needed for a prediction
+    started = time.perf_counter()
+    for _ in range(50):
+        model.predict(row)
+    predict_ms = (time.perf_counter() - started) / 50 * 1000
+    after_predict = read_memory_status()
+
+    result = {
+        'format': fmt,
+        'load_ms': round(load_seconds * 1000, 2),
+        'predict_1row_ms': round(predict_ms, 3),
+        'rss_load_kib': after_load.get('VmRSS', 0) - before.get('VmRSS', 0),
+        'anon_after_predict_kib': after_predict.get('RssAnon', 0) - before.get('RssAnon', 0),
+        'file_after_predict_kib': after_predict.get('RssFile', 0) - before.get('RssFile', 0)
+    }
+    print(json.dumps(result))
+
+
+def bench_model_load(args):
+    """Compare pickle vs compact artifact load time, single-row latency and RSS"""
+    from compact_forest import artifact_exists, export_compact_model
+
+    base = os.path.join(SCRIPT_DIR, args.model)
+    if not os.path.exists(base + '.pkl'):
+        print(f"{args.model}.pkl not found - train the models first")
+        return 1
+    if not artifact_exists(base) or args.export:
+        import pickle
+        with open(base + '.pkl', 'rb') as f:
+            export_compact_model(pickle.load(f), base)
+
+    print(f"Model: {args.model} (pickle {os.path.getsize(base + '.pkl') / 1024:.0f} KiB, "
+          f"compact {os.path.getsize(base + '.forest') / 1024:.0f} KiB)")
+    print(f"{'format':<8} {'load ms':>9} {'predict ms':>11} {'RSS +KiB':>9} {'anon +KiB':>10} {'file +KiB':>10}")
+    for fmt in ('pickle', 'compact'):
+        runs = []
+        for _ in range(args.repeat):
+            out = subprocess.run(
+                [sys.executable, __file__, '_model-load-child', fmt, args.model],
+                capture_output=True, text=True, check=True, cwd=SCRIPT_DIR
+            )
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        best = min(runs, key=lambda r: r['load_ms'])
+        print(f"{fmt:<8} {best['load_ms']:>9.2f} {best['predict_1row_ms']:>11.3f} {best['rss_load_kib']:>9} "
+              f"{best['anon_after_predict_kib']:>10} {best['file_after_predict_kib']:>10}")
+    print("anon = private to the process; file = page-cache backed, shared by every worker mapping the artifact")
+    return 0
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _worker_pids(master_pid):
+    """Direct children of the gunicorn master (Linux /proc)"""
+    pids = []
+    task_dir = f'/proc/{master_pid}/task'
+    for tid in os.listdir(task_dir):
+        try:
+            with open(os.path.join(task_dir, tid, 'children'), 'r') as f:
+                pids.extend(int(p) for p in f.read().split())
+        except OSError:
+            pass
+    return sorted(pids)
+
+
+def _run_gunicorn(preload, workers, fmt, settle_seconds):
+    """Start gunicorn, wait until every worker finished loading, and return per-process memory"""
+    port = _free_port()
+    env = dict(os.environ, GUNICORN_PRELOAD='true' if preload else 'false', MODEL_ARTIFACT_FORMAT=fmt)
+    env.pop('SERVICE_PRELOAD', None)
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+         '-w', str(workers), '-b', f'127.0.0.1:{port}', 'service:app'],
+        cwd=SCRIPT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.time() + 120
+        pids = []
+        while time.time() < deadline:
+            pids = _worker_pids(proc.pid)
+            if len(pids) == workers:
+                try:
+                    with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=2):
+                        break
+                except OSError:
+                    pass
+            time.sleep(0.5)
+        # Let background initialization finish and serve a few requests so pages are touched
+        time.sleep(settle_seconds)
+        for _ in range(workers * 4):
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/status', timeout=5).read()
+            except OSError:
+                pass
+        return read_smaps_rollup(proc.pid), {pid: read_smaps_rollup(pid) for pid in _worker_pids(proc.pid)}
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def bench_workers(args):
+    """Per-worker RSS/PSS with and without gunicorn preload (copy-on-write sharing)"""
+    print(f"{args.workers} workers, MODEL_ARTIFACT_FORMAT={args.format}")
+    print(f"{'mode':<10} {'worker RSS':>11} {'worker PSS':>11} {'private':>9} {'total PSS':>10}   (KiB, per-worker mean)")
+    for preload in (False, True):
+        master, workers = _run_gunicorn(preload, args.workers, args.format, args.settle)
+        if not workers:
+            print("No workers found - is gunicorn installed?")
+            return 1
+        n = len(workers)
+        mean = lambda key: sum(w.get(key, 0) for w in workers.values()) // n
+        private = sum(w.get('Private_Clean', 0) + w.get('Private_Dirty', 0) for w in workers.values()) // n
+        total_pss = master.get('Pss', 0) + sum(w.get('Pss', 0) for w in workers.values())
+        print(f"{'preload' if preload else 'no-preload':<10} {mean('Rss'):>11} {mean('Pss'):>11} {private:>9} {total_pss:>10}")
+    return 0
+
+
+def _import_service(questions):
+    """Import service.py quietly and install a synthetic schema with the given answerable question count"""
+    import io
+    import contextlib
+    with contextlib.redirect_stdout(io.StringIO()):
+        import service
+        thread = service.service_state.get('thread')
+        if thread:
+            thread.join()
+    if questions:
+        mapping = {qid: (qid % 4) + 1 for qid in range(1, questions + 1)}
+        service.MEAI_CATEGORIES = ['Category 1', 'Category 2', 'Category 3', 'Category 4']
+        service.MEAI_QUESTION_MAPPING = mapping
+    return service
+
+
+def bench_synthetic(args):
+    """Time vectorized synthetic couple generation (columns, and the list-of-dicts records)"""
+    service = _import_service(args.questions)
+    print(f"{args.couples} couples, {len(service.MEAI_QUESTION_MAPPING)} questions")
+    started = time.perf_counter()
+    columns = service.generate_synthetic_columns(args.couples)
+    columns_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    service.synthetic_columns_to_records(columns)
+    records_seconds = time.perf_counter() - started
+    print(f"columns: {columns_seconds:.2f}s   records conversion: {records_seconds:.2f}s")
+    import numpy as np
+    risk, counts = np.unique(columns['risk_level'], return_counts=True)
+    print("risk levels: " + ", ".join(f"{r} {c / args.couples:.1%}" for r, c in zip(risk, counts)))
+    return 0
+
+
+def bench_search(args):
+    """Wall-clock and held-out quality of grid vs successive-halving hyperparameter search"""
+    service = _import_service(args.questions)
+    import io
+    import contextlib
+    import numpy as np
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    from sklearn.utils import class_weight
+
+    columns = service.concat_training_columns(service.generate_synthetic_columns(args.couples))
+    X, y_risk, y_categories = service.build_training_matrix(columns, np.random.default_rng(42))
+    X_train, X_test, r_train, r_test, c_train, c_test = train_test_split(
+        X, y_risk, y_categories, test_size=0.25, random_state=42, stratify=y_risk)
+    weights = class_weight.compute_class_weight('balanced', classes=np.unique(r_train), y=r_train)
+    class_weight_dict = dict(enumerate(weights))
+    print(f"{len(X_train)} training / {len(X_test)} held-out couples, {X.shape[1]} features")
+    print(f"{'mode':<24} {'risk s':>8} {'fits':>6} {'accuracy':>9} {'category s':>11} {'fits':>6} {'MSE':>8} {'total s':>8}")
+
+    for spec in args.modes.split(','):
+        mode, _, resource = spec.partition(':')
+        searches = (
+            (RandomForestClassifier(random_state=42), service.get_risk_param_grid(class_weight_dict),
+             'accuracy', 'n_estimators', X_train, r_train),
+            (service.make_category_model(), service.get_category_param_grid(),
+             'neg_mean_squared_error', service.category_param_prefix() + 'n_estimators', X_train, c_train)
+        )
+        results = []
+        for estimator, grid, scoring, n_estimators_param, X_fit, y_fit in searches:
+            search = service.make_hyperparameter_search(estimator, grid, scoring, n_estimators_param,
+                                                        mode=mode, resource=resource or None)
+            search.verbose = 0
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                search.fit(X_fit, y_fit)
+            results.append((time.perf_counter() - started, service.describe_search(search)['n_fits'], search))
+        (risk_s, risk_fits, risk_search), (cat_s, cat_fits, cat_search) = results
+        accuracy = float((risk_search.predict(X_test) == r_test).mean())
+        mse = float(((cat_search.predict(X_test) - c_test) ** 2).mean())
+        print(f"{spec:<24} {risk_s:>8.1f} {risk_fits:>6} {accuracy:>9.3f} {cat_s:>11.1f} {cat_fits:>6} {mse:>8.4f} "
+              f"{risk_s + cat_s:>8.1f}")
+    return 0
+
+
+def bench_category_model(args):
+    """Per-category MultiOutputRegressor vs one native multi-output forest for the category scores"""
+    service = _import_service(args.questions)
+    import pickle
+    import tempfile
+    import numpy as np
+    from sklearn.model_selection import train_test_split
+    from compact_forest import export_compact_model, load_compact_model
+
+    columns = service.concat_training_columns(service.generate_synthetic_columns(args.couples))
+    X, _, y_categories = service.build_training_matrix(columns, np.random.default_rng(42))
+    X_train, X_test, c_train, c_test = train_test_split(X, y_categories, test_size=0.25, random_state=42)
+    params = {'n_estimators': args.trees, 'max_depth': args.max_depth, 'min_samples_split': 2}
+    print(f"{len(X_train)} training / {len(X_test)} held-out couples, {c_train.shape[1]} categories, "
+          f"{params['n_estimators']} trees per forest, max_depth {params['max_depth']}")
+    print(f"{'model':<14} {'trees':>6} {'fit s':>7} {'MSE':>8} {'pickle KiB':>11} {'compact KiB':>12} "
+          f"{'sklearn ms':>11} {'compact ms':>11}")
+
+    row = X_test[:1]
+    for model_type in args.types.split(','):
+        model = service.make_category_model(model_type, **params)
+        started = time.perf_counter()
+        model.fit(X_train, c_train)
+        fit_seconds = time.perf_counter() - started
+        mse = float(((model.predict(X_test) - c_test) ** 2).mean())
+        forests = model.estimators_ if model_type == 'per_category' else [model]
+        n_trees = sum(len(forest.estimators_) for forest in forests)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            base = os.path.join(tmp, 'category_model')
+            with open(base + '.pkl', 'wb') as f:
+                pickle.dump(model, f)
+            export_compact_model(model, base)
+            pickle_kib = os.path.getsize(base + '.pkl') / 1024
+            compact_kib = os.path.getsize(base + '.forest') / 1024
+            compact = load_compact_model(base)
+            timings = []
+            for predictor in (model, compact):
+                predictor.predict(row)
+                started = time.perf_counter()
+                for _ in range(args.repeat):
+                    predictor.predict(row)
+                timings.append((time.perf_counter() - started) / args.repeat * 1000)
+            del compact
+
+        print(f"{model_type:<14} {n_trees:>6} {fit_seconds:>7.2f} {mse:>8.4f} {pickle_kib:>11.0f} {compact_kib:>12.0f} "
+              f"{timings[0]:>11.3f} {timings[1]:>11.3f}")
+    return 0
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '_model-load-child':
+        _measure_model_load(sys.argv[2], sys.argv[3])
+        return 0
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('model-load', help='pickle vs compact artifact load time and RSS')
+    p.add_argument('--model', default='risk_model')
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--export', action='store_true', help='re-export the compact artifact first')
+    p.set_defaults(func=bench_model_load)
+
+    p = sub.add_parser('workers', help='per-worker RSS with and without gunicorn preload')
+    p.add_argument('--workers', type=int, default=3)
+    p.add_argument('--format', choices=('compact', 'pickle'), default='pickle')
+    p.add_argument('--settle', type=float, default=5.0, help='seconds to wait for background loading')
+    p.set_defaults(func=bench_workers)
+
+    p = sub.add_parser('synthetic', help='vectorized synthetic couple generation time')
+    p.add_argument('--couples', type=int, default=100000)
+    p.add_argument('--questions', type=int, default=59, help='answerable questions (0 = use the loaded schema)')
+    p.set_defaults(func=bench_synthetic)
+
+    p = sub.add_parser('search', help='grid vs successive-halving hyperparameter search')
+    p.add_argument('--couples', type=int, default=500)
+    p.add_argument('--questions', type=int, default=59, help='answerable questions (0 = use the loaded schema)')
+    p.add_argument('--modes', default='grid,halving:n_samples,halving:n_estimators')
+    p.set_defaults(func=bench_search)
+
+    p = sub.add_parser('category-model', help='per-category vs native multi-output category forest')
+    p.add_argument('--couples', type=int, default=500)
+    p.add_argument('--questions', type=int, default=59, help='answerable questions (0 = use the loaded schema)')
+    p.add_argument('--trees', type=int, default=200)
+    p.add_argument('--max-depth', type=int, default=15)
+    p.add_argument('--repeat', type=int, default=50)
+    p.add_argument('--types', default='per_category,multi_output')
+    p.set_defaults(func=bench_category_model)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+# Compact Forest Artifacts
+"""
+Compact, memory-mappable storage for fitted random forests
+Writes only the fitted trees' node arrays (float32 thresholds, small-int feature ids)
+into one raw binary file plus a JSON manifest, and loads them back with mmap so every
+gunicorn worker shares the same pages instead of unpickling a private copy.
+"""
+
+import os
+import json
+import mmap
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+FORMAT_NAME = 'compact-forest'
+FORMAT_VERSION = 1
+ARTIFACT_SUFFIX = '.forest'
+MANIFEST_SUFFIX = '.forest.json'
+_ALIGNMENT = 64  # Byte alignment of each array inside the binary file
+
+
+def artifact_paths(base_path: str) -> Tuple[str, str]:
+    """Return (binary_path, manifest_path) for an artifact base path like '.../risk_model'"""
+    return base_path + ARTIFACT_SUFFIX, base_path + MANIFEST_SUFFIX
+
+
+def artifact_exists(base_path: str) -> bool:
+    """True if both the binary file and the manifest exist"""
+    bin_path, manifest_path = artifact_paths(base_path)
+    return os.path.exists(bin_path) and os.path.exists(manifest_path)
+
+
+def _unwrap_forests(model) -> Tuple[str, List[Any]]:
+    """Return (kind, forests) for a fitted RandomForest, MultiOutputRegressor or GridSearchCV"""
+    # GridSearchCV / HalvingGridSearchCV keep the refit model in best_estimator_
+    if hasattr(model, 'best_estimator_'):
+        model = model.best_estimator_
+
+    # MultiOutputRegressor: one single-output forest per target column
+    if hasattr(model, 'estimators_') and hasattr(model, 'estimator') and not hasattr(model, 'tree_'):
+        sub_models = list(model.estimators_)
+        if sub_models and all(hasattr(m, 'estimators_') for m in sub_models):
+            return 'regressor', sub_models
+
+    if hasattr(model, 'estimators_') and all(hasattr(t, 'tree_') for t in model.estimators_):
+        kind = 'classifier' if hasattr(model, 'classes_') else 'regressor'
+        return kind, [model]
+
+    raise ValueError(f"Unsupported model type for compact export: {type(model).__name__}")
+
+
+def _threshold_float32(threshold: np.ndarray) -> np.ndarray:
+    """Round thresholds down to float32 so that x <= t32 gives the same split as x <= t64 for float32 x"""
+    t32 = threshold.astype(np.float32)
+    too_high = t32.astype(np.float64) > threshold
+    t32[too_high] = np.nextafter(t32[too_high], np.float32(-np.inf))
+    return t32
+
+
+def export_compact_model(model, base_path: str) -> Dict[str, Any]:
+    """Export a fitted forest model to '<base_path>.forest' + '<base_path>.forest.json'
+
+    Returns the manifest that was written.
+    """
+    kind, forests = _unwrap_forests(model)
+    n_features = int(forests[0].n_features_in_)
+    feature_dtype = np.uint8 if n_features <= np.iinfo(np.uint8).max else np.uint16
+
+    lefts, rights, features, thresholds, values, roots = [], [], [], [], [], []
+    forest_entries = []
+    node_offset = 0
+    leaf_offset = 0
+    tree_offset = 0
+    output_offset = 0
+    n_values = None
+
+    for forest in forests:
+        forest_trees = forest.estimators_
+        forest_outputs = int(getattr(forest, 'n_outputs_', 1))
+        for tree in forest_trees:
+            t = tree.tree_
+            is_leaf = t.children_left == -1
+            leaf_ids = np.cumsum(is_leaf) - 1 + leaf_offset
+
+            # Internal nodes point at global node ids; leaves store ~leaf_id (always negative)
+            left = np.where(is_leaf, ~leaf_ids, t.children_left + node_offset).astype(np.int32)
+            right = np.where(is_leaf, ~leaf_ids, t.children_right + node_offset).astype(np.int32)
+            feature = np.where(is_leaf, 0, t.feature).astype(feature_dtype)
+            threshold = np.where(is_leaf, 0.0, _threshold_float32(t.threshold)).astype(np.float32)
+
+            leaf_value = t.value[is_leaf]
+            if kind == 'classifier':
+                # Single-output classifier: (n_leaves, 1, n_classes) -> class probabilities
+                leaf_value = leaf_value[:, 0, :]
+                totals = leaf_value.sum(axis=1, keepdims=True)
+                totals[totals == 0] = 1.0
+                leaf_value = leaf_value / totals
+            else:
+                # Regressor: (n_leaves, n_outputs, 1) -> per-output mean
+                leaf_value = leaf_value[:, :, 0]
+
+            if n_values is None:
+                n_values = leaf_value.shape[1]
+            elif kind == 'classifier' and leaf_value.shape[1] != n_values:
+                raise ValueError("All trees must share the same class layout")
+
+            lefts.append(left)
+            rights.append(right)
+            features.append(feature)
+            thresholds.append(threshold)
+            values.append(leaf_value.astype(np.float32))
+            roots.append(node_offset)
+
+            node_offset += t.node_count
+            leaf_offset += int(is_leaf.sum())
+
+        forest_entries.append({
+            'tree_start': tree_offset,
+            'tree_end': tree_offset + len(forest_trees),
+            'output_start': output_offset,
+            'n_outputs': forest_outputs
+        })
+        tree_offset += len(forest_trees)
+        output_offset += forest_outputs
+
+    if kind == 'regressor':
+        # Pad leaf values to a common width so forests of different output counts share one array
+        width = max(v.shape[1] for v in values)
+        values = [np.pad(v, ((0, 0), (0, width - v.shape[1]))) if v.shape[1] < width else v for v in values]
+
+    arrays = {
+        'left': np.concatenate(lefts),
+        'right': np.concatenate(rights),
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'value': np.concatenate(values),
+        'root': np.asarray(roots, dtype=np.int32)
+    }
+
+    bin_path, manifest_path = artifact_paths(base_path)
+    layout = {}
+    offset = 0
+    tmp_bin = bin_path + '.tmp'
+    with open(tmp_bin, 'wb') as f:
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            padding = (-offset) % _ALIGNMENT
+            f.write(b'\0' * padding)
+            offset += padding
+            layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            f.write(array.tobytes())
+            offset += array.nbytes
+
+    source = model.best_estimator_ if hasattr(model, 'best_estimator_') else model
+    manifest = {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'kind': kind,
+        'n_features': n_features,
+        'n_outputs': output_offset,
+        'classes': [c.item() if hasattr(c, 'item') else c for c in forests[0].classes_] if kind == 'classifier' else None,
+        'n_trees': tree_offset,
+        'n_nodes': node_offset,
+        'n_leaves': leaf_offset,
+        'forests': forest_entries,
+        'arrays': layout,
+        'bytes': offset,
+        'source_type': type(source).__name__
+    }
+    tmp_manifest = manifest_path + '.tmp'
+    with open(tmp_manifest, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+
+    # Publish the binary first so a visible manifest always describes a complete file
+    os.replace(tmp_bin, bin_path)
+    os.replace(tmp_manifest, manifest_path)
+    return manifest
+
+
+class CompactForest:
+    """Read-only forest backed by a memory-mapped compact artifact
+
+    Exposes the subset of the scikit-learn estimator API the service uses:
+    predict, predict_proba (classifiers), n_features_in_, classes_ and n_outputs_.
+    """
+
+    def __init__(self, manifest: Dict[str, Any], buffer, source_path: Optional[str] = None):
+        if manifest.get('format') != FORMAT_NAME:
+            raise ValueError(f"Not a {FORMAT_NAME} manifest")
+        if manifest.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported {FORMAT_NAME} version: {manifest.get('version')}")
+
+        self.manifest = manifest
+        self.source_path = source_path
+        self._buffer = buffer  # Keep the mmap alive for as long as the arrays are used
+        self.kind = manifest['kind']
+        self.n_features_in_ = int(manifest['n_features'])
+        self.n_outputs_ = int(manifest['n_outputs'])
+        self.n_trees_ = int(manifest['n_trees'])
+        self.classes_ = np.asarray(manifest['classes']) if self.kind == 'classifier' else None
+
+        arrays = {}
+        for name, spec in manifest['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            shape = tuple(spec['shape'])
+            count = int(np.prod(shape)) if shape else 1
+            arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=spec['offset']).reshape(shape)
+        self._left = arrays['left']
+        self._right = arrays['right']
+        self._feature = arrays['feature']
+        self._threshold = arrays['threshold']
+        self._value = arrays['value']
+        self._root = arrays['root']
+
+    @classmethod
+    def load(cls, base_path: str) -> 'CompactForest':
+        """Memory-map '<base_path>.forest' described by '<base_path>.forest.json'"""
+        bin_path, manifest_path = artifact_paths(base_path)
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        with open(bin_path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(buffer) < manifest['bytes']:
+            raise ValueError(f"{bin_path} is truncated ({len(buffer)} < {manifest['bytes']} bytes)")
+        return cls(manifest, buffer, source_path=base_path)
+
+    def _validate_X(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but {type(self).__name__} is expecting "
+                f"{self.n_features_in_} features as input."
+            )
+        return X
+
+    def apply(self, X, tree_start: int = 0, tree_end: Optional[int] = None) -> np.ndarray:
+        """Return leaf ids of shape (n_trees, n_samples) for trees [tree_start, tree_end)"""
+        X = self._validate_X(X)
+        roots = self._root[tree_start:tree_end]
+        nodes = np.repeat(roots[:, None], X.shape[0], axis=1).astype(np.int64)
+        active = self._left[nodes] >= 0
+
+        # Advance every (tree, sample) pair that hasn't reached a leaf one level per pass
+        while active.any():
+            tree_idx, sample_idx = np.nonzero(active)
+            current = nodes[tree_idx, sample_idx]
+            go_left = X[sample_idx, self._feature[current]] <= self._threshold[current]
+            nxt = np.where(go_left, self._left[current], self._right[current])
+            nodes[tree_idx, sample_idx] = nxt
+            active[tree_idx, sample_idx] = self._left[nxt] >= 0
+
+        return ~self._left[nodes]
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities averaged over trees (classifiers only)"""
+        if self.kind != 'classifier':
+            raise AttributeError("predict_proba is only available for classifiers")
+        leaves = self.apply(X)
+        return self._value[leaves].astype(np.float64).mean(axis=0)
+
+    def predict(self, X) -> np.ndarray:
+        """Predicted classes (classifier) or per-output means (regressor)"""
+        if self.kind == 'classifier':
+            return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+        X = self._validate_X(X)
+        outputs = np.empty((X.shape[0], self.n_outputs_), dtype=np.float64)
+        for forest in self.manifest['forests']:
+            leaves = self.apply(X, forest['tree_start'], forest['tree_end'])
+            n_out = forest['n_outputs']
+            start = forest['output_start']
+            outputs[:, start:start + n_out] = self._value[leaves][:, :, :n_out].astype(np.float64).mean(axis=0)
+        return outputs[:, 0] if self.n_outputs_ == 1 else outputs
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the mapped artifact in bytes"""
+        return int(self.manifest['bytes'])
+
+
+def load_compact_model(base_path: str) -> CompactForest:
+    """Load a compact artifact written by export_compact_model"""
+    return CompactForest.load(base_path)
+
+
+if __name__ == '__main__':
+    # Convert existing pickles: python compact_forest.py risk_model.pkl category_model.pkl
+    import sys
+    import pickle
+
+    if len(sys.argv) < 2:
+        print("Usage: python compact_forest.py <model.pkl> [<model.pkl> ...]")
+        sys.exit(1)
+
+    for pickle_path in sys.argv[1:]:
+        with open(pickle_path, 'rb') as f:
+            fitted = pickle.load(f)
+        base = os.path.splitext(pickle_path)[0]
+        written = export_compact_model(fitted, base)
+        print(f"{pickle_path} -> {base}{ARTIFACT_SUFFIX}: {written['n_trees']} trees, "
+              f"{written['n_nodes']} nodes, {written['bytes'] / 1024:.0f} KiB")
@@ -0,0 +1,123 @@
+# Feature Matrix Builder
+"""
+Columnar construction of the model feature matrix, shared by training and /analyze
+
+Layout (one row per couple):
+    demographic features       DEMOGRAPHIC_FEATURES (11)
+    male responses             one per answerable question
+    female responses           one per answerable question
+    personalized features      PERSONALIZED_FEATURES (6)
+
+The matrix is preallocated once as float32 (the forests compare thresholds in float32
+anyway) and each block is filled with whole-column numpy operations, so building N rows
+costs a handful of array ops instead of N Python lists.
+"""
+
+import numpy as np
+from typing import Any, Dict, Mapping, Sequence
+
+DEMOGRAPHIC_FEATURES = (
+    'male_age', 'female_age', 'age_gap', 'years_living_together',
+    'education_level', 'income_level', 'education_income_diff',
+    'is_single', 'is_living_in', 'is_separated_divorced', 'employment_encoded'
+)
+PERSONALIZED_FEATURES = (
+    'alignment_score', 'conflict_ratio',
+    'category_alignment_1', 'category_alignment_2', 'category_alignment_3', 'category_alignment_4'
+)
+DEMOGRAPHIC_FEATURE_COUNT = len(DEMOGRAPHIC_FEATURES)
+PERSONALIZED_FEATURE_COUNT = len(PERSONALIZED_FEATURES)
+
+FEATURE_DTYPE = np.float32
+RESPONSE_DTYPE = np.uint8  # Answers are small positive codes (1-5)
+SEPARATED_STATUSES = ('Separated', 'Divorced', 'Widowed')
+EMPLOYMENT_CODES = {'Employed': 1, 'Self-employed': 2}  # Unemployed or unknown -> 0
+
+# Columns build() reads; civil_status and employment_status may be omitted
+FEATURE_COLUMNS = (
+    'male_age', 'female_age', 'years_living_together', 'education_level', 'income_level',
+    'civil_status', 'employment_status', 'male_responses', 'female_responses'
+)
+
+
+class FeatureBuilder:
+    """Builds N x F feature matrices for a schema with num_questions answerable questions"""
+
+    def __init__(self, num_questions: int, num_personalized: int = PERSONALIZED_FEATURE_COUNT,
+                 dtype=FEATURE_DTYPE):
+        self.num_questions = int(num_questions)
+        self.num_personalized = int(num_personalized)
+        self.dtype = dtype
+        male_start = DEMOGRAPHIC_FEATURE_COUNT
+        female_start = male_start + self.num_questions
+        personalized_start = female_start + self.num_questions
+        self.slices = {
+            'demographic': slice(0, male_start),
+            'male_responses': slice(male_start, female_start),
+            'female_responses': slice(female_start, personalized_start),
+            'personalized': slice(personalized_start, personalized_start + self.num_personalized)
+        }
+        self.n_features = personalized_start + self.num_personalized
+
+    def allocate(self, num_rows: int) -> np.ndarray:
+        return np.empty((num_rows, self.n_features), dtype=self.dtype)
+
+    def _responses(self, columns: Mapping[str, Any], key: str, num_rows: int) -> np.ndarray:
+        if columns.get(key) is None:
+            raise ValueError("Training data must include separate male_responses and female_responses (from respondent field)")
+        responses = np.asarray(columns[key])
+        if responses.ndim != 2 or responses.shape[0] != num_rows:
+            raise ValueError(f"{key} must be an N x Q matrix, got shape {responses.shape}")
+        if responses.shape[1] != self.num_questions:
+            raise ValueError(f"{key} length ({responses.shape[1]}) does not match expected ({self.num_questions})")
+        return responses
+
+    def build(self, columns: Mapping[str, Any], personalized: Any, out: np.ndarray = None) -> np.ndarray:
+        """Assemble the feature matrix from column arrays (length N) and an N x P personalized block"""
+        male_age = np.asarray(columns['male_age'], dtype=self.dtype)
+        num_rows = len(male_age)
+        X = self.allocate(num_rows) if out is None else out
+        if X.shape != (num_rows, self.n_features):
+            raise ValueError(f"Output buffer has shape {X.shape}, expected {(num_rows, self.n_features)}")
+
+        female_age = np.asarray(columns['female_age'], dtype=self.dtype)
+        education = np.asarray(columns['education_level'], dtype=self.dtype)
+        income = np.asarray(columns['income_level'], dtype=self.dtype)
+        civil_status = columns.get('civil_status')
+        civil_status = np.full(num_rows, 'Single', dtype=object) if civil_status is None else np.asarray(civil_status, dtype=object)
+        employment = columns.get('employment_status')
+
+        X[:, 0] = male_age
+        X[:, 1] = female_age
+        np.abs(male_age - female_age, out=X[:, 2])
+        X[:, 3] = columns['years_living_together']
+        X[:, 4] = education
+        X[:, 5] = income
+        np.abs(education - income, out=X[:, 6])
+        X[:, 7] = civil_status == 'Single'
+        X[:, 8] = civil_status == 'Living In'
+        X[:, 9] = np.isin(civil_status, SEPARATED_STATUSES)
+        X[:, 10] = 0
+        if employment is not None:
+            employment = np.asarray(employment, dtype=object)
+            for status, code in EMPLOYMENT_CODES.items():
+                X[employment == status, 10] = code
+
+        X[:, self.slices['male_responses']] = self._responses(columns, 'male_responses', num_rows)
+        X[:, self.slices['female_responses']] = self._responses(columns, 'female_responses', num_rows)
+
+        personalized = np.asarray(personalized, dtype=self.dtype)
+        if personalized.shape != (num_rows, self.num_personalized):
+            raise ValueError(f"Personalized features must have shape {(num_rows, self.num_personalized)}, got {personalized.shape}")
+        X[:, self.slices['personalized']] = personalized
+        return X
+
+    def build_row(self, profile: Mapping[str, Any], male_responses: Sequence[Any],
+                  female_responses: Sequence[Any], personalized: Sequence[float]) -> np.ndarray:
+        """Single couple (e.g. one /analyze request) -> 1 x F matrix"""
+        columns: Dict[str, Any] = {key: [profile[key]] for key in FEATURE_COLUMNS[:5]}
+        columns['civil_status'] = [profile.get('civil_status', 'Single')]
+        columns['employment_status'] = [profile.get('employment_status', 'Unemployed')]
+        columns['male_responses'] = [list(male_responses)]
+        columns['female_responses'] = [list(female_responses)]
+        return self.build(columns, [list(personalized)])
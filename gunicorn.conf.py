@@ -0,0 +1,53 @@
+# Gunicorn configuration for the ML service
+"""
+Preload mode: schema and models are loaded once in the gunicorn master and the
+workers share those pages copy-on-write instead of each loading a private copy.
+
+    GUNICORN_PRELOAD=false   disable preloading (each worker loads its own copy in the background)
+    WEB_CONCURRENCY=N        number of workers (read by gunicorn itself; PORT sets the bind address)
+"""
+
+import gc
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+
+if preload_app:
+    # Tell service.py to load synchronously at import (in the master) without touching the DB
+    os.environ['SERVICE_PRELOAD'] = '1'
+    # Don't let the collector leave freed holes in pages that are about to be shared
+    # (only while the app is preloaded - when_ready turns it back on in the master)
+    gc.disable()
+
+
+def when_ready(server):
+    """Freeze the preloaded app and turn GC back on in the master
+
+    The master keeps running (it re-forks workers for as long as it lives), so it must not
+    stay without a collector. Freezing first keeps the preloaded objects out of its scans.
+    """
+    if preload_app:
+        gc.freeze()
+        gc.enable()
+        server.log.info(f"Master: preloaded app frozen ({gc.get_freeze_count()} objects), GC re-enabled")
+
+
+def pre_fork(server, worker):
+    """Move everything the master allocated into the permanent generation before forking
+
+    Objects in the permanent generation are never scanned by the workers' collector,
+    so GC refcount/header writes don't un-share the preloaded model and schema pages.
+    """
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    """Re-enable GC and reset per-process state inherited from the master"""
+    if preload_app:
+        gc.enable()
+        import service
+        service.on_worker_fork()
+        server.log.info(f"Worker {worker.pid}: preloaded models shared with master "
+                        f"({gc.get_freeze_count()} frozen objects)")
@@ -0,0 +1,170 @@
+# Versioned Model Registry
+"""
+Versioned model directories with manifests and an atomic active-version pointer
+
+Layout (under MODEL_REGISTRY_DIR, default ./models):
+    v20261019-031500-ab12/      one directory per trained version
+        risk_model.pkl, category_model.pkl, risk_encoder.pkl
+        risk_model.forest(.json), category_model.forest(.json)
+        manifest.json           feature layout, schema hash, metrics, sizes, train time
+    ACTIVE                      {"active": ..., "previous": ...} - replaced atomically
+"""
+
+import os
+import json
+import time
+import shutil
+import secrets
+from typing import Any, Dict, List, Optional
+
+MANIFEST_NAME = 'manifest.json'
+POINTER_NAME = 'ACTIVE'
+
+
+class ModelRegistryError(Exception):
+    """Raised for missing versions or an invalid registry state"""
+
+
+class ModelRegistry:
+    """File-based registry of trained model versions"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    # ------------------------------------------------------------------
+    # Paths and manifests
+    # ------------------------------------------------------------------
+
+    def version_dir(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def pointer_path(self) -> str:
+        return os.path.join(self.root, POINTER_NAME)
+
+    def read_manifest(self, version: str) -> Dict[str, Any]:
+        path = os.path.join(self.version_dir(version), MANIFEST_NAME)
+        if not os.path.exists(path):
+            raise ModelRegistryError(f"Model version {version} not found")
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        """All published versions, newest first"""
+        if not os.path.isdir(self.root):
+            return []
+        manifests = []
+        for name in os.listdir(self.root):
+            if name.startswith('.') or not os.path.isdir(self.version_dir(name)):
+                continue
+            try:
+                manifests.append(self.read_manifest(name))
+            except (ModelRegistryError, ValueError, OSError):
+                continue
+        return sorted(manifests, key=lambda m: m.get('created_at', 0), reverse=True)
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def new_version_id(self) -> str:
+        return time.strftime('v%Y%m%d-%H%M%S', time.gmtime()) + '-' + secrets.token_hex(2)
+
+    def begin_version(self) -> str:
+        """Create a hidden staging directory for a new version and return its path"""
+        os.makedirs(self.root, exist_ok=True)
+        staging = os.path.join(self.root, '.staging-' + secrets.token_hex(4))
+        os.makedirs(staging)
+        return staging
+
+    def publish_version(self, staging_dir: str, manifest: Dict[str, Any]) -> str:
+        """Write the manifest and move the staging directory into place (atomic rename)"""
+        version = manifest.get('version') or self.new_version_id()
+        manifest['version'] = version
+
+        # Record artifact sizes so the manifest describes exactly what was published
+        files = {}
+        for name in sorted(os.listdir(staging_dir)):
+            path = os.path.join(staging_dir, name)
+            if os.path.isfile(path):
+                files[name] = os.path.getsize(path)
+        manifest['files'] = files
+        manifest['size_bytes'] = sum(files.values())
+
+        with open(os.path.join(staging_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, default=str)
+        os.rename(staging_dir, self.version_dir(version))
+        return version
+
+    def discard_staging(self, staging_dir: str) -> None:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    # ------------------------------------------------------------------
+    # Active pointer
+    # ------------------------------------------------------------------
+
+    def read_pointer(self) -> Dict[str, Any]:
+        """Current {'active', 'previous', 'activated_at'} (empty dict if nothing is active)"""
+        try:
+            with open(self.pointer_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_pointer(self, pointer: Dict[str, Any]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.pointer_path() + '.tmp-' + secrets.token_hex(4)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(pointer, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.pointer_path())
+
+    def activate(self, version: str) -> Dict[str, Any]:
+        """Point ACTIVE at version; the currently active version becomes previous"""
+        self.read_manifest(version)  # Raises if the version doesn't exist
+        current = self.read_pointer()
+        if current.get('active') == version:
+            return current
+        pointer = {
+            'active': version,
+            'previous': current.get('active'),
+            'activated_at': time.time()
+        }
+        self._write_pointer(pointer)
+        return pointer
+
+    def rollback(self) -> Dict[str, Any]:
+        """Swap active and previous versions"""
+        current = self.read_pointer()
+        previous = current.get('previous')
+        if not previous:
+            raise ModelRegistryError("No previous model version to roll back to")
+        self.read_manifest(previous)
+        pointer = {
+            'active': previous,
+            'previous': current.get('active'),
+            'activated_at': time.time(),
+            'rolled_back_from': current.get('active')
+        }
+        self._write_pointer(pointer)
+        return pointer
+
+    # ------------------------------------------------------------------
+    # Housekeeping
+    # ------------------------------------------------------------------
+
+    def prune(self, keep: int) -> List[str]:
+        """Delete the oldest versions beyond `keep`, never touching active or previous"""
+        pointer = self.read_pointer()
+        protected = {pointer.get('active'), pointer.get('previous')}
+        removed = []
+        for manifest in self.list_versions()[keep:]:
+            version = manifest['version']
+            if version in protected:
+                continue
+            shutil.rmtree(self.version_dir(version), ignore_errors=True)
+            removed.append(version)
+        return removed
+
+    def active_version(self) -> Optional[str]:
+        return self.read_pointer().get('active')
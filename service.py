@@ -8,14 +8,23 @@ Uses Random Forest models for couple counseling risk assessment and recommendati
 import os
 import json
 import pickle
+import hashlib
+import multiprocessing
+import queue
+import random
+import signal
+import tempfile
 import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split, GridSearchCV, cross_val_score
+from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.metrics import accuracy_score, mean_squared_error
 from sklearn.multioutput import MultiOutputRegressor
 from sklearn.utils import class_weight
@@ -31,9 +40,152 @@ except ImportError as e:
     SMOTE = None  # type: ignore
     SMOTETomek = None  # type: ignore
     print(f"Warning: imbalanced-learn not available. SMOTE features will be disabled. Error: {e}")
+try:
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401 - enables HalvingGridSearchCV
+    from sklearn.model_selection import HalvingGridSearchCV
+    HALVING_SEARCH_AVAILABLE = True
+except ImportError as e:
+    HalvingGridSearchCV = None  # type: ignore
+    HALVING_SEARCH_AVAILABLE = False
+    print(f"Warning: successive halving search not available, using grid search. Error: {e}")
+# Caps BLAS/OpenMP thread pools that numpy/scipy already started (installed with scikit-learn)
+try:
+    from threadpoolctl import threadpool_limits
+    THREADPOOLCTL_AVAILABLE = True
+except ImportError:
+    threadpool_limits = None  # type: ignore
+    THREADPOOLCTL_AVAILABLE = False
+from compact_forest import export_compact_model, load_compact_model, artifact_exists, artifact_paths
+from model_registry import ModelRegistry, ModelRegistryError
+from feature_builder import (FeatureBuilder, FEATURE_COLUMNS, DEMOGRAPHIC_FEATURES, PERSONALIZED_FEATURES,
+                             DEMOGRAPHIC_FEATURE_COUNT, PERSONALIZED_FEATURE_COUNT, FEATURE_DTYPE, RESPONSE_DTYPE)
 import warnings
 warnings.filterwarnings('ignore')
 
+# Threads running synthetic warm-up requests set quiet, so the /analyze pipeline's logs for them
+# are dropped without touching what other threads (real /analyze requests) log
+_log_context = threading.local()
+
+def log(*args, **kwargs):
+    """print() for the /analyze pipeline - silent on a thread running warm-up requests"""
+    if not getattr(_log_context, 'quiet', False):
+        print(*args, **kwargs)
+
+# File locks for the shared training status (Unix only - on Windows training is tracked per process)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Address-space limit for the training process (Unix only)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Serving artifact format: 'compact' memory-maps the .forest artifacts when present
+# (falls back to the pickles), 'pickle' always unpickles the full sklearn models
+MODEL_ARTIFACT_FORMAT = os.getenv('MODEL_ARTIFACT_FORMAT', 'compact').lower()
+
+# gunicorn preload mode (set by gunicorn.conf.py): schema and models load once in the master
+# and forked workers share those pages copy-on-write
+SERVICE_PRELOAD = os.getenv('SERVICE_PRELOAD', '').lower() in ('1', 'true', 'yes')
+
+# Versioned model registry: each training run publishes models/<version>/ and the ACTIVE
+# pointer selects what is served; older versions beyond MODEL_REGISTRY_KEEP are pruned
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR',
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models'))
+MODEL_REGISTRY_KEEP = int(os.getenv('MODEL_REGISTRY_KEEP', '5'))
+
+# Training status is shared by all workers through this file (plus a .lock file held by the
+# trainer); each worker's model watcher checks the registry ACTIVE pointer this often (seconds)
+TRAINING_STATUS_PATH = os.getenv('TRAINING_STATUS_PATH',
+                                 os.path.join(os.path.dirname(os.path.abspath(__file__)), 'training_status.json'))
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', '2'))
+
+# Synthetic /analyze requests pushed through every newly loaded model bundle before it serves
+MODEL_WARMUP_REQUESTS = int(os.getenv('MODEL_WARMUP_REQUESTS', '3'))
+
+# Models trained on other questionnaire schemas are loaded on demand into slots keyed by schema
+# hash and evicted least-recently-used once their artifacts exceed this budget (MB)
+MODEL_SLOT_MEMORY_MB = float(os.getenv('MODEL_SLOT_MEMORY_MB', '256'))
+
+# Hyperparameter search: 'grid' (exhaustive GridSearchCV) or 'halving' (successive halving, where
+# every candidate starts on a small budget and only the best third advances to a bigger one).
+# The halving budget is either trees ('n_estimators' - forest cost is dominated by tree count at
+# this data size) or training samples ('n_samples' - pays off once there are thousands of couples).
+TRAINING_SEARCH_MODE = os.getenv('TRAINING_SEARCH_MODE', 'halving').lower()
+TRAINING_HALVING_RESOURCE = os.getenv('TRAINING_HALVING_RESOURCE', 'n_estimators')
+TRAINING_HALVING_FACTOR = int(os.getenv('TRAINING_HALVING_FACTOR', '3'))
+
+# Category model shape: 'per_category' trains MultiOutputRegressor (one forest per category);
+# 'multi_output' trains one native forest whose trees predict all category scores at once
+# (about 4x fewer trees and faster fit/predict, somewhat higher MSE - see benchmarks.py category-model)
+CATEGORY_MODEL_TYPE = os.getenv('CATEGORY_MODEL_TYPE', 'per_category').lower()
+
+# Tuned hyperparameters are cached per dataset fingerprint; a retrain whose data drifted less than
+# HYPERPARAM_CACHE_MAX_DRIFT from a cached run reuses its best params and only fits the final models
+HYPERPARAM_CACHE_PATH = os.getenv('HYPERPARAM_CACHE_PATH',
+                                  os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hyperparameter_cache.json'))
+HYPERPARAM_CACHE_MAX_DRIFT = float(os.getenv('HYPERPARAM_CACHE_MAX_DRIFT', '0.05'))
+HYPERPARAM_CACHE_ENTRIES = 10
+
+# Run the risk and category searches at the same time, both feeding the one pool of n_jobs loky
+# workers, so neither search's tail of slow candidates leaves cores idle (needs more than one core)
+TRAINING_CONCURRENT_SEARCH = os.getenv('TRAINING_CONCURRENT_SEARCH', 'true').lower() == 'true'
+
+# Training runs in a spawned child process ('process') so it never competes with request handling
+# for the serving worker's GIL; 'thread' runs it in a background thread of the worker as before
+TRAINING_EXECUTION = os.getenv('TRAINING_EXECUTION', 'process').lower()
+TRAINING_PROCESS_NAME = 'model-trainer'
+# POST /train/cancel sends SIGTERM to the training process group (the process and its loky workers)
+# and SIGKILL to whatever is still running this many seconds later
+TRAINING_CANCEL_GRACE = float(os.getenv('TRAINING_CANCEL_GRACE', '10'))
+TRAINING_CANCELLED_EXIT = 3  # Exit code of a training process that stopped because it was cancelled
+# Per-process address-space cap (RLIMIT_AS, MB) of the training process; each of its loky workers
+# inherits a cap of its own. Unset = the container's memory limit (none if unknown), 0 disables it.
+# The whole run (process group) is held to TRAINING_MEMORY_BUDGET_MB by a watchdog instead
+TRAINING_MEMORY_LIMIT_MB = int(os.getenv('TRAINING_MEMORY_LIMIT_MB', '-1'))
+TRAINING_MEMORY_WATCH_INTERVAL = 1.0  # Seconds between process-group RSS checks
+
+# CPU budget for training: TRAINING_CPU_CORES cores, or (when 0) every core but TRAINING_RESERVED_CORES,
+# which stay free for serving. Bounds n_jobs of the search, the forests and SMOTE, and the BLAS/OpenMP
+# thread pools of the training process
+TRAINING_CPU_CORES = int(os.getenv('TRAINING_CPU_CORES', '0'))
+TRAINING_RESERVED_CORES = int(os.getenv('TRAINING_RESERVED_CORES', '1'))
+# Training memory: peak use is estimated before the feature matrix is built; n_jobs is lowered until the
+# estimate fits TRAINING_MEMORY_BUDGET_MB (0 = 80% of the memory currently available), else training refuses
+TRAINING_MEMORY_BUDGET_MB = int(os.getenv('TRAINING_MEMORY_BUDGET_MB', '0'))
+# The feature matrix is a file under this directory that joblib workers memory-map instead of copying
+TRAINING_MEMMAP_DIR = os.getenv('TRAINING_MEMMAP_DIR', tempfile.gettempdir())
+
+# Training stages (prepared data, feature matrix, balanced set, each model's search) are checkpointed
+# here under a hash of their inputs; a /train interrupted by a restart resumes after the last one done
+TRAINING_CHECKPOINTS = os.getenv('TRAINING_CHECKPOINTS', 'true').lower() == 'true'
+TRAINING_CHECKPOINT_DIR = os.getenv('TRAINING_CHECKPOINT_DIR',
+                                    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'training_checkpoints'))
+
+# Low-priority training process: lowered scheduling priority (nice) and affinity to the budgeted cores
+TRAINING_LOW_PRIORITY = os.getenv('TRAINING_LOW_PRIORITY', 'true').lower() == 'true'
+TRAINING_NICE = int(os.getenv('TRAINING_NICE', '10'))
+
+# Incremental retrains ({"incremental": true} on /train) keep the active forests, fit this many new
+# trees per forest and drop as many of the oldest; a full rebuild runs instead once the last one is
+# older than TRAINING_FULL_REBUILD_HOURS
+TRAINING_INCREMENTAL_TREES = int(os.getenv('TRAINING_INCREMENTAL_TREES', '20'))
+TRAINING_FULL_REBUILD_HOURS = float(os.getenv('TRAINING_FULL_REBUILD_HOURS', '24'))
+
+# Rows pulled per round trip while streaming couple_responses for training
+REAL_COUPLES_FETCH_SIZE = int(os.getenv('REAL_COUPLES_FETCH_SIZE', '5000'))
+REAL_COUPLES_ID_BATCH = 500  # access_ids per "WHERE access_id IN (...)" when fetching changed couples
+# Fetched row batches allowed to wait for parsing (bounds ingestion memory to this x fetch size)
+INGEST_QUEUE_BATCHES = int(os.getenv('INGEST_QUEUE_BATCHES', '4'))
+
+# Per-couple response arrays from the last training run; only couples whose couple_responses
+# checksum changed are re-fetched from MySQL
+TRAINING_DATA_CACHE_PATH = os.getenv('TRAINING_DATA_CACHE_PATH',
+                                     os.path.join(os.path.dirname(os.path.abspath(__file__)), 'training_data_cache.npz'))
+
 app = Flask(__name__)
 CORS(app)
 
@@ -41,13 +193,18 @@ CORS(app)
 @app.before_request
 def ensure_questions_loaded():
     """Ensure MEAI questions are loaded before processing requests"""
-    global MEAI_QUESTIONS, MEAI_QUESTION_MAPPING, MEAI_CATEGORIES
-    if not MEAI_QUESTIONS or len(MEAI_QUESTIONS) == 0:
-        print("MEAI_QUESTIONS not loaded, loading from database...")
-        if not MEAI_CATEGORIES or len(MEAI_CATEGORIES) == 0:
-            load_categories_from_db()
-        load_questions_from_db()
-        print(f"Loaded {len(MEAI_QUESTIONS)} categories with questions")
+    # Liveness/readiness probes must never wait on the database, and while the
+    # background initializer is running it owns the schema load
+    if request.endpoint in ('health', 'ready'):
+        return
+    with service_state_lock:
+        if service_state['initializing']:
+            return
+    if schema_needs_refresh():
+        # Never reconnect on the request path - refresh in the background
+        # (single-flight, and skipped while backing off after DB failures)
+        if request_schema_reload():
+            print("MEAI schema missing or fallback only, reloading from database in background...")
 
 def get_db_config():
     """
@@ -112,8 +269,9 @@ def get_db_config():
         'charset': 'utf8mb4'
     }
 
-def calculate_personalized_features_flask(questionnaire_responses, male_responses, female_responses):
+def calculate_personalized_features_flask(questionnaire_responses, male_responses, female_responses, schema=None):
     """Calculate personalized features in Flask service when not provided by PHP API"""
+    schema_categories, schema_questions, question_mapping = resolve_schema(schema)
     
     # If we have separate male/female responses, use them
     if male_responses and female_responses and len(male_responses) > 0 and len(female_responses) > 0:
@@ -173,9 +331,9 @@ def calculate_personalized_features_flask(questionnaire_responses, male_response
     
     # NEW: Category-specific alignment scores (4 features, one per MEAI category)
     category_alignments = []
-    for category_id in range(1, len(MEAI_CATEGORIES) + 1):
+    for category_id in range(1, len(schema_categories) + 1):
         # Get question IDs for this category
-        category_question_ids = [qid for qid, cid in MEAI_QUESTION_MAPPING.items() if cid == category_id]
+        category_question_ids = [qid for qid, cid in question_mapping.items() if cid == category_id]
         
         if not category_question_ids:
             category_alignments.append(0.5)  # Default if no questions
@@ -222,22 +380,61 @@ def calculate_personalized_features_flask(questionnaire_responses, male_response
     }
 
 # Global variables for models
+# The active bundle is replaced as a whole (never mutated in place) so a request that takes a
+# reference to it always sees a risk model, category model and encoder from the same version
 ml_models = {
     'risk_model': None,
     'category_model': None,
     'risk_encoder': None
 }
 
+# Loaded registry versions - only the active and previous bundles stay in memory so that
+# activation and rollback are a reference swap
+model_versions = {
+    'active': None,  # {'version': str or None, 'manifest': dict, 'models': dict}
+    'previous': None
+}
+model_swap_lock = threading.Lock()
+model_registry = ModelRegistry(MODEL_REGISTRY_DIR)
+
+# /analyze latency for the active bundle (reset on every swap) - compared with the warm-up timings on /status
+serving_latency = {
+    'bundle_id': None,
+    'requests': 0,
+    'first_ms': None,
+    'last_ms': None,
+    'total_ms': 0.0
+}
+serving_latency_lock = threading.Lock()
+
 # Training status tracking
 training_status = {
     'in_progress': False,
     'progress': 0,
     'message': '',
     'error': None,
-    'thread': None  # Track the training thread
+    'started_at': None,
+    'thread': None,  # Track the training thread
+    'lock_file': None  # Open file holding the cross-worker training lock
 }
 training_lock = threading.Lock()
 
+# Service readiness tracking (schema and models are loaded in a background thread
+# so gunicorn can bind immediately; see initialize_service)
+service_state = {
+    'started_at': time.time(),
+    'initializing': False,
+    'initialized': False,
+    'ready': False,
+    'phase': 'starting',
+    'components': {},  # {name: {'loaded': bool, 'seconds': float, ...}}
+    'models_match_schema': None,
+    'error': None,
+    'thread': None,  # Track the initialization thread
+    'watcher': None  # Model-version watcher thread
+}
+service_state_lock = threading.Lock()
+
 # MEAI Categories - dynamically loaded from database question_category table
 # These 4 categories are used for ML predictions and recommendations
 MEAI_CATEGORIES = []
@@ -250,8 +447,9 @@ MEAI_QUESTION_MAPPING = {}  # {question_id: category_id}
 # DATA VALIDATION FUNCTIONS
 # ============================================================================
 
-def validate_couple_data(couple_profile, questionnaire_responses, male_responses=None, female_responses=None):
+def validate_couple_data(couple_profile, questionnaire_responses, male_responses=None, female_responses=None, schema=None):
     """Validate input data before training/prediction"""
+    schema_categories, schema_questions, question_mapping = resolve_schema(schema)
     errors = []
     warnings = []
     
@@ -289,14 +487,14 @@ def validate_couple_data(couple_profile, questionnaire_responses, male_responses
     
     # Validate questionnaire responses
     if questionnaire_responses:
-        # Calculate expected count from MEAI_QUESTIONS structure (more reliable than MEAI_QUESTION_MAPPING)
+        # Calculate expected count from schema_questions structure (more reliable than question_mapping)
         expected_count = None
         received_count = len(questionnaire_responses)
         
-        if MEAI_QUESTIONS and len(MEAI_QUESTIONS) > 0:
+        if schema_questions and len(schema_questions) > 0:
             expected_count = 0
             total_questions_in_structure = 0
-            for cat_id, cat_questions in MEAI_QUESTIONS.items():
+            for cat_id, cat_questions in schema_questions.items():
                 for q_id, q_data in cat_questions.items():
                     total_questions_in_structure += 1
                     if q_data.get('sub_questions') and len(q_data['sub_questions']) > 0:
@@ -305,24 +503,24 @@ def validate_couple_data(couple_profile, questionnaire_responses, male_responses
                     elif not q_data.get('sub_questions') or len(q_data.get('sub_questions', [])) == 0:
                         # Standalone question, count it
                         expected_count += 1
-            print(f"DEBUG - MEAI_QUESTIONS: {len(MEAI_QUESTIONS)} categories, {total_questions_in_structure} questions, {expected_count} answerable items")
-            print(f"DEBUG - Calculated expected_count from MEAI_QUESTIONS: {expected_count}")
+            log(f"DEBUG - schema_questions: {len(schema_questions)} categories, {total_questions_in_structure} questions, {expected_count} answerable items")
+            log(f"DEBUG - Calculated expected_count from schema_questions: {expected_count}")
             
             # If calculated count is 0 or very small, something is wrong - don't validate
             if expected_count == 0 or expected_count < 10:
-                print(f"WARNING: Calculated expected_count ({expected_count}) seems wrong, skipping validation")
+                log(f"WARNING: Calculated expected_count ({expected_count}) seems wrong, skipping validation")
                 expected_count = None
-        elif MEAI_QUESTION_MAPPING and len(MEAI_QUESTION_MAPPING) > 0:
+        elif question_mapping and len(question_mapping) > 0:
             # Fallback to mapping if questions structure not available
-            mapping_count = len(MEAI_QUESTION_MAPPING)
-            print(f"DEBUG - MEAI_QUESTION_MAPPING has {mapping_count} entries")
+            mapping_count = len(question_mapping)
+            log(f"DEBUG - question_mapping has {mapping_count} entries")
             
             # Only use mapping if it has a reasonable number of entries (should be 59, not 4)
             if mapping_count >= 50:  # Reasonable threshold for answerable questions
                 expected_count = mapping_count
-                print(f"DEBUG - Using MEAI_QUESTION_MAPPING count: {expected_count}")
+                log(f"DEBUG - Using question_mapping count: {expected_count}")
             else:
-                print(f"WARNING: MEAI_QUESTION_MAPPING count ({mapping_count}) seems too low, skipping validation")
+                log(f"WARNING: question_mapping count ({mapping_count}) seems too low, skipping validation")
                 expected_count = None
         
         # If we still don't have an expected count, skip validation (allow any count)
@@ -330,17 +528,17 @@ def validate_couple_data(couple_profile, questionnaire_responses, male_responses
         # Also, if we receive 59 responses (the known correct count), accept it even if expected_count is wrong
         if expected_count is not None and received_count != expected_count:
             # Special case: if we receive 59 responses (known correct count), accept it
-            # This handles cases where MEAI_QUESTIONS isn't loaded correctly
+            # This handles cases where schema_questions isn't loaded correctly
             if received_count == 59:
-                print(f"INFO: Received 59 responses (known correct count), accepting despite expected_count={expected_count}")
+                log(f"INFO: Received 59 responses (known correct count), accepting despite expected_count={expected_count}")
             else:
                 errors.append(f"Expected {expected_count} responses, got {received_count}")
-                print(f"ERROR - Validation failed: Expected {expected_count}, got {received_count}")
+                log(f"ERROR - Validation failed: Expected {expected_count}, got {received_count}")
         elif expected_count is None:
-            print(f"INFO: Could not determine expected count, accepting {received_count} responses (validation skipped)")
+            log(f"INFO: Could not determine expected count, accepting {received_count} responses (validation skipped)")
             # If we receive 59, that's the known correct count, so log it
             if received_count == 59:
-                print(f"INFO: 59 responses received - this matches the expected number of answerable questions")
+                log(f"INFO: 59 responses received - this matches the expected number of answerable questions")
         
         # Check for invalid response values
         invalid_responses = [r for r in questionnaire_responses if r not in [2, 3, 4]]
@@ -454,7 +652,7 @@ def load_categories_from_db():
         
         # Extract category names and simplify them
         # Expected format: "MARRIAGE EXPECTATIONS AND INVENTORY ON [CATEGORY NAME]"
-        MEAI_CATEGORIES = []
+        categories = []
         for row in rows:
             full_name = row[0]
             
@@ -464,16 +662,22 @@ def load_categories_from_db():
                 short_name = full_name.split(' ON ', 1)[1].strip()
                 # Convert from ALL CAPS to Title Case
                 short_name = short_name.title()
-                MEAI_CATEGORIES.append(short_name)
+                categories.append(short_name)
             else:
                 # Fallback: use full name if format is unexpected
-                MEAI_CATEGORIES.append(full_name.title())
+                categories.append(full_name.title())
         
         conn.close()
+        # Swap in the complete list at once so requests never see a partial one
+        MEAI_CATEGORIES = categories
         print(f"Loaded {len(MEAI_CATEGORIES)} MEAI categories from database")
         return True
     except Exception as e:
         print(f"Error loading categories from database: {e}")
+        if MEAI_CATEGORIES:
+            # Keep the last good categories (from the database or the snapshot)
+            print("Keeping previously loaded categories")
+            return False
         # Fallback to hardcoded categories
         MEAI_CATEGORIES = [
             'Marriage And Relationship',
@@ -484,6 +688,23 @@ def load_categories_from_db():
         print("Using fallback categories")
         return False
 
+def build_question_mapping(questions):
+    """Map each answerable question (standalone or sub-question) to its category, 1-indexed"""
+    mapping = {}
+    question_counter = 1
+    for cat_id, cat_questions in questions.items():
+        for q_id, q_data in cat_questions.items():
+            if q_data['sub_questions']:
+                # Question has sub-questions, map each sub-question
+                for sub_idx in range(len(q_data['sub_questions'])):
+                    mapping[question_counter] = cat_id
+                    question_counter += 1
+            else:
+                # Standalone question, map it
+                mapping[question_counter] = cat_id
+                question_counter += 1
+    return mapping
+
 def load_questions_from_db():
     """Load MEAI questions and sub-questions from database"""
     global MEAI_QUESTIONS, MEAI_QUESTION_MAPPING
@@ -511,55 +732,37 @@ def load_questions_from_db():
         
         cursor.execute(query)
         rows = cursor.fetchall()
+        conn.close()
         
-        # Initialize structure
-        MEAI_QUESTIONS = {}
-        MEAI_QUESTION_MAPPING = {}
+        # Build the structure locally and swap it in once complete
+        questions = {}
         
         for row in rows:
             category_id, question_id, question_text, sub_question_id, sub_question_text = row
             
             # Initialize category if not exists
-            if category_id not in MEAI_QUESTIONS:
-                MEAI_QUESTIONS[category_id] = {}
+            if category_id not in questions:
+                questions[category_id] = {}
             
             # Initialize question if not exists
-            if question_id not in MEAI_QUESTIONS[category_id]:
-                MEAI_QUESTIONS[category_id][question_id] = {
+            if question_id not in questions[category_id]:
+                questions[category_id][question_id] = {
                     'text': question_text,
                     'sub_questions': []
                 }
             
             # Add sub-question if exists
             if sub_question_text:
-                MEAI_QUESTIONS[category_id][question_id]['sub_questions'].append(sub_question_text)
+                questions[category_id][question_id]['sub_questions'].append(sub_question_text)
         
         # Build mapping for answerable questions only
-        question_counter = 1
-        for cat_id, cat_questions in MEAI_QUESTIONS.items():
-            for q_id, q_data in cat_questions.items():
-                if q_data['sub_questions']:
-                    # Question has sub-questions, map each sub-question
-                    for sub_idx in range(len(q_data['sub_questions'])):
-                        MEAI_QUESTION_MAPPING[question_counter] = cat_id
-                        question_counter += 1
-                else:
-                    # Standalone question, map it
-                    MEAI_QUESTION_MAPPING[question_counter] = cat_id
-                    question_counter += 1
+        mapping = build_question_mapping(questions)
         
-        conn.close()
+        MEAI_QUESTIONS = questions
+        MEAI_QUESTION_MAPPING = mapping
         
         # Count answerable questions only (standalone main questions + sub-questions)
-        total_answerable_questions = 0
-        for cat_questions in MEAI_QUESTIONS.values():
-            for q in cat_questions.values():
-                if q['sub_questions']:
-                    # Question has sub-questions, count only the sub-questions
-                    total_answerable_questions += len(q['sub_questions'])
-                else:
-                    # Standalone question, count it
-                    total_answerable_questions += 1
+        total_answerable_questions = len(mapping)
         
         print(f"Loaded {total_answerable_questions} answerable questions from database")
         print(f"Questions by category:")
@@ -576,6 +779,10 @@ def load_questions_from_db():
         
     except Exception as e:
         print(f"Error loading questions from database: {e}")
+        if MEAI_QUESTIONS:
+            # Keep the last good structure (from the database or the snapshot)
+            print("Keeping previously loaded question structure")
+            return False
         # Fallback: create basic structure
         MEAI_QUESTIONS = {
             1: {1: {'text': 'Marriage and Relationship Question', 'sub_questions': []}},
@@ -587,445 +794,880 @@ def load_questions_from_db():
         print("Using fallback question structure")
         return False
 
+# ============================================================================
+# SCHEMA SNAPSHOT AND RELOAD
+# ============================================================================
+
+# Last good question/category schema, used at startup without waiting on the DB
+SCHEMA_SNAPSHOT_PATH = os.getenv(
+    'SCHEMA_SNAPSHOT_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema_snapshot.json')
+)
+SCHEMA_RELOAD_BACKOFF_BASE = float(os.getenv('SCHEMA_RELOAD_BACKOFF_BASE', '5'))  # seconds
+SCHEMA_RELOAD_BACKOFF_MAX = float(os.getenv('SCHEMA_RELOAD_BACKOFF_MAX', '600'))  # seconds
+
+# Schema load tracking - only one reload runs at a time, failures back off exponentially
+schema_state = {
+    'source': None,  # 'database', 'snapshot' or 'fallback'
+    'loaded_at': None,
+    'failures': 0,
+    'next_attempt_at': 0.0,
+    'last_error': None,
+    'thread': None  # Track the background reload thread
+}
+schema_state_lock = threading.Lock()
+schema_reload_lock = threading.Lock()  # Held for the duration of a reload (single-flight)
+
+def parse_schema_questions(questions):
+    """Questions dict read back from JSON - object keys are strings, restore the integer category/question ids"""
+    return {
+        int(cat_id): {
+            int(q_id): {'text': q_data['text'], 'sub_questions': list(q_data['sub_questions'])}
+            for q_id, q_data in cat_questions.items()
+        }
+        for cat_id, cat_questions in questions.items()
+    }
+
+def resolve_schema(schema=None):
+    """(categories, questions, question mapping) of a model's schema, or of the currently loaded one"""
+    if schema is None:
+        return MEAI_CATEGORIES, MEAI_QUESTIONS, MEAI_QUESTION_MAPPING
+    return schema['categories'], schema['questions'], schema['mapping']
+
+def schema_from_manifest(manifest):
+    """Schema a registry version was trained on (None for versions that didn't record it)"""
+    recorded = manifest.get('schema')
+    if not recorded:
+        return None
+    questions = parse_schema_questions(recorded['questions'])
+    return {
+        'hash': manifest.get('schema_hash'),
+        'categories': list(recorded['categories']),
+        'questions': questions,
+        'mapping': build_question_mapping(questions)
+    }
+
+def save_schema_snapshot():
+    """Persist the current (database-loaded) schema to the snapshot file atomically"""
+    snapshot = {
+        'saved_at': time.time(),
+        'categories': MEAI_CATEGORIES,
+        'questions': MEAI_QUESTIONS
+    }
+    tmp_path = SCHEMA_SNAPSHOT_PATH + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, SCHEMA_SNAPSHOT_PATH)
+        print(f"Saved schema snapshot to {SCHEMA_SNAPSHOT_PATH}")
+        return True
+    except Exception as e:
+        print(f"Error saving schema snapshot: {e}")
+        return False
+
+def load_schema_snapshot():
+    """Load the last good schema from the snapshot file (no database access)"""
+    global MEAI_CATEGORIES, MEAI_QUESTIONS, MEAI_QUESTION_MAPPING
+    if not os.path.exists(SCHEMA_SNAPSHOT_PATH):
+        return False
+    try:
+        with open(SCHEMA_SNAPSHOT_PATH, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        
+        questions = parse_schema_questions(snapshot['questions'])
+        categories = list(snapshot['categories'])
+        if not categories or not questions:
+            print(f"Schema snapshot {SCHEMA_SNAPSHOT_PATH} is empty, ignoring it")
+            return False
+        
+        MEAI_CATEGORIES = categories
+        MEAI_QUESTIONS = questions
+        MEAI_QUESTION_MAPPING = build_question_mapping(questions)
+        with schema_state_lock:
+            schema_state['source'] = 'snapshot'
+            schema_state['loaded_at'] = snapshot.get('saved_at')
+        print(f"Loaded schema snapshot: {len(MEAI_CATEGORIES)} categories, {len(MEAI_QUESTION_MAPPING)} answerable questions")
+        return True
+    except Exception as e:
+        print(f"Error loading schema snapshot: {e}")
+        return False
+
+def reload_schema(force=False):
+    """Reload categories and questions from the database (single-flight, with backoff)
+    
+    Returns True if the schema was refreshed from the database. Concurrent callers
+    don't wait for an in-flight reload, and failed attempts are retried no sooner
+    than the exponential backoff allows (unless force=True).
+    """
+    with schema_state_lock:
+        if not force and time.time() < schema_state['next_attempt_at']:
+            return False
+    
+    if not schema_reload_lock.acquire(blocking=False):
+        # Another reload is already running - collapse into it
+        return False
+    
+    try:
+        started = time.time()
+        categories_ok = load_categories_from_db()
+        questions_ok = load_questions_from_db()
+        
+        with schema_state_lock:
+            if categories_ok and questions_ok:
+                schema_state['source'] = 'database'
+                schema_state['loaded_at'] = time.time()
+                schema_state['failures'] = 0
+                schema_state['next_attempt_at'] = 0.0
+                schema_state['last_error'] = None
+            else:
+                schema_state['failures'] += 1
+                delay = min(SCHEMA_RELOAD_BACKOFF_MAX,
+                            SCHEMA_RELOAD_BACKOFF_BASE * (2 ** (schema_state['failures'] - 1)))
+                schema_state['next_attempt_at'] = time.time() + delay
+                schema_state['last_error'] = 'Database schema load failed'
+                if schema_state['source'] is None:
+                    schema_state['source'] = 'fallback'
+                print(f"Schema reload failed ({schema_state['failures']} in a row), next attempt in {delay:.0f}s")
+        
+        with schema_state_lock:
+            schema_source = schema_state['source']
+        _record_component('schema', bool(MEAI_QUESTIONS), time.time() - started,
+                          source=schema_source,
+                          categories=len(MEAI_CATEGORIES),
+                          answerable_questions=len(MEAI_QUESTION_MAPPING))
+        # The question count may have changed - re-check the models against it
+        update_readiness()
+        
+        if categories_ok and questions_ok:
+            save_schema_snapshot()
+            return True
+        return False
+    finally:
+        schema_reload_lock.release()
+
+def request_schema_reload():
+    """Start a background schema reload unless one is running or we are backing off"""
+    with schema_state_lock:
+        thread = schema_state.get('thread')
+        if thread and thread.is_alive():
+            return False
+        if time.time() < schema_state['next_attempt_at']:
+            return False
+        thread = threading.Thread(target=reload_schema, name='schema-reload', daemon=True)
+        schema_state['thread'] = thread
+    thread.start()
+    return True
+
+def schema_needs_refresh():
+    """True when the schema is missing or not yet confirmed against the database (snapshot/fallback)"""
+    with schema_state_lock:
+        source = schema_state['source']
+    return not MEAI_QUESTIONS or source != 'database'
+
+# ============================================================================
+# REAL-COUPLE SUMMARY (statistics driving real-data-based synthetic generation)
+# ============================================================================
+
+# Summary of the real couples, reused across retrains while the real data is unchanged
+REAL_COUPLES_SUMMARY_PATH = os.getenv(
+    'REAL_COUPLES_SUMMARY_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'real_couples_summary.npz')
+)
+real_couples_summary_cache = {'fingerprint': None, 'summary': None}
+real_couples_summary_lock = threading.Lock()
+
+def fingerprint_real_couples(real_couples_data):
+    """Content hash of the real-couple fields the synthetic generator uses"""
+    digest = hashlib.sha256()
+    for row in real_couples_data:
+        digest.update(json.dumps([
+            row['male_age'], row['female_age'], row['civil_status'], row['education_level'],
+            row['income_level'], row['children'], row['years_living_together'],
+            list(row['questionnaire_responses'])
+        ], default=int).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def _value_distribution(values):
+    """Empirical distribution as (unique values, probabilities) - same draws as choosing from the list"""
+    unique, counts = np.unique(np.asarray(values), return_counts=True)
+    return unique, counts / counts.sum()
+
+def summarize_real_couples(real_couples_data):
+    """Compact statistics of the real couples: moments, value distributions and the base response matrix"""
+    male_ages = np.array([row['male_age'] for row in real_couples_data], dtype=float)
+    female_ages = np.array([row['female_age'] for row in real_couples_data], dtype=float)
+    
+    # Base response patterns (one row per real couple); pad short rows with neutral answers
+    num_questions = max(len(row['questionnaire_responses']) for row in real_couples_data)
+    responses = np.full((len(real_couples_data), num_questions), 3, dtype=RESPONSE_DTYPE)
+    for i, row in enumerate(real_couples_data):
+        responses[i, :len(row['questionnaire_responses'])] = row['questionnaire_responses']
+    
+    civil_values, civil_p = _value_distribution([row['civil_status'] for row in real_couples_data])
+    education_values, education_p = _value_distribution([row['education_level'] for row in real_couples_data])
+    income_values, income_p = _value_distribution([row['income_level'] for row in real_couples_data])
+    children_values, children_p = _value_distribution([row['children'] for row in real_couples_data])
+    
+    return {
+        'count': len(real_couples_data),
+        'male_age_mean': male_ages.mean(),
+        'male_age_std': male_ages.std(),
+        'female_age_mean': female_ages.mean(),
+        'female_age_std': female_ages.std(),
+        'age_gap_p90': np.percentile(np.abs(male_ages - female_ages), 90),
+        'years_together_mean': float(np.mean([row['years_living_together'] for row in real_couples_data])),
+        'civil_status_values': civil_values.astype(str),
+        'civil_status_p': civil_p,
+        'education_values': education_values,
+        'education_p': education_p,
+        'income_values': income_values,
+        'income_p': income_p,
+        'children_values': children_values,
+        'children_p': children_p,
+        'responses': responses
+    }
+
+def get_real_couples_summary(real_couples_data):
+    """Summary for the given real couples - cached in memory and on disk, recomputed only when the data changes"""
+    fingerprint = fingerprint_real_couples(real_couples_data)
+    with real_couples_summary_lock:
+        if real_couples_summary_cache['fingerprint'] == fingerprint:
+            return real_couples_summary_cache['summary']
+        
+        summary = None
+        if os.path.exists(REAL_COUPLES_SUMMARY_PATH):
+            try:
+                with np.load(REAL_COUPLES_SUMMARY_PATH, allow_pickle=False) as stored:
+                    if str(stored['fingerprint']) == fingerprint:
+                        summary = {key: stored[key] for key in stored.files if key != 'fingerprint'}
+                        print(f"Reusing real-couple summary {fingerprint} from {REAL_COUPLES_SUMMARY_PATH}")
+            except Exception as e:
+                print(f"Warning: could not read real-couple summary: {e}")
+        
+        if summary is None:
+            summary = summarize_real_couples(real_couples_data)
+            tmp_path = REAL_COUPLES_SUMMARY_PATH + '.tmp.npz'
+            try:
+                np.savez(tmp_path, fingerprint=np.array(fingerprint), **summary)
+                os.replace(tmp_path, REAL_COUPLES_SUMMARY_PATH)
+            except OSError as e:
+                print(f"Warning: could not save real-couple summary: {e}")
+        
+        real_couples_summary_cache['fingerprint'] = fingerprint
+        real_couples_summary_cache['summary'] = summary
+        return summary
+
+def generate_synthetic_columns_from_summary(num_couples, summary, seed=42):
+    """Generate synthetic couples around the real-couple summary as column arrays (see generate_synthetic_columns)"""
+    rng = np.random.default_rng(seed)
+    n = num_couples
+    base_responses = summary['responses']
+    total_questions = base_responses.shape[1]
+    
+    # Ages from the real age distribution, clamped to 18-80
+    # (a gap above the real 90th percentile is kept as drawn)
+    male_age = np.clip(np.trunc(rng.normal(summary['male_age_mean'], summary['male_age_std'], n)), 18, 80).astype(int)
+    female_age = np.clip(np.trunc(rng.normal(summary['female_age_mean'], summary['female_age_std'], n)), 18, 80).astype(int)
+    
+    # Other attributes drawn from the real value distributions
+    civil_status = rng.choice(summary['civil_status_values'], size=n, p=summary['civil_status_p']).astype(object)
+    years_high = max(1, int(summary['years_together_mean']) + 5)
+    years_living_together = np.where(civil_status == 'Living In', rng.integers(1, years_high, n), 0)
+    has_past_children = (rng.random(n) < 0.4) & (rng.random(n) < 0.3)
+    children = np.where(has_past_children,
+                        rng.choice(summary['children_values'], size=n, p=summary['children_p']), 0)
+    education_level = rng.choice(summary['education_values'], size=n, p=summary['education_p'])
+    income_level = rng.choice(summary['income_values'], size=n, p=summary['income_p'])
+    
+    # Target risk allocation: 33% Low, 34% Medium, 33% High
+    # Target ranges match thresholds: High >0.35, Medium >0.20, Low <=0.20
+    num_low = int(n * 0.33)
+    num_medium = int(n * 0.34)
+    position = np.arange(n)
+    target_low = np.where(position < num_low, 0.0, np.where(position < num_low + num_medium, 0.20, 0.35))
+    target_high = np.where(position < num_low, 0.20, np.where(position < num_low + num_medium, 0.35, 0.60))
+    target_disagree_ratio = rng.uniform(target_low, target_high)
+    
+    # Target pattern: exactly int(Q*t) disagree and int(Q*(1-t)*0.6) agree answers (rest neutral) in
+    # random order - a random rank per cell places them like a shuffled array
+    disagree_count = (total_questions * target_disagree_ratio).astype(int)
+    agree_count = (total_questions * (1 - target_disagree_ratio) * 0.6).astype(int)
+    rank = np.argsort(rng.random((n, total_questions)), axis=1).argsort(axis=1)
+    target = np.where(rank < disagree_count[:, None], 2,
+                      np.where(rank < (disagree_count + agree_count)[:, None], 4, 3)).astype(RESPONSE_DTYPE)
+    
+    # Blend with a sampled real couple's answers: 30% of answers follow the base pattern (+/-1 at 10% each)
+    base = base_responses[rng.integers(0, len(base_responses), n)]
+    variation = rng.choice(np.array([-1, 0, 1], dtype=np.int8), size=(n, total_questions), p=[0.1, 0.8, 0.1])
+    questionnaire_responses = np.where(rng.random((n, total_questions)) < 0.3,
+                                       np.clip(base + variation, 2, 4), target).astype(RESPONSE_DTYPE)
+    
+    # Risk level from the actual disagreement ratio
+    disagree_ratio = (questionnaire_responses == 2).mean(axis=1)
+    risk_level = np.where(disagree_ratio > 0.35, 'High', np.where(disagree_ratio > 0.20, 'Medium', 'Low'))
+    
+    category_scores = compute_category_scores(questionnaire_responses,
+                                              category_question_indices(total_questions))
+    male_responses, female_responses = apply_partner_variation(rng, questionnaire_responses)
+    
+    return {
+        'male_age': male_age,
+        'female_age': female_age,
+        'civil_status': civil_status,
+        'years_living_together': years_living_together,
+        'past_children': has_past_children,
+        'children': children,
+        'education_level': education_level,
+        'income_level': income_level,
+        'questionnaire_responses': questionnaire_responses,
+        'male_responses': male_responses,
+        'female_responses': female_responses,
+        'risk_level': risk_level,
+        'category_scores': category_scores
+    }
+
 def generate_synthetic_data_based_on_real_couples(num_couples, real_couples_data):
     """Generate synthetic couples based on patterns from real couples"""
-    np.random.seed(42)
-    
     if not real_couples_data:
         print("No real couples data available, using generic synthetic data")
         return generate_synthetic_data(num_couples)
     
+    return synthetic_columns_to_records(generate_synthetic_columns_based_on_real_couples(num_couples, real_couples_data))
+
+def generate_synthetic_columns_based_on_real_couples(num_couples, real_couples_data):
+    """Column-array version of generate_synthetic_data_based_on_real_couples"""
     print(f"Generating {num_couples} synthetic couples based on {len(real_couples_data)} real couples")
+    summary = get_real_couples_summary(real_couples_data)
+    return generate_synthetic_columns_from_summary(num_couples, summary)
+
+# Couple profile archetypes for generic synthetic data: age range, risk bias, sampling weight
+#   18-25 young couples - often higher risk due to immaturity
+#   25-30 young adults - moderate risk, learning phase
+#   30-40 mature couples - lower risk, more stable
+#   40-50 established couples - very low risk, experienced
+#   50-70 older couples - mixed, some very stable, some with issues
+SYNTHETIC_PROFILE_AGE_MIN = np.array([18, 25, 30, 40, 50])
+SYNTHETIC_PROFILE_AGE_MAX = np.array([25, 30, 40, 50, 70])
+SYNTHETIC_PROFILE_BIAS = np.array(['high', 'medium', 'low', 'low', 'medium'])
+SYNTHETIC_PROFILE_WEIGHTS = [0.15, 0.25, 0.30, 0.20, 0.10]
+
+# Age gap ranges: same age 40%, small 30%, medium 20%, large 8%, very large 2%
+SYNTHETIC_AGE_GAP_MIN = np.array([0, 1, 2, 5, 15])
+SYNTHETIC_AGE_GAP_MAX = np.array([2, 3, 5, 15, 25])
+SYNTHETIC_AGE_GAP_WEIGHTS = [0.40, 0.30, 0.20, 0.08, 0.02]
+
+# Civil status options per risk bias (repeated entries weight the draw)
+SYNTHETIC_CIVIL_STATUS = {
+    'high': ['Single', 'Single', 'Living In', 'Separated', 'Divorced'],
+    'low': ['Single', 'Living In', 'Living In', 'Widowed'],
+    'medium': ['Single', 'Living In', 'Widowed', 'Separated']
+}
+
+# Education level 0-4 distribution by male age band (<25, 25-39, 40+)
+SYNTHETIC_EDUCATION_P = np.array([
+    [0.10, 0.20, 0.40, 0.20, 0.10],
+    [0.05, 0.10, 0.30, 0.40, 0.15],
+    [0.05, 0.05, 0.20, 0.50, 0.20]
+])
+
+# Income level values/probabilities by education group (lower 0-1, medium 2, higher 3-4)
+SYNTHETIC_INCOME_VALUES = np.array([[0, 1, 2, 3], [1, 2, 3, 4], [2, 3, 4, 4]])
+SYNTHETIC_INCOME_P = np.array([
+    [0.2, 0.4, 0.3, 0.1],
+    [0.1, 0.4, 0.4, 0.1],
+    [0.2, 0.5, 0.3, 0.0]
+])
+
+def _draw_rows(rng, p_rows, row_index):
+    """Draw one category per sample from per-row probability tables (inverse CDF)"""
+    cdf = np.cumsum(p_rows, axis=1)[row_index]
+    u = rng.random(len(row_index))[:, None]
+    return np.minimum((u >= cdf).sum(axis=1), p_rows.shape[1] - 1)
+
+def category_question_indices(num_questions, num_categories=None):
+    """Response column indices for each MEAI category (question ids are 1-based columns)"""
+    if num_categories is None:
+        num_categories = len(MEAI_CATEGORIES)
+    indices = []
+    for category_id in range(1, num_categories + 1):
+        indices.append(np.array(
+            [qid - 1 for qid, cid in MEAI_QUESTION_MAPPING.items() if cid == category_id and qid <= num_questions],
+            dtype=np.intp
+        ))
+    return indices
+
+def compute_category_scores(responses, category_indices):
+    """Per-category disagreement scores (share of 2 = disagree, scaled x2 and capped at 1; 0.5 if no questions)"""
+    scores = np.full((responses.shape[0], len(category_indices)), 0.5)
+    for c, idx in enumerate(category_indices):
+        if len(idx):
+            scores[:, c] = np.minimum(1.0, (responses[:, idx] == 2).mean(axis=1) * 2)
+    return scores
+
+def apply_partner_variation(rng, responses):
+    """Split shared responses into male/female: 30% of answers differ by 1, else 10% differ by 2 (one partner moves)"""
+    shape = responses.shape
+    u_small = rng.random(shape)
+    u_large = rng.random(shape)
+    male_moves = rng.random(shape) < 0.5
+    sign = np.where(rng.random(shape) < 0.5, -1, 1).astype(np.int8)
+    delta = np.where(u_small < 0.3, sign, np.where(u_large < 0.1, 2 * sign, 0)).astype(np.int8)
+    male_responses = np.clip(responses + np.where(male_moves, delta, 0), 2, 4).astype(RESPONSE_DTYPE)
+    female_responses = np.clip(responses + np.where(male_moves, 0, delta), 2, 4).astype(RESPONSE_DTYPE)
+    return male_responses, female_responses
+
+def generate_synthetic_columns(num_couples=500, seed=42):
+    """Generate generic synthetic couples as column arrays (one draw per column, not per couple)
     
-    # Extract patterns from real couples
-    real_ages = [(row['male_age'], row['female_age']) for row in real_couples_data]
-    real_civil_status = [row['civil_status'] for row in real_couples_data]
-    real_education = [row['education_level'] for row in real_couples_data]
-    real_income = [row['income_level'] for row in real_couples_data]
-    real_children = [row['children'] for row in real_couples_data]
-    real_years_together = [row['years_living_together'] for row in real_couples_data]
-    real_responses = [row['questionnaire_responses'] for row in real_couples_data]
-    real_risk_levels = [row['risk_level'] for row in real_couples_data]
-    
-    # Calculate statistics from real data
-    male_ages = [age[0] for age in real_ages]
-    female_ages = [age[1] for age in real_ages]
-    age_gaps = [abs(age[0] - age[1]) for age in real_ages]
-    
-    # Ensure we generate samples for all 3 risk classes
-    # Allocate: 33% Low, 34% Medium, 33% High (more balanced distribution)
-    num_low = int(num_couples * 0.33)
-    num_medium = int(num_couples * 0.34)
-    num_high = num_couples - num_low - num_medium
-    
-    data = []
-    
-    # Generate couples for all risk classes in one loop
-    for i in range(num_couples):
-        # Sample from real couple patterns with some variation
-        base_couple_idx = np.random.randint(0, len(real_couples_data))
-        base_couple = real_couples_data[base_couple_idx]
-        
-        # Generate ages based on real patterns with variation
-        male_age = int(np.random.normal(np.mean(male_ages), np.std(male_ages)))
-        female_age = int(np.random.normal(np.mean(female_ages), np.std(female_ages)))
-        
-        # Ensure realistic age ranges
-        male_age = max(18, min(80, male_age))
-        female_age = max(18, min(80, female_age))
-        
-        # Age gap based on real patterns
-        real_age_gap = abs(male_age - female_age)
-        if real_age_gap > np.percentile(age_gaps, 90):  # Large age gap
-            # Keep the large gap but adjust ages
-            if male_age > female_age:
-                female_age = max(18, male_age - real_age_gap)
-            else:
-                male_age = max(18, female_age - real_age_gap)
-        
-        # Sample other attributes from real couples with variation
-        civil_status = np.random.choice(real_civil_status)
-        
-        # Years living together based on civil status and age
-        if civil_status == 'Living In':
-            years_living_together = np.random.randint(1, max(1, int(np.mean(real_years_together)) + 5))
-        else:
-            years_living_together = 0
-        
-        # Children based on real patterns
-        has_past_children = np.random.choice([True, False], p=[0.3, 0.7]) if np.random.random() < 0.4 else False
-        if has_past_children:
-            children = np.random.choice(real_children) if real_children else np.random.randint(1, 3)
-        else:
-            children = 0
-        
-        # Education and income based on real patterns
-        education_level = np.random.choice(real_education)
-        income_level = np.random.choice(real_income)
-        
-        # Generate questionnaire responses based on real patterns
-        base_responses = base_couple['questionnaire_responses']
-        questionnaire_responses = []
-        
-        # Determine target risk level for this couple
-        # Target ranges adjusted to match thresholds: High >0.35, Medium >0.20, Low ≤0.20
-        if i < num_low:
-            target_risk = 'Low'
-            target_disagree_ratio = np.random.uniform(0.0, 0.20)  # Low risk: 0-20% disagree
-        elif i < num_low + num_medium:
-            target_risk = 'Medium'
-            target_disagree_ratio = np.random.uniform(0.20, 0.35)  # Medium risk: 20-35% disagree
-        else:
-            target_risk = 'High'
-            target_disagree_ratio = np.random.uniform(0.35, 0.60)  # High risk: 35-60% disagree
-        
-        # Generate responses to match target disagree ratio
-        total_questions = len(base_responses)
-        target_disagree_count = int(total_questions * target_disagree_ratio)
-        target_agree_count = int(total_questions * (1 - target_disagree_ratio) * 0.6)  # 60% of remaining are agree
-        target_neutral_count = total_questions - target_disagree_count - target_agree_count
-        
-        # Create response array
-        response_array = [2] * target_disagree_count + [4] * target_agree_count + [3] * target_neutral_count
-        np.random.shuffle(response_array)
-        
-        # Apply some variation based on real patterns
-        for j, base_response in enumerate(base_responses):
-            if j < len(response_array):
-                # Blend target response with base pattern (70% target, 30% base)
-                if np.random.random() < 0.3:
-                    variation = np.random.choice([-1, 0, 1], p=[0.1, 0.8, 0.1])
-                    new_response = max(2, min(4, base_response + variation))
-                else:
-                    new_response = response_array[j]
-                questionnaire_responses.append(new_response)
-            else:
-                questionnaire_responses.append(response_array[j % len(response_array)])
-        
-        # Calculate actual risk level based on response patterns
-        disagree_count = sum(1 for r in questionnaire_responses if r == 2)
-        disagree_ratio = disagree_count / len(questionnaire_responses)
-        
-        # Use same thresholds as training: High >0.35, Medium >0.20, Low ≤0.20
-        if disagree_ratio > 0.35:
-            risk_level = 'High'
-        elif disagree_ratio > 0.20:
-            risk_level = 'Medium'
-        else:
-            risk_level = 'Low'
-        
-        # Generate category scores based on actual question-category mapping
-        category_scores = []
-        
-        for category_id in range(1, len(MEAI_CATEGORIES) + 1):
-            # Get questions for this category
-            category_question_ids = [qid for qid, cid in MEAI_QUESTION_MAPPING.items() if cid == category_id]
-            
-            if not category_question_ids:
-                category_scores.append(0.5)  # Default score if no questions
-                continue
-            
-            # Get responses for questions in this category
-            category_responses = []
-            for qid in category_question_ids:
-                # Find response index for this question
-                if qid <= len(questionnaire_responses):
-                    category_responses.append(questionnaire_responses[qid - 1])  # question_id is 1-indexed
-            
-            if not category_responses:
-                category_scores.append(0.5)  # Default score if no responses
-                continue
-            
-            # Calculate disagreement ratio for this category
-            cat_disagree_ratio = sum(1 for r in category_responses if r == 2) / len(category_responses)
-            
-            # Convert to 0-1 score (higher disagreement = higher score)
-            category_score = min(1.0, cat_disagree_ratio * 2)  # Scale up disagreement
-            category_scores.append(category_score)
-        
-        # CRITICAL: Generate separate male_responses and female_responses
-        # For synthetic data, we'll generate similar but slightly different responses
-        # to simulate real couple dynamics
-        male_responses = questionnaire_responses.copy()
-        female_responses = questionnaire_responses.copy()
-        
-        # Add some variation between partners (simulate real couple differences)
-        for j in range(len(questionnaire_responses)):
-            # 30% chance of partner disagreement (difference of 1)
-            if np.random.random() < 0.3:
-                if np.random.random() < 0.5:
-                    # Male slightly more positive/negative
-                    male_responses[j] = max(2, min(4, male_responses[j] + np.random.choice([-1, 1])))
-                else:
-                    # Female slightly more positive/negative
-                    female_responses[j] = max(2, min(4, female_responses[j] + np.random.choice([-1, 1])))
-            # 10% chance of significant disagreement (difference of 2)
-            elif np.random.random() < 0.1:
-                if np.random.random() < 0.5:
-                    male_responses[j] = max(2, min(4, male_responses[j] + np.random.choice([-2, 2])))
-                else:
-                    female_responses[j] = max(2, min(4, female_responses[j] + np.random.choice([-2, 2])))
-        
-        data.append({
-            'male_age': male_age,
-            'female_age': female_age,
-            'civil_status': civil_status,
-            'years_living_together': years_living_together,
-            'past_children': has_past_children,
-            'children': children,
-            'education_level': education_level,
-            'income_level': income_level,
-            'questionnaire_responses': questionnaire_responses,  # Keep for backward compatibility
-            'male_responses': male_responses,  # CRITICAL: Separate male responses (59 features)
-            'female_responses': female_responses,  # CRITICAL: Separate female responses (59 features)
-            'risk_level': risk_level,
-            'category_scores': category_scores
-        })
+    Returns a dict of arrays: demographics (length N), questionnaire/male/female responses
+    (N x Q, values 2=disagree, 3=neutral, 4=agree), risk_level and category_scores (N x C).
+    """
+    rng = np.random.default_rng(seed)
+    n = num_couples
+    total_questions = len(MEAI_QUESTION_MAPPING) if MEAI_QUESTION_MAPPING else 31  # Fallback to 31
+    
+    # Profile archetype -> male age; age gap bucket -> female age (50% younger / 50% older)
+    profile = rng.choice(len(SYNTHETIC_PROFILE_WEIGHTS), size=n, p=SYNTHETIC_PROFILE_WEIGHTS)
+    risk_bias = SYNTHETIC_PROFILE_BIAS[profile]
+    male_age = rng.integers(SYNTHETIC_PROFILE_AGE_MIN[profile], SYNTHETIC_PROFILE_AGE_MAX[profile] + 1)
+    gap_bucket = rng.choice(len(SYNTHETIC_AGE_GAP_WEIGHTS), size=n, p=SYNTHETIC_AGE_GAP_WEIGHTS)
+    age_gap = rng.integers(SYNTHETIC_AGE_GAP_MIN[gap_bucket], SYNTHETIC_AGE_GAP_MAX[gap_bucket] + 1)
+    female_age = np.where(rng.random(n) < 0.5,
+                          np.maximum(18, male_age - age_gap),
+                          np.minimum(80, male_age + age_gap))
+    
+    # Civil status based on risk profile
+    civil_status = np.empty(n, dtype=object)
+    for bias, options in SYNTHETIC_CIVIL_STATUS.items():
+        mask = risk_bias == bias
+        civil_status[mask] = np.array(options, dtype=object)[rng.integers(0, len(options), mask.sum())]
+    living_in = civil_status == 'Living In'
+    
+    # Years living together based on civil status and age
+    years_living_together = np.where(
+        male_age < 25, rng.integers(1, 5, n),
+        np.where(male_age < 40, rng.integers(1, 15, n), rng.integers(5, 25, n))
+    )
+    years_living_together = np.where(living_in, years_living_together, 0)
+    
+    # Past children based on age and civil status
+    settled = (male_age > 25) & np.isin(civil_status, ['Living In', 'Widowed', 'Divorced'])
+    has_past_children = rng.random(n) < np.where(settled, 0.4, 0.1)
+    children = np.where(male_age < 30, rng.integers(1, 3, n), rng.integers(1, 5, n))
+    children = np.where(has_past_children, children, 0)
+    
+    # Education by age band, income by education group
+    age_band = np.where(male_age < 25, 0, np.where(male_age < 40, 1, 2))
+    education_level = _draw_rows(rng, SYNTHETIC_EDUCATION_P, age_band)
+    education_group = np.where(education_level >= 3, 2, np.where(education_level >= 2, 1, 0))
+    income_level = SYNTHETIC_INCOME_VALUES[education_group, _draw_rows(rng, SYNTHETIC_INCOME_P, education_group)]
+    
+    # Target risk allocation: 33% Low, 34% Medium, 33% High
+    # Target ranges match thresholds: High >0.35, Medium >0.20, Low <=0.20
+    num_low = int(n * 0.33)
+    num_medium = int(n * 0.34)
+    position = np.arange(n)
+    target_low = np.where(position < num_low, 0.0, np.where(position < num_low + num_medium, 0.20, 0.35))
+    target_high = np.where(position < num_low, 0.20, np.where(position < num_low + num_medium, 0.35, 0.60))
+    target_disagree_ratio = rng.uniform(target_low, target_high)
+    
+    # Response probabilities: 60% of the non-disagree mass is agree, then adjusted for
+    # age gap, education/income mismatch and civil status
+    disagree_p = target_disagree_ratio.copy()
+    agree_p = (1 - target_disagree_ratio) * 0.6
+    actual_gap = np.abs(male_age - female_age)
+    for mask, d_up, a_down in (
+        (actual_gap > 10, 0.1, 0.05),
+        ((actual_gap > 5) & (actual_gap <= 10), 0.05, 0.02),
+        (np.abs(education_level - income_level) > 2, 0.05, 0.02),
+        (np.isin(civil_status, ['Separated', 'Divorced']), 0.1, 0.05)
+    ):
+        disagree_p = np.where(mask, np.minimum(0.8, disagree_p + d_up), disagree_p)
+        agree_p = np.where(mask, np.maximum(0.1, agree_p - a_down), agree_p)
+    long_term = living_in & (years_living_together > 10)
+    disagree_p = np.where(long_term, np.maximum(0.05, disagree_p - 0.05), disagree_p)
+    agree_p = np.where(long_term, np.minimum(0.8, agree_p + 0.05), agree_p)
+    disagree_p = np.clip(disagree_p, 0.05, 0.8)
+    agree_p = np.clip(agree_p, 0.1, 0.8)
+    neutral_p = 1.0 - disagree_p - agree_p
+    
+    # N x Q response matrix by inverse CDF against each couple's probabilities
+    u = rng.random((n, total_questions))
+    questionnaire_responses = np.where(
+        u < disagree_p[:, None], 2, np.where(u < (disagree_p + neutral_p)[:, None], 3, 4)
+    ).astype(RESPONSE_DTYPE)
+    
+    # Risk level from the actual disagreement ratio
+    disagree_ratio = (questionnaire_responses == 2).mean(axis=1)
+    risk_level = np.where(disagree_ratio > 0.35, 'High', np.where(disagree_ratio > 0.20, 'Medium', 'Low'))
+    
+    category_scores = compute_category_scores(questionnaire_responses,
+                                              category_question_indices(total_questions))
+    
+    male_responses, female_responses = apply_partner_variation(rng, questionnaire_responses)
     
-    return data
+    return {
+        'male_age': male_age,
+        'female_age': female_age,
+        'civil_status': civil_status,
+        'years_living_together': years_living_together,
+        'past_children': has_past_children,
+        'children': children,
+        'education_level': education_level,
+        'income_level': income_level,
+        'questionnaire_responses': questionnaire_responses,
+        'male_responses': male_responses,
+        'female_responses': female_responses,
+        'risk_level': risk_level,
+        'category_scores': category_scores
+    }
+
+def synthetic_columns_to_records(columns):
+    """Convert generate_synthetic_columns output to the list-of-dicts format used for training"""
+    keys = list(columns.keys())
+    values = [columns[key].tolist() for key in keys]
+    return [dict(zip(keys, row)) for row in zip(*values)]
 
 def generate_synthetic_data(num_couples=500):
     """Generate realistic synthetic couple data for training (fallback method)"""
-    np.random.seed(42)
-    
-    data = []
-    
-    # Ensure we generate samples for all 3 risk classes
-    # Allocate: 33% Low, 34% Medium, 33% High (more balanced distribution)
-    num_low = int(num_couples * 0.33)
-    num_medium = int(num_couples * 0.34)
-    num_high = num_couples - num_low - num_medium
-    
-    # Define realistic couple profiles with different risk patterns
-    couple_profiles = [
-        # Young couples (18-25) - often higher risk due to immaturity
-        {'age_range': (18, 25), 'risk_bias': 'high', 'weight': 0.15},
-        # Young adults (25-30) - moderate risk, learning phase
-        {'age_range': (25, 30), 'risk_bias': 'medium', 'weight': 0.25},
-        # Mature couples (30-40) - lower risk, more stable
-        {'age_range': (30, 40), 'risk_bias': 'low', 'weight': 0.30},
-        # Established couples (40-50) - very low risk, experienced
-        {'age_range': (40, 50), 'risk_bias': 'low', 'weight': 0.20},
-        # Older couples (50+) - mixed, some very stable, some with issues
-        {'age_range': (50, 70), 'risk_bias': 'medium', 'weight': 0.10}
-    ]
-    
-    for i in range(num_couples):
-        # Select couple profile based on weights
-        profile = np.random.choice(couple_profiles, p=[p['weight'] for p in couple_profiles])
-        min_age, max_age = profile['age_range']
-        risk_bias = profile['risk_bias']
-        
-        # Generate ages with realistic age gaps
-        male_age = np.random.randint(min_age, max_age + 1)
-        
-        # Age gap patterns: most couples have 0-5 year gap, some have larger gaps
-        age_gap_options = [
-            (0, 2),    # Same age: 40%
-            (1, 3),    # Small gap: 30%
-            (2, 5),    # Medium gap: 20%
-            (5, 15),   # Large gap: 8%
-            (15, 25)   # Very large gap: 2%
-        ]
-        age_gap_weights = [0.40, 0.30, 0.20, 0.08, 0.02]
-        
-        age_gap_range = age_gap_options[np.random.choice(len(age_gap_options), p=age_gap_weights)]
-        age_gap = np.random.randint(age_gap_range[0], age_gap_range[1] + 1)
-        
-        # Female age based on male age and gap
-        if np.random.random() < 0.5:  # 50% chance female is younger
-            female_age = max(18, male_age - age_gap)
-        else:  # 50% chance female is older
-            female_age = min(80, male_age + age_gap)
-        
-        # Civil status based on age and risk profile
-        if risk_bias == 'high':
-            civil_status_options = ['Single', 'Single', 'Living In', 'Separated', 'Divorced']
-        elif risk_bias == 'low':
-            civil_status_options = ['Single', 'Living In', 'Living In', 'Widowed']
-        else:  # medium
-            civil_status_options = ['Single', 'Living In', 'Widowed', 'Separated']
-        
-        civil_status = np.random.choice(civil_status_options)
-        
-        # Years living together based on civil status and age
-        if civil_status == 'Living In':
-            if male_age < 25:
-                years_living_together = np.random.randint(1, 5)  # Young couples, shorter time
-            elif male_age < 40:
-                years_living_together = np.random.randint(1, 15)  # Mature couples, longer time
-            else:
-                years_living_together = np.random.randint(5, 25)  # Older couples, very long time
-        else:
-            years_living_together = 0
-        
-        # Past children based on age and civil status
-        if male_age > 25 and civil_status in ['Living In', 'Widowed', 'Divorced']:
-            has_past_children = np.random.choice([True, False], p=[0.4, 0.6])
+    return synthetic_columns_to_records(generate_synthetic_columns(num_couples))
+
+# ============================================================================
+# TRAINING FEATURES
+# ============================================================================
+
+# Columns the training feature matrix and targets are built from, with defaults for optional ones
+TRAINING_COLUMNS = FEATURE_COLUMNS + ('risk_level', 'category_scores')
+TRAINING_COLUMN_DEFAULTS = {'civil_status': 'Single', 'employment_status': 'Unemployed'}
+RISK_LEVEL_CODES = {'Low': 0, 'Medium': 1, 'High': 2}
+
+# Synthetic personalized features per risk code (Low, Medium, High):
+# alignment_score, conflict_ratio, then the 4 category alignments share one range
+SYNTHETIC_PERSONALIZED_LOW = np.array([
+    [0.6, 0.0] + [0.6] * 4,
+    [0.4, 0.1] + [0.3] * 4,
+    [0.2, 0.3] + [0.2] * 4
+])
+SYNTHETIC_PERSONALIZED_HIGH = np.array([
+    [0.9, 0.2] + [0.9] * 4,
+    [0.7, 0.4] + [0.7] * 4,
+    [0.5, 0.7] + [0.5] * 4
+])
+
+def training_records_to_columns(records, expected_count):
+    """Convert list-of-dicts couples (real couples from the DB) to the column arrays FeatureBuilder reads"""
+    for record in records:
+        if 'male_responses' not in record or 'female_responses' not in record:
+            print(f"ERROR - Training data missing male_responses or female_responses!")
+            print(f"ERROR - Available keys: {list(record.keys())}")
+            raise ValueError("Training data must include separate male_responses and female_responses (from respondent field)")
+        for key in ('male_responses', 'female_responses'):
+            if record[key] is None or len(record[key]) == 0:
+                raise ValueError(f"{key} is empty for training sample")
+            if len(record[key]) != expected_count:
+                raise ValueError(f"{key} length ({len(record[key])}) does not match expected ({expected_count})")
+    
+    columns = {}
+    for key in TRAINING_COLUMNS:
+        default = TRAINING_COLUMN_DEFAULTS.get(key)
+        values = [record.get(key, default) for record in records]
+        if key in ('male_responses', 'female_responses'):
+            columns[key] = np.array(values, dtype=RESPONSE_DTYPE).reshape(len(records), expected_count)
+        elif key == 'category_scores':
+            columns[key] = np.array(values, dtype=float)
+        elif key in TRAINING_COLUMN_DEFAULTS or key == 'risk_level':
+            columns[key] = np.array(values, dtype=object)
         else:
-            has_past_children = np.random.choice([True, False], p=[0.1, 0.9])
-        
-        if has_past_children:
-            if male_age < 30:
-                children = np.random.randint(1, 3)  # Young parents, fewer children
+            columns[key] = np.array(values)
+    return columns
+
+def concat_training_columns(*parts):
+    """Concatenate column dicts row-wise, filling optional columns a part doesn't have"""
+    parts = [part for part in parts if part and len(part['male_age'])]
+    columns = {}
+    for key in TRAINING_COLUMNS:
+        arrays = []
+        for part in parts:
+            if key in part:
+                arrays.append(np.asarray(part[key], dtype=object if key in TRAINING_COLUMN_DEFAULTS else None))
             else:
-                children = np.random.randint(1, 5)  # Older parents, more children
-        else:
-            children = 0
-        
-        # Education levels based on age (older = more likely higher education)
-        if male_age < 25:
-            education_level = np.random.choice([0, 1, 2, 3, 4], p=[0.1, 0.2, 0.4, 0.2, 0.1])
-        elif male_age < 40:
-            education_level = np.random.choice([0, 1, 2, 3, 4], p=[0.05, 0.1, 0.3, 0.4, 0.15])
-        else:
-            education_level = np.random.choice([0, 1, 2, 3, 4], p=[0.05, 0.05, 0.2, 0.5, 0.2])
-        
-        # Income levels based on education and age
-        if education_level >= 3:  # Higher education
-            income_level = np.random.choice([2, 3, 4], p=[0.2, 0.5, 0.3])
-        elif education_level >= 2:  # Medium education
-            income_level = np.random.choice([1, 2, 3, 4], p=[0.1, 0.4, 0.4, 0.1])
-        else:  # Lower education
-            income_level = np.random.choice([0, 1, 2, 3], p=[0.2, 0.4, 0.3, 0.1])
-        
-        # Generate questionnaire responses (3-option scale: agree/neutral/disagree)
-        # Use dynamic question count from database
-        total_questions = len(MEAI_QUESTION_MAPPING) if MEAI_QUESTION_MAPPING else 31  # Fallback to 31
-        questionnaire_responses = np.random.randint(2, 5, total_questions)  # 2=disagree, 3=neutral, 4=agree
-        
-        # Determine target risk level for this couple based on allocation
-        # Target ranges adjusted to match thresholds: High >0.35, Medium >0.20, Low ≤0.20
-        if i < num_low:
-            target_risk = 'Low'
-            target_disagree_ratio = np.random.uniform(0.0, 0.20)  # Low risk: 0-20% disagree
-        elif i < num_low + num_medium:
-            target_risk = 'Medium'
-            target_disagree_ratio = np.random.uniform(0.20, 0.35)  # Medium risk: 20-35% disagree
-        else:
-            target_risk = 'High'
-            target_disagree_ratio = np.random.uniform(0.35, 0.60)  # High risk: 35-60% disagree
-        
-        # Generate responses based on target risk level and couple characteristics
-        base_disagree_prob = target_disagree_ratio
-        base_agree_prob = (1 - target_disagree_ratio) * 0.6  # 60% of remaining are agree
-        
-        # Adjust based on age gap (larger gaps = more disagreements)
-        age_gap = abs(male_age - female_age)
-        if age_gap > 10:
-            base_disagree_prob = min(0.8, base_disagree_prob + 0.1)
-            base_agree_prob = max(0.1, base_agree_prob - 0.05)
-        elif age_gap > 5:
-            base_disagree_prob = min(0.8, base_disagree_prob + 0.05)
-            base_agree_prob = max(0.1, base_agree_prob - 0.02)
-        
-        # Adjust based on education mismatch
-        education_diff = abs(education_level - income_level)
-        if education_diff > 2:
-            base_disagree_prob = min(0.8, base_disagree_prob + 0.05)
-            base_agree_prob = max(0.1, base_agree_prob - 0.02)
-        
-        # Adjust based on civil status
-        if civil_status in ['Separated', 'Divorced']:
-            base_disagree_prob = min(0.8, base_disagree_prob + 0.1)
-            base_agree_prob = max(0.1, base_agree_prob - 0.05)
-        elif civil_status == 'Living In' and years_living_together > 10:
-            base_disagree_prob = max(0.05, base_disagree_prob - 0.05)
-            base_agree_prob = min(0.8, base_agree_prob + 0.05)
-        
-        # Ensure probabilities are valid
-        base_disagree_prob = max(0.05, min(0.8, base_disagree_prob))
-        base_agree_prob = max(0.1, min(0.8, base_agree_prob))
-        base_neutral_prob = 1.0 - base_disagree_prob - base_agree_prob
-        
-        # Generate responses
-        questionnaire_responses = np.random.choice(
-            [2, 3, 4],  # disagree, neutral, agree
-            total_questions,
-            p=[base_disagree_prob, base_neutral_prob, base_agree_prob]
-        )
-        
-        # Calculate risk level based on actual response patterns
-        # Use same thresholds as training: High >0.35, Medium >0.20, Low ≤0.20
-        disagree_count = sum(1 for r in questionnaire_responses if r == 2)
-        disagree_ratio = disagree_count / len(questionnaire_responses)
-        
-        if disagree_ratio > 0.35:
-            risk_level = 'High'
-        elif disagree_ratio > 0.20:
-            risk_level = 'Medium'
-        else:
-            risk_level = 'Low'
-        
-        # Generate category scores based on actual question-category mapping
-        category_scores = []
-        
-        for category_id in range(1, len(MEAI_CATEGORIES) + 1):
-            # Get questions for this category
-            category_question_ids = [qid for qid, cid in MEAI_QUESTION_MAPPING.items() if cid == category_id]
-            
-            if not category_question_ids:
-                category_scores.append(0.5)  # Default score if no questions
+                arrays.append(np.full(len(part['male_age']), TRAINING_COLUMN_DEFAULTS[key], dtype=object))
+        columns[key] = np.concatenate(arrays)
+    return columns
+
+def encode_risk_levels(risk_levels):
+    """Risk level names -> int codes (Low 0, Medium 1, High 2)"""
+    risk_levels = np.asarray(risk_levels, dtype=object)
+    codes = np.full(len(risk_levels), -1, dtype=np.int64)
+    for name, code in RISK_LEVEL_CODES.items():
+        codes[risk_levels == name] = code
+    if (codes < 0).any():
+        raise ValueError(f"Unknown risk level(s) in training data: {sorted(set(risk_levels[codes < 0]))}")
+    return codes
+
+def synthetic_personalized_features(rng, risk_codes):
+    """Personalized features for training rows, drawn uniformly from per-risk-level ranges"""
+    low = SYNTHETIC_PERSONALIZED_LOW[risk_codes]
+    return low + rng.random(low.shape) * (SYNTHETIC_PERSONALIZED_HIGH[risk_codes] - low)
+
+def generate_missing_class_columns(rng, missing_codes, total_questions, num_categories, per_class=10):
+    """Extra synthetic couples for risk classes absent from the training data"""
+    n = per_class * len(missing_codes)
+    codes = np.repeat(np.asarray(missing_codes, dtype=np.int64), per_class)
+    civil_status = np.array(['Single', 'Living In', 'Widowed'], dtype=object)[rng.integers(0, 3, n)]
+    
+    # Disagree ratio by class; responses are disagree (2), then 60% of the rest agree (4), then neutral (3), shuffled
+    disagree_ratio = rng.uniform(np.array([0.0, 0.15, 0.30])[codes], np.array([0.15, 0.30, 0.60])[codes])
+    disagree_count = (total_questions * disagree_ratio).astype(int)
+    agree_count = (total_questions * (1 - disagree_ratio) * 0.6).astype(int)
+    position = np.arange(total_questions)
+    responses = np.where(position < disagree_count[:, None], 2,
+                         np.where(position < (disagree_count + agree_count)[:, None], 4, 3)).astype(RESPONSE_DTYPE)
+    responses = rng.permuted(responses, axis=1)
+    male_responses, female_responses = apply_partner_variation(rng, responses)
+    
+    # Category scores: High 0.5-1.0, Medium 0.3-0.7, Low 0.0-0.5
+    category_scores = rng.uniform(np.array([0.0, 0.3, 0.5])[codes, None], np.array([0.5, 0.7, 1.0])[codes, None],
+                                  (n, num_categories))
+    return {
+        'male_age': rng.integers(25, 50, n),
+        'female_age': rng.integers(23, 48, n),
+        'civil_status': civil_status,
+        'years_living_together': np.where(civil_status == 'Living In', rng.integers(0, 10, n), 0),
+        'education_level': rng.integers(0, 4, n),
+        'income_level': rng.integers(0, 4, n),
+        'male_responses': male_responses,
+        'female_responses': female_responses,
+        'risk_level': np.array(list(RISK_LEVEL_CODES), dtype=object)[codes],
+        'category_scores': category_scores
+    }
+
+def build_training_matrix(columns, rng, out=None):
+    """Feature matrix X (float32, preallocated or written into out) plus risk and category targets"""
+    y_risk = encode_risk_levels(columns['risk_level'])
+    builder = FeatureBuilder(np.asarray(columns['male_responses']).shape[1])
+    X = builder.build(columns, synthetic_personalized_features(rng, y_risk), out=out)
+    y_categories = np.asarray(columns['category_scores'], dtype=float)
+    return X, y_risk, y_categories
+
+def build_response_item_index(questions):
+    """(category_id, question_id, sub_question_id) -> response column, in questionnaire order
+
+    Standalone questions use sub_question_id None (NULL in couple_responses); sub-questions are 1-indexed.
+    """
+    item_index = {}
+    for cat_id in sorted(questions.keys()):
+        cat_questions = questions[cat_id]
+        for q_id in sorted(cat_questions.keys()):
+            q_data = cat_questions[q_id]
+            if q_data['sub_questions']:
+                for sub_idx in range(len(q_data['sub_questions'])):
+                    item_index[(cat_id, q_id, sub_idx + 1)] = len(item_index)
+            else:
+                item_index[(cat_id, q_id, None)] = len(item_index)
+    return item_index
+
+def iter_pipelined(produce, maxsize):
+    """Run the generator function produce() in a background thread and yield its items
+    
+    Items pass through a bounded queue (at most maxsize waiting), so the producer's I/O overlaps
+    with the caller's processing without buffering everything. Producer errors are re-raised here.
+    """
+    items = queue.Queue(maxsize=max(1, maxsize))
+    done = object()
+    stop = threading.Event()
+    errors = []
+    
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.5)
+                return True
+            except queue.Full:
                 continue
-            
-            # Get responses for questions in this category
-            category_responses = []
-            for qid in category_question_ids:
-                # Find response index for this question
-                if qid <= len(questionnaire_responses):
-                    category_responses.append(questionnaire_responses[qid - 1])  # question_id is 1-indexed
-            
-            if not category_responses:
-                category_scores.append(0.5)  # Default score if no responses
+        return False
+    
+    def producer():
+        try:
+            for item in produce():
+                if not put(item):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put(done)
+    
+    thread = threading.Thread(target=producer, daemon=True, name='ingest-producer')
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()  # Consumer finished or failed - unblock the producer
+        thread.join()
+    if errors:
+        raise errors[0]
+
+def stream_couple_responses(conn, rows_by_access_id, item_index, male, female, row_counts, access_ids=None):
+    """Stream couple_responses rows into the preallocated arrays (all couples, or only access_ids)
+    
+    A producer thread reads row batches from MySQL while this thread parses the previous batch
+    into the arrays (at most INGEST_QUEUE_BATCHES batches in flight), so network latency to the
+    remote DB overlaps with parsing. rows_by_access_id maps str(access_id) -> array row; rows of
+    other couples are skipped. Returns the number of rows read.
+    """
+    import pymysql
+    
+    query = """
+        SELECT cr.access_id, cr.category_id, cr.question_id, cr.sub_question_id, cr.respondent, cr.response
+        FROM couple_responses cr
+        {where}
+        ORDER BY cr.access_id, cr.category_id, cr.question_id, COALESCE(cr.sub_question_id, 0), cr.respondent
+        """
+    if access_ids is None:
+        queries = [(query.format(where=''), None)]
+    else:
+        queries = []
+        for start in range(0, len(access_ids), REAL_COUPLES_ID_BATCH):
+            ids = list(access_ids[start:start + REAL_COUPLES_ID_BATCH])
+            where = 'WHERE cr.access_id IN (' + ', '.join(['%s'] * len(ids)) + ')'
+            queries.append((query.format(where=where), ids))
+    
+    timings = {'db': 0.0, 'parse': 0.0}
+    
+    def fetch_batches():
+        # Only this thread touches the connection while the pipeline runs
+        for sql, params in queries:
+            # Server-side cursor: rows stream in as they're read instead of being buffered client-side;
+            # ordered by couple so each couple's rows arrive together (later duplicates overwrite earlier ones)
+            cursor = conn.cursor(pymysql.cursors.SSCursor)
+            try:
+                started = time.perf_counter()
+                cursor.execute(sql, params)
+                while True:
+                    batch = cursor.fetchmany(REAL_COUPLES_FETCH_SIZE)
+                    timings['db'] += time.perf_counter() - started
+                    if not batch:
+                        break
+                    yield batch
+                    started = time.perf_counter()
+            finally:
+                cursor.close()
+    
+    response_values = {'agree': 4, 'neutral': 3}  # Anything else is disagree (2)
+    total_rows = 0
+    current_id, row = None, None
+    started = time.perf_counter()
+    for batch in iter_pipelined(fetch_batches, INGEST_QUEUE_BATCHES):
+        parse_started = time.perf_counter()
+        total_rows += len(batch)
+        for access_id, category_id, question_id, sub_question_id, respondent, response in batch:
+            if access_id != current_id:
+                current_id, row = access_id, rows_by_access_id.get(str(access_id))
+            if row is None:
+                continue  # Responses of an incomplete couple profile
+            row_counts[row] += 1
+            column = item_index.get((category_id, question_id, sub_question_id))
+            if column is None:
                 continue
-            
-            # Calculate disagreement ratio for this category
-            cat_disagree_ratio = sum(1 for r in category_responses if r == 2) / len(category_responses)
-            
-            # Convert to 0-1 score (higher disagreement = higher score)
-            category_score = min(1.0, cat_disagree_ratio * 2)  # Scale up disagreement
-            category_scores.append(category_score)
-        
-        # CRITICAL: Generate separate male_responses and female_responses
-        # For synthetic data, we'll generate similar but slightly different responses
-        # to simulate real couple dynamics
-        male_responses = questionnaire_responses.copy()
-        female_responses = questionnaire_responses.copy()
-        
-        # Add some variation between partners (simulate real couple differences)
-        for j in range(len(questionnaire_responses)):
-            # 30% chance of partner disagreement (difference of 1)
-            if np.random.random() < 0.3:
-                if np.random.random() < 0.5:
-                    # Male slightly more positive/negative
-                    male_responses[j] = max(2, min(4, male_responses[j] + np.random.choice([-1, 1])))
-                else:
-                    # Female slightly more positive/negative
-                    female_responses[j] = max(2, min(4, female_responses[j] + np.random.choice([-1, 1])))
-            # 10% chance of significant disagreement (difference of 2)
-            elif np.random.random() < 0.1:
-                if np.random.random() < 0.5:
-                    male_responses[j] = max(2, min(4, male_responses[j] + np.random.choice([-2, 2])))
-                else:
-                    female_responses[j] = max(2, min(4, female_responses[j] + np.random.choice([-2, 2])))
-        
-        data.append({
-            'male_age': male_age,
-            'female_age': female_age,
-            'civil_status': civil_status,
-            'years_living_together': years_living_together,
-            'past_children': has_past_children,
-            'children': children,
-            'education_level': education_level,
-            'income_level': income_level,
-            'questionnaire_responses': questionnaire_responses.tolist(),  # Keep for backward compatibility
-            'male_responses': male_responses.tolist() if isinstance(male_responses, np.ndarray) else male_responses,  # CRITICAL: Separate male responses (59 features)
-            'female_responses': female_responses.tolist() if isinstance(female_responses, np.ndarray) else female_responses,  # CRITICAL: Separate female responses (59 features)
-            'risk_level': risk_level,
-            'category_scores': category_scores
-        })
+            target = male if respondent and respondent.lower() == 'male' else female
+            target[row, column] = response_values.get(response, 2)
+        timings['parse'] += time.perf_counter() - parse_started
+    print(f"Streamed {total_rows} response rows in {time.perf_counter() - started:.2f}s "
+          f"(DB {timings['db']:.2f}s overlapped with parsing {timings['parse']:.2f}s)")
+    return total_rows
+
+def fetch_response_checksums(conn):
+    """Per-couple (row count, checksum) of couple_responses, computed server-side in one grouped query"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+        SELECT cr.access_id, COUNT(*),
+               COALESCE(SUM(CRC32(CONCAT_WS('|', cr.category_id, cr.question_id, COALESCE(cr.sub_question_id, 0),
+                                            cr.respondent, cr.response))), 0)
+        FROM couple_responses cr
+        GROUP BY cr.access_id
+        """)
+        return {str(access_id): (int(count), int(checksum)) for access_id, count, checksum in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+def response_layout_hash(item_index):
+    """Hash of the response column layout - cached arrays are only valid for the same layout"""
+    return hashlib.sha256(json.dumps([list(key) for key in item_index]).encode('utf-8')).hexdigest()[:16]
+
+def load_training_data_cache(layout_hash):
+    """Cached per-couple response arrays and checksums, or None if missing, unreadable or for another layout"""
+    if not os.path.exists(TRAINING_DATA_CACHE_PATH):
+        return None
+    try:
+        with np.load(TRAINING_DATA_CACHE_PATH, allow_pickle=False) as stored:
+            if str(stored['layout_hash']) != layout_hash:
+                print("Training data cache was built for another questionnaire layout - rebuilding")
+                return None
+            return {key: stored[key] for key in stored.files}
+    except Exception as e:
+        print(f"Warning: could not read training data cache: {e}")
+        return None
+
+def save_training_data_cache(layout_hash, keys, male, female, row_counts, db_counts, db_checksums):
+    tmp_path = TRAINING_DATA_CACHE_PATH + '.tmp.npz'
+    try:
+        np.savez(tmp_path, layout_hash=np.array(layout_hash), access_ids=np.array(keys, dtype=str),
+                 male=male, female=female, row_counts=row_counts,
+                 db_counts=db_counts, db_checksums=db_checksums)
+        os.replace(tmp_path, TRAINING_DATA_CACHE_PATH)
+    except OSError as e:
+        print(f"Warning: could not save training data cache: {e}")
+
+def load_couple_responses(conn, access_ids, item_index):
+    """Every couple's answers as preallocated uint8 arrays, fetching only couples that changed
     
-    return data
+    Returns (male, female, row_counts): N x Q arrays aligned with access_ids (0 = not answered,
+    2 = disagree, 3 = neutral, 4 = agree) and the number of response rows stored per couple.
+    Couples whose server-side (row count, checksum) matches the training data cache are copied
+    from it; new or changed couples are streamed from couple_responses and merged in.
+    """
+    started = time.time()
+    keys = [str(access_id) for access_id in access_ids]
+    layout_hash = response_layout_hash(item_index)
+    male = np.zeros((len(keys), len(item_index)), dtype=RESPONSE_DTYPE)
+    female = np.zeros_like(male)
+    row_counts = np.zeros(len(keys), dtype=np.int64)
+    
+    checksums = fetch_response_checksums(conn)
+    db_counts = np.array([checksums.get(key, (0, 0))[0] for key in keys], dtype=np.int64)
+    db_checksums = np.array([checksums.get(key, (0, 0))[1] for key in keys], dtype=np.uint64)
+    
+    # Copy couples whose responses are unchanged since the cache was written
+    stale = np.ones(len(keys), dtype=bool)
+    cache = load_training_data_cache(layout_hash)
+    if cache is not None:
+        cached_rows = {key: j for j, key in enumerate(cache['access_ids'].tolist())}
+        rows = np.array([cached_rows.get(key, -1) for key in keys], dtype=np.int64)
+        hit = rows >= 0
+        hit[hit] = ((cache['db_counts'][rows[hit]] == db_counts[hit]) &
+                    (cache['db_checksums'][rows[hit]] == db_checksums[hit]))
+        male[hit] = cache['male'][rows[hit]]
+        female[hit] = cache['female'][rows[hit]]
+        row_counts[hit] = cache['row_counts'][rows[hit]]
+        stale = ~hit
+    
+    # Fetch the rest: one streamed query for everything when most couples changed, else by id
+    stale_rows = np.flatnonzero(stale)
+    if len(stale_rows):
+        rows_by_access_id = {keys[i]: i for i in stale_rows}
+        only_ids = None if len(stale_rows) > len(keys) // 2 else [access_ids[i] for i in stale_rows]
+        total_rows = stream_couple_responses(conn, rows_by_access_id, item_index, male, female, row_counts, only_ids)
+        save_training_data_cache(layout_hash, keys, male, female, row_counts, db_counts, db_checksums)
+    else:
+        total_rows = 0
+    print(f"Couple responses: {len(keys) - len(stale_rows)} couples from cache, {len(stale_rows)} fetched "
+          f"({total_rows} rows) in {time.time() - started:.2f}s")
+    return male, female, row_counts
 
 def load_real_couples_for_training():
     """Load real couples from database for ML training"""
@@ -1059,6 +1701,7 @@ def load_real_couples_for_training():
         
         cursor.execute(query)
         couples = cursor.fetchall()
+        cursor.close()
         
         if not couples:
             print("No couples found in database")
@@ -1066,9 +1709,6 @@ def load_real_couples_for_training():
         
         print(f"Found {len(couples)} real couples for training")
         
-        # Get MEAI responses for each couple
-        training_data = []
-        
         # Education and income mapping (same as PHP)
         education_mapping = {
             'No Education': 0, 'Pre School': 0, 'Elementary Level': 0, 'Elementary Graduate': 0,
@@ -1082,189 +1722,52 @@ def load_real_couples_for_training():
             '20000-24999': 2, '25000 above': 3
         }
         
-        for couple in couples:
+        # Responses for every couple, preallocated: 0 = no answer, otherwise 2/3/4
+        item_index = build_response_item_index(MEAI_QUESTIONS)
+        male, female, row_counts = load_couple_responses(conn, [couple[0] for couple in couples], item_index)
+        conn.close()
+        
+        # Need minimum responses
+        keep = row_counts >= 20
+        couples = [couple for couple, kept in zip(couples, keep) if kept]
+        male, female = male[keep], female[keep]
+        
+        # Combined responses (backward compatibility and risk labels): both partners answered ->
+        # average, or the lower answer on a significant (>= 2) disagreement; one answered -> that answer
+        both = (male > 0) & (female > 0)
+        pair_avg = np.round((male.astype(np.float64) + female) / 2)
+        combined = np.where(both & (np.abs(male.astype(np.int16) - female) >= 2), np.minimum(male, female), pair_avg)
+        combined = np.where(both, combined, np.maximum(male, female))
+        combined = np.where(combined == 0, 3, combined).astype(RESPONSE_DTYPE)
+        
+        # Missing answers default to neutral
+        male[male == 0] = 3
+        female[female == 0] = 3
+        
+        # Pad or truncate combined responses to the expected number of answerable questions
+        total_expected_responses = len(MEAI_QUESTION_MAPPING)
+        if combined.shape[1] < total_expected_responses:
+            combined = np.hstack([combined, np.full((len(combined), total_expected_responses - combined.shape[1]), 3, dtype=RESPONSE_DTYPE)])
+        combined = combined[:, :total_expected_responses]
+        
+        # Risk level heuristic for LABELING training data only (the ML model makes the predictions):
+        # neutral answers count as partial disagreement (0.3); High >0.35, Medium >0.20, Low <=0.20
+        weighted_disagree = (combined == 2).sum(axis=1) + (combined == 3).sum(axis=1) * 0.3
+        disagree_ratio = weighted_disagree / combined.shape[1] if combined.shape[1] else np.zeros(len(combined))
+        risk_levels = np.where(disagree_ratio > 0.35, 'High', np.where(disagree_ratio > 0.20, 'Medium', 'Low'))
+        
+        # Category scores from the question-category mapping: weighted disagreement x2.5, capped at 1
+        category_scores = np.full((len(combined), len(MEAI_CATEGORIES)), 0.5)
+        for c, idx in enumerate(category_question_indices(combined.shape[1])):
+            if len(idx):
+                cat_responses = combined[:, idx]
+                weighted = (cat_responses == 2).sum(axis=1) + (cat_responses == 3).sum(axis=1) * 0.3
+                category_scores[:, c] = np.minimum(1.0, weighted / len(idx) * 2.5)
+        
+        training_data = []
+        for i, couple in enumerate(couples):
             access_id, male_name, female_name, male_age, female_age, civil_status, years_living_together, past_children, children, education, monthly_income = couple
             
-            # Get MEAI responses for this couple from couple_responses table
-            # Get responses ordered by category, question, sub-question, then respondent
-            response_query = """
-            SELECT cr.category_id, cr.question_id, cr.sub_question_id, cr.respondent, cr.response
-            FROM couple_responses cr
-            WHERE cr.access_id = %s
-            ORDER BY cr.category_id, cr.question_id, COALESCE(cr.sub_question_id, 0), cr.respondent
-            """
-            cursor.execute(response_query, (access_id,))
-            responses = cursor.fetchall()
-            
-            if len(responses) < 20:  # Need minimum responses
-                continue
-                
-            # Build response map: (category_id, question_id, sub_question_id) -> {male: val, female: val}
-            response_map = {}
-            for category_id, question_id, sub_question_id, respondent, response in responses:
-                key = (category_id, question_id, sub_question_id)
-                if key not in response_map:
-                    response_map[key] = {'male': None, 'female': None}
-                
-                # Convert response to numeric (2=disagree, 3=neutral, 4=agree)
-                if response == 'agree':
-                    resp_value = 4
-                elif response == 'neutral':
-                    resp_value = 3
-                else:  # disagree
-                    resp_value = 2
-                
-                if respondent.lower() == 'male':
-                    response_map[key]['male'] = resp_value
-                else:
-                    response_map[key]['female'] = resp_value
-            
-            # CRITICAL: Build separate male_responses and female_responses arrays
-            # This matches the structure used in analysis (118 features: 59 male + 59 female)
-            male_responses_array = []
-            female_responses_array = []
-            questionnaire_responses = []  # Still build combined for backward compatibility
-            
-            # Build responses in the order defined by MEAI_QUESTIONS structure
-            # Iterate through categories and questions in the same order
-            for cat_id in sorted(MEAI_QUESTIONS.keys()):
-                cat_questions = MEAI_QUESTIONS[cat_id]
-                for q_id in sorted(cat_questions.keys()):
-                    q_data = cat_questions[q_id]
-                    
-                    if q_data['sub_questions']:
-                        # Question has sub-questions - map each sub-question
-                        for sub_idx, sub_q_text in enumerate(q_data['sub_questions']):
-                            # sub_question_id in database is 1-indexed, sub_idx is 0-indexed
-                            sub_q_id = sub_idx + 1
-                            key = (cat_id, q_id, sub_q_id)
-                            
-                            # Get separate male and female responses from response_map
-                            male_resp = response_map.get(key, {}).get('male', 3)  # Default to neutral
-                            female_resp = response_map.get(key, {}).get('female', 3)  # Default to neutral
-                            
-                            # Add to separate arrays
-                            male_responses_array.append(male_resp if male_resp is not None else 3)
-                            female_responses_array.append(female_resp if female_resp is not None else 3)
-                            
-                            # Also build combined questionnaire_responses (for backward compatibility)
-                            if male_resp is not None and female_resp is not None:
-                                # Consider partner disagreements as indicators of conflict
-                                if abs(male_resp - female_resp) >= 2:  # Significant disagreement
-                                    avg_resp = min(male_resp, female_resp)
-                                else:
-                                    avg_resp = round((male_resp + female_resp) / 2)
-                                questionnaire_responses.append(avg_resp)
-                            elif male_resp is not None:
-                                questionnaire_responses.append(male_resp)
-                            elif female_resp is not None:
-                                questionnaire_responses.append(female_resp)
-                            else:
-                                questionnaire_responses.append(3)  # Default to neutral
-                    else:
-                        # Standalone question - no sub-question
-                        key = (cat_id, q_id, None)
-                        
-                        # Get separate male and female responses from response_map
-                        male_resp = response_map.get(key, {}).get('male', 3)
-                        female_resp = response_map.get(key, {}).get('female', 3)
-                        
-                        # Add to separate arrays
-                        male_responses_array.append(male_resp if male_resp is not None else 3)
-                        female_responses_array.append(female_resp if female_resp is not None else 3)
-                        
-                        # Also build combined questionnaire_responses
-                        if male_resp is not None and female_resp is not None:
-                            if abs(male_resp - female_resp) >= 2:
-                                avg_resp = min(male_resp, female_resp)
-                            else:
-                                avg_resp = round((male_resp + female_resp) / 2)
-                            questionnaire_responses.append(avg_resp)
-                        elif male_resp is not None:
-                            questionnaire_responses.append(male_resp)
-                        elif female_resp is not None:
-                            questionnaire_responses.append(female_resp)
-                        else:
-                            questionnaire_responses.append(3)  # Default to neutral
-            
-            # Get total expected responses (includes both main questions AND sub-questions)
-            # MEAI_QUESTION_MAPPING maps each answerable question (standalone or sub-question) to a sequential ID
-            total_expected_responses = len(MEAI_QUESTION_MAPPING)
-            
-            # Pad or truncate to expected number of responses
-            while len(questionnaire_responses) < total_expected_responses:
-                questionnaire_responses.append(3)  # Default to neutral
-            questionnaire_responses = questionnaire_responses[:total_expected_responses]
-            
-            # Calculate risk level based on actual responses
-            # NOTE: This is a heuristic for LABELING training data only
-            # The ML model will learn from this labeled data and make predictions
-            # For actual predictions, the ML model is used (see analyze() function)
-            # More disagreements = higher risk
-            # Also count neutral responses (3) as potential issues if they're from disagreements
-            disagree_count = sum(1 for r in questionnaire_responses if r == 2)
-            neutral_count = sum(1 for r in questionnaire_responses if r == 3)
-            agree_count = sum(1 for r in questionnaire_responses if r == 4)
-            # Count neutral as partial disagreement (they might indicate unresolved issues)
-            weighted_disagree_count = disagree_count + (neutral_count * 0.3)
-            disagree_ratio = weighted_disagree_count / len(questionnaire_responses) if len(questionnaire_responses) > 0 else 0
-            
-            # DIAGNOSTIC: Log risk calculation details for real couples
-            print(f"DEBUG - Real Couple Risk Calculation:")
-            print(f"  Total responses: {len(questionnaire_responses)}")
-            print(f"  Agree (4): {agree_count}, Neutral (3): {neutral_count}, Disagree (2): {disagree_count}")
-            print(f"  Weighted disagree count: {weighted_disagree_count:.2f}")
-            print(f"  Disagree ratio: {disagree_ratio:.3f} ({disagree_ratio*100:.1f}%)")
-            
-            # BALANCED THRESHOLDS: Optimal for counseling and prevention
-            # High >0.35 (35%), Medium >0.20 (20%), Low ≤0.20 (20%)
-            # This balances sensitivity (catching couples who need help) with specificity (avoiding over-classification)
-            if disagree_ratio > 0.35:  # 35%+ weighted disagreement = High risk
-                risk_level = 'High'
-                print(f"  → Risk Level: HIGH (disagree_ratio {disagree_ratio:.3f} > 0.35)")
-            elif disagree_ratio > 0.20:  # 20-35% weighted disagreement = Medium risk
-                risk_level = 'Medium'
-                print(f"  → Risk Level: MEDIUM (disagree_ratio {disagree_ratio:.3f} > 0.20)")
-            else:  # ≤20% weighted disagreement = Low risk
-                risk_level = 'Low'
-                print(f"  → Risk Level: LOW (disagree_ratio {disagree_ratio:.3f} <= 0.20)")
-            
-            # Generate category scores based on actual question-category mapping
-            category_scores = []
-            
-            for category_id in range(1, len(MEAI_CATEGORIES) + 1):
-                # Get questions for this category
-                category_question_ids = [qid for qid, cid in MEAI_QUESTION_MAPPING.items() if cid == category_id]
-                
-                if not category_question_ids:
-                    category_scores.append(0.5)  # Default score if no questions
-                    continue
-                
-                # Get responses for questions in this category
-                category_responses = []
-                for qid in category_question_ids:
-                    # Find response index for this question
-                    # Note: This assumes responses are ordered by question_id
-                    if qid <= len(questionnaire_responses):
-                        category_responses.append(questionnaire_responses[qid - 1])  # question_id is 1-indexed
-                
-                if not category_responses:
-                    category_scores.append(0.5)  # Default score if no responses
-                    continue
-                
-                # Calculate disagreement ratio for this category
-                # Count both disagreements and neutrals (which may indicate unresolved issues)
-                cat_disagree_count = sum(1 for r in category_responses if r == 2)
-                cat_neutral_count = sum(1 for r in category_responses if r == 3)
-                # Weight neutrals as partial disagreements
-                weighted_disagree_count = cat_disagree_count + (cat_neutral_count * 0.3)
-                cat_disagree_ratio = weighted_disagree_count / len(category_responses) if len(category_responses) > 0 else 0
-                
-                # Convert to 0-1 score (higher disagreement = higher score)
-                # Use a better scaling function to capture more nuance
-                category_score = min(1.0, cat_disagree_ratio * 2.5)  # Increased from 2.0 to 2.5 for better sensitivity
-                category_scores.append(category_score)
-            
             # Map education and income to numeric levels
             education_level = education_mapping.get(education, 2) if education else 2
             income_level = income_mapping.get(monthly_income, 1) if monthly_income else 1
@@ -1300,14 +1803,15 @@ def load_real_couples_for_training():
                 'children': int(children) if children else 0,
                 'education_level': education_level,
                 'income_level': income_level,
-                'questionnaire_responses': questionnaire_responses,  # Keep for backward compatibility
-                'male_responses': male_responses_array,  # CRITICAL: Separate male responses (59 features)
-                'female_responses': female_responses_array,  # CRITICAL: Separate female responses (59 features)
-                'risk_level': risk_level,
-                'category_scores': category_scores
+                'questionnaire_responses': combined[i].tolist(),  # Keep for backward compatibility
+                'male_responses': male[i].tolist(),  # CRITICAL: Separate male responses (59 features)
+                'female_responses': female[i].tolist(),  # CRITICAL: Separate female responses (59 features)
+                'risk_level': str(risk_levels[i]),
+                'category_scores': category_scores[i].tolist()
             })
         
-        conn.close()
+        levels, counts = np.unique(risk_levels, return_counts=True)
+        print(f"Real couple risk labels: {dict(zip(levels.tolist(), counts.tolist()))}")
         print(f"Loaded {len(training_data)} real couples for training")
         return training_data
         
@@ -1315,56 +1819,683 @@ def load_real_couples_for_training():
         print(f"Error loading real couples: {e}")
         return []
 
-def train_ml_models():
-    """Train machine learning models"""
-    print("Training ML models...")
-    
-    # Update progress: Loading questions and categories
-    with training_lock:
-        training_status['progress'] = 15
-        training_status['message'] = 'Loading questions and categories...'
+# ============================================================================
+# TRAINING CPU BUDGET
+# ============================================================================
+
+BLAS_THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                        'BLIS_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+training_cpu_policy = {}  # What apply_training_cpu_policy set up in this process
+
+def available_cpu_count():
+    """Cores this process may run on (its affinity mask where supported)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def training_cpu_budget():
+    """Cores training may use - the n_jobs of every parallel step in training"""
+    if training_cpu_policy.get('cores'):
+        return training_cpu_policy['cores']
+    available = available_cpu_count()
+    if TRAINING_CPU_CORES > 0:
+        return min(TRAINING_CPU_CORES, available)
+    return max(1, available - TRAINING_RESERVED_CORES)
+
+def apply_training_cpu_policy():
+    """Process-wide CPU limits for the training process: thread pools, then nice level and affinity"""
+    cores = training_cpu_budget()
+    # joblib's loky workers start later and inherit these - each runs one of the n_jobs=cores
+    # tasks, so a single BLAS/OpenMP thread apiece keeps the total at the budget
+    for name in BLAS_THREAD_ENV_VARS:
+        os.environ[name] = '1'
+    if THREADPOOLCTL_AVAILABLE:
+        threadpool_limits(limits=cores)  # Pools numpy/scipy started at import in this process
+    
+    policy = {'cores': cores}
+    if TRAINING_LOW_PRIORITY:
+        if hasattr(os, 'nice'):
+            policy['nice'] = os.nice(TRAINING_NICE)
+        if hasattr(os, 'sched_setaffinity'):
+            # Leave the lowest-numbered cores to the serving workers
+            cpus = sorted(os.sched_getaffinity(0))[-cores:]
+            os.sched_setaffinity(0, cpus)
+            policy['cpus'] = cpus
+    training_cpu_policy.update(policy)
+    print(f"Training CPU policy: {policy}")
+    return policy
+
+def training_n_jobs():
+    """n_jobs for training: the CPU budget, lowered further if the memory plan requires it"""
+    return min(training_cpu_budget(), training_memory_plan.get('n_jobs') or training_cpu_budget())
+
+def set_forest_n_jobs(model, n_jobs):
+    """n_jobs of a forest, or of every forest in a MultiOutputRegressor (fitted or not)"""
+    forests = [model]
+    if isinstance(model, MultiOutputRegressor):
+        forests = [model.estimator] + list(getattr(model, 'estimators_', []))
+    for forest in forests:
+        forest.set_params(n_jobs=n_jobs)
+    return model
+
+# ============================================================================
+# TRAINING MEMORY BUDGET
+# ============================================================================
+
+class TrainingBudgetError(RuntimeError):
+    """Raised when a training run is estimated not to fit the memory budget even with n_jobs=1"""
+
+JOBLIB_WORKER_BASE_MB = 90  # PSS of a loky worker once it has imported scikit-learn (RSS 116 MB)
+TREE_NODE_BYTES = 64  # sklearn Node struct; each node also stores n_outputs x n_classes float64 values
+training_memory_plan = {}  # Estimate and n_jobs chosen for the current run
+training_memmap_files = []  # Backing files of the current run's memmapped arrays
+
+def process_pss_kib(pid='self'):
+    """Proportional set size: shared pages (libraries, the memmapped matrix) are split between the
+    processes mapping them, so summing it over processes counts them once. Falls back to RSS minus
+    file-backed and shared memory where smaps_rollup doesn't exist"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1])
+    except FileNotFoundError:
+        pass
+    fields = {}
+    with open(f'/proc/{pid}/status', 'r') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'RssFile', 'RssShmem'):
+                fields[key] = int(value.split()[0])
+    return fields.get('VmRSS', 0) - fields.get('RssFile', 0) - fields.get('RssShmem', 0)
+
+def current_pss_mb():
+    try:
+        return process_pss_kib() / 1024
+    except OSError:
+        return get_process_memory().get('rss_kib', 0) / 1024
+
+def container_memory_mb():
+    """(limit, usage) in MB from the cgroup (v2, then v1), or None when there is no limit"""
+    for limit_path, usage_path in (('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory.current'),
+                                   ('/sys/fs/cgroup/memory/memory.limit_in_bytes',
+                                    '/sys/fs/cgroup/memory/memory.usage_in_bytes')):
+        try:
+            with open(limit_path, 'r') as f:
+                limit = f.read().strip()
+            with open(usage_path, 'r') as f:
+                usage = int(f.read())
+        except (OSError, ValueError):
+            continue
+        if limit.isdigit() and int(limit) < 1 << 50:  # "max" / huge values mean no limit
+            return int(limit) / (1024 * 1024), usage / (1024 * 1024)
+        return None
+    return None
+
+def available_memory_mb():
+    """Memory this process could still claim: container limit minus usage, capped by MemAvailable (None if unknown)"""
+    available = []
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            meminfo = {line.split(':')[0]: int(line.split()[1]) for line in f}
+        available.append(meminfo['MemAvailable'] / 1024)
+    except (OSError, KeyError, ValueError, IndexError):
+        pass
+    container = container_memory_mb()
+    if container is not None:
+        available.append(container[0] - container[1])
+    return min(available) if available else None
+
+def process_group_pss_mb(pgid):
+    """Total PSS of every process in a process group (the training process and its loky workers) -
+    the quantity estimate_training_memory budgets for"""
+    total_kib = 0
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            if os.getpgid(int(entry)) != pgid:
+                continue
+            total_kib += process_pss_kib(entry)
+        except (OSError, ValueError):
+            continue  # Exited meanwhile
+    return total_kib / 1024
+
+def training_memory_budget_mb():
+    """Budget for the whole run (this process plus its joblib workers); None when it can't be determined"""
+    if TRAINING_MEMORY_BUDGET_MB > 0:
+        return TRAINING_MEMORY_BUDGET_MB
+    available = available_memory_mb()
+    if available is None:
+        return None
+    return 0.8 * (available + current_pss_mb())
+
+def estimate_training_memory(n_samples, n_features, class_counts, n_categories, n_jobs):
+    """Upper-bound peak memory (MB) of a run: matrix and SMOTE copy in this process, plus one training fold
+    and the largest forest per concurrent fit"""
+    mb = 1024 * 1024
+    itemsize = np.dtype(FEATURE_DTYPE).itemsize
+    # SMOTE can raise every class to the size of the largest
+    n_resampled = max(n_samples, len(class_counts) * int(max(class_counts)))
+    matrix = n_samples * n_features * itemsize
+    resampled = n_resampled * n_features * itemsize if n_resampled > n_samples else 0
+    fold = 0.8 * n_resampled * n_features * itemsize  # X[train] copy made for every CV fit
+    
+    # Fully grown trees have at most ~1.3 nodes per bootstrap row; the largest grid uses 200 trees
+    nodes = 1.3 * 0.8 * n_resampled
+    trees = max(CATEGORY_FOREST_GRID['n_estimators'])
+    risk_forest = trees * nodes * (TREE_NODE_BYTES + len(class_counts) * 8)
+    if CATEGORY_MODEL_TYPE == 'per_category':
+        category_forest = n_categories * trees * nodes * (TREE_NODE_BYTES + 8)
+    else:
+        category_forest = trees * nodes * (TREE_NODE_BYTES + n_categories * 8)
+    fit = fold + max(risk_forest, category_forest)
     
-    # Ensure questions are loaded before training
-    if not MEAI_CATEGORIES:
-        load_categories_from_db()
-    if not MEAI_QUESTIONS:
-        load_questions_from_db()
+    parent = current_pss_mb() * mb + matrix + resampled + risk_forest + category_forest
+    workers = n_jobs * (JOBLIB_WORKER_BASE_MB * mb + fit) if n_jobs > 1 else fit
+    return {
+        'n_jobs': n_jobs,
+        'matrix_mb': round(matrix / mb, 1),
+        'resampled_mb': round(resampled / mb, 1),
+        'per_fit_mb': round(fit / mb, 1),
+        'process_mb': round(parent / mb, 1),
+        'total_mb': round((parent + workers) / mb, 1)
+    }
+
+def plan_training_memory(n_samples, n_features, class_counts, n_categories):
+    """Pick the largest n_jobs (up to the CPU budget) whose estimated peak fits the memory budget"""
+    training_memory_plan.clear()
+    budget = training_memory_budget_mb()
+    n_jobs = training_cpu_budget()
+    estimate = estimate_training_memory(n_samples, n_features, class_counts, n_categories, n_jobs)
+    while budget is not None and estimate['total_mb'] > budget and n_jobs > 1:
+        n_jobs -= 1
+        estimate = estimate_training_memory(n_samples, n_features, class_counts, n_categories, n_jobs)
+    estimate['budget_mb'] = round(budget, 1) if budget is not None else None
+    training_memory_plan.update(estimate)
+    set_training_status(memory_estimate=estimate)
+    
+    print(f"Estimated training memory: {estimate}")
+    if budget is not None and estimate['total_mb'] > budget:
+        raise TrainingBudgetError(
+            f"Training needs an estimated {estimate['total_mb']:.0f} MB, over the {budget:.0f} MB budget "
+            f"even with n_jobs=1 (set TRAINING_MEMORY_BUDGET_MB or train on a larger dyno)"
+        )
+    if n_jobs < training_cpu_budget():
+        print(f"Lowered training n_jobs from {training_cpu_budget()} to {n_jobs} to fit {budget:.0f} MB")
+    return estimate
+
+def training_memmap(shape, dtype, name):
+    """Disk-backed array for the run: joblib passes memmaps to its workers by file name instead of copying"""
+    if not training_memmap_files:
+        remove_orphaned_training_memmaps()
+    path = os.path.join(TRAINING_MEMMAP_DIR, f'training-{name}-{os.getpid()}-{len(training_memmap_files)}.npy')
+    array = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+    training_memmap_files.append(path)
+    return array
+
+def remove_orphaned_training_memmaps():
+    """Delete memmaps left by training processes that were killed (SIGKILL skips their cleanup)"""
+    try:
+        names = os.listdir(TRAINING_MEMMAP_DIR)
+    except OSError:
+        return
+    for name in names:
+        parts = name.split('-')
+        if not (name.startswith('training-') and name.endswith('.npy') and len(parts) >= 4 and parts[-2].isdigit()):
+            continue
+        try:
+            os.kill(int(parts[-2]), 0)
+            continue  # Owner still running
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            continue
+        try:
+            os.remove(os.path.join(TRAINING_MEMMAP_DIR, name))
+            print(f"Removed orphaned training memmap {name}")
+        except OSError:
+            pass
+
+def remove_training_memmaps():
+    """Delete the run's memmap files (pages stay valid for any array still mapping them)"""
+    while training_memmap_files:
+        path = training_memmap_files.pop()
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Warning: could not remove training memmap {path}: {e}")
+
+# ============================================================================
+# TRAINING CHECKPOINTS (content-hashed stage outputs, resumed by a restarted /train)
+# ============================================================================
+
+def checkpoint_key(stage, *inputs):
+    """Hash of a stage's inputs: upstream content hashes, configuration, raw data"""
+    encoded = json.dumps([stage, inputs], sort_keys=True,
+                         default=lambda value: value.tolist() if hasattr(value, 'tolist') else str(value))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]
+
+def checkpoint_path(stage, array_name=None):
+    if array_name is None:
+        return os.path.join(TRAINING_CHECKPOINT_DIR, f'{stage}.pkl')
+    return os.path.join(TRAINING_CHECKPOINT_DIR, f'{stage}.{array_name}.npy')
+
+def checkpoint_arrays(payload):
+    """Names of the payload's numeric arrays - stored as .npy files rather than inside the pickle"""
+    return sorted(name for name, value in payload.items()
+                  if isinstance(value, np.ndarray) and not value.dtype.hasobject)
+
+def checkpoint_hash(meta, arrays):
+    """Content hash over the pickled metadata and the arrays' buffers, read in place (no copies)"""
+    digest = hashlib.sha256(meta)
+    for name, array in arrays:
+        digest.update(f'{name}:{array.dtype.str}:{array.shape}'.encode('utf-8'))
+        digest.update(memoryview(np.ascontiguousarray(array)).cast('B'))
+    return digest.hexdigest()[:16]
+
+def save_checkpoint(stage, key, payload):
+    """Write a stage's output atomically; returns its content hash (the key of the stages downstream)"""
+    array_names = checkpoint_arrays(payload)
+    meta = pickle.dumps({name: value for name, value in payload.items() if name not in array_names},
+                        protocol=pickle.HIGHEST_PROTOCOL)
+    content_hash = checkpoint_hash(meta, [(name, payload[name]) for name in array_names])
+    if not TRAINING_CHECKPOINTS:
+        return content_hash
+    path = checkpoint_path(stage)
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    try:
+        os.makedirs(TRAINING_CHECKPOINT_DIR, exist_ok=True)
+        # Drop the old record first so a crash part-way through never pairs it with new array files
+        if os.path.exists(path):
+            os.remove(path)
+        for name in array_names:
+            array_path = checkpoint_path(stage, name)
+            with open(f'{array_path}.tmp-{os.getpid()}', 'wb') as f:
+                np.save(f, payload[name], allow_pickle=False)
+            os.replace(f'{array_path}.tmp-{os.getpid()}', array_path)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'key': key, 'content_hash': content_hash, 'saved_at': time.time(),
+                         'payload': meta, 'arrays': array_names}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: could not save {stage} checkpoint: {e}")
+    return content_hash
+
+def load_checkpoint(stage, key):
+    """(payload, content hash) saved for exactly these inputs, or (None, None) if missing, stale or corrupt
     
-    # Update progress: Loading real couples
-    with training_lock:
-        training_status['progress'] = 20
-        training_status['message'] = 'Loading real couples from database...'
+    Arrays come back as read-only memmaps of the checkpoint files, so resuming costs no extra copies.
+    """
+    if not TRAINING_CHECKPOINTS or not os.path.exists(checkpoint_path(stage)):
+        return None, None
+    try:
+        with open(checkpoint_path(stage), 'rb') as f:
+            record = pickle.load(f)
+        if record['key'] != key:
+            return None, None
+        arrays = [(name, np.load(checkpoint_path(stage, name), mmap_mode='r', allow_pickle=False))
+                  for name in record.get('arrays', [])]
+        if checkpoint_hash(record['payload'], arrays) != record['content_hash']:
+            print(f"Warning: {stage} checkpoint is corrupt - recomputing")
+            return None, None
+        payload = pickle.loads(record['payload'])
+        payload.update(arrays)
+    except Exception as e:
+        print(f"Warning: could not read {stage} checkpoint: {e}")
+        return None, None
+    print(f"Resuming {stage} stage from checkpoint {record['content_hash']} "
+          f"(saved {time.time() - record['saved_at']:.0f}s ago)")
+    return payload, record['content_hash']
+
+def clear_training_checkpoints():
+    """Drop all stage checkpoints (after a published run, or when /train asks not to resume)"""
+    if not os.path.isdir(TRAINING_CHECKPOINT_DIR):
+        return
+    for name in os.listdir(TRAINING_CHECKPOINT_DIR):
+        try:
+            os.remove(os.path.join(TRAINING_CHECKPOINT_DIR, name))
+        except OSError as e:
+            print(f"Warning: could not remove training checkpoint {name}: {e}")
+
+# ============================================================================
+# HYPERPARAMETER SEARCH
+# ============================================================================
+
+CATEGORY_FOREST_GRID = {
+    'n_estimators': [100, 200],
+    'max_depth': [10, 15, None],
+    'min_samples_split': [2, 5]
+}
+
+def make_category_model(model_type=None, **forest_params):
+    """Unfitted category model of the configured shape (CATEGORY_MODEL_TYPE)"""
+    forest = RandomForestRegressor(random_state=42, **forest_params)
+    if (model_type or CATEGORY_MODEL_TYPE) == 'per_category':
+        return MultiOutputRegressor(forest)
+    return forest
+
+def category_param_prefix(model_type=None):
+    """Forest parameters are nested under estimator__ in MultiOutputRegressor"""
+    return 'estimator__' if (model_type or CATEGORY_MODEL_TYPE) == 'per_category' else ''
+
+def get_category_param_grid(model_type=None):
+    prefix = category_param_prefix(model_type)
+    return {prefix + name: values for name, values in CATEGORY_FOREST_GRID.items()}
+
+def get_risk_param_grid(class_weight_dict):
+    """Risk model grid; class weights come from the training labels"""
+    return {
+        'n_estimators': [100, 200],
+        'max_depth': [10, 15, None],
+        'min_samples_split': [2, 5],
+        'class_weight': ['balanced', class_weight_dict]
+    }
+
+def make_hyperparameter_search(estimator, param_grid, scoring, n_estimators_param, mode=None, resource=None):
+    """Cross-validated search over param_grid: exhaustive grid or successive halving
     
-    # Load real couples from database for training
-    real_couples_data = load_real_couples_for_training()
+    With resource='n_estimators' the tree count becomes the halving budget (it is taken out of the
+    grid and candidates grow up to its largest value); with 'n_samples' candidates see growing
+    subsamples of the training data and n_estimators stays a grid parameter.
+    """
+    mode = (mode or TRAINING_SEARCH_MODE).lower()
+    resource = resource or TRAINING_HALVING_RESOURCE
+    if mode == 'halving' and not HALVING_SEARCH_AVAILABLE:
+        print("Successive halving not available in this scikit-learn - using grid search")
+        mode = 'grid'
+    if mode != 'halving':
+        return GridSearchCV(estimator, param_grid, cv=5, scoring=scoring, n_jobs=training_n_jobs(), verbose=1)
+    
+    param_grid = dict(param_grid)
+    if resource == 'n_estimators':
+        resource, max_resources = n_estimators_param, max(param_grid.pop(n_estimators_param))
+    else:
+        resource, max_resources = 'n_samples', 'auto'
+    return HalvingGridSearchCV(
+        estimator,
+        param_grid,
+        factor=TRAINING_HALVING_FACTOR,
+        resource=resource,
+        max_resources=max_resources,
+        min_resources='exhaust',  # Last round uses (nearly) the full budget
+        cv=5,
+        scoring=scoring,
+        n_jobs=training_n_jobs(),
+        random_state=42,
+        verbose=1
+    )
+
+def best_cv_split_scores(search):
+    """Per-fold test scores of the chosen candidate, straight from the search's cv_results_"""
+    results = search.cv_results_
+    best = search.best_index_
+    return np.array([results[f'split{i}_test_score'][best] for i in range(search.n_splits_)])
+
+def oob_category_mse(category_model, y_categories):
+    """Out-of-bag MSE of a category model fitted with oob_score=True (either model shape)"""
+    if isinstance(category_model, MultiOutputRegressor):
+        oob_predictions = np.column_stack([estimator.oob_prediction_ for estimator in category_model.estimators_])
+    else:
+        oob_predictions = category_model.oob_prediction_.reshape(y_categories.shape)
+    return float(np.mean((oob_predictions - y_categories) ** 2))
+
+def search_signature():
+    """Hash of the search configuration - cached params are only reused for the same search space"""
+    config = {
+        'mode': TRAINING_SEARCH_MODE,
+        'resource': TRAINING_HALVING_RESOURCE if TRAINING_SEARCH_MODE == 'halving' else None,
+        'factor': TRAINING_HALVING_FACTOR if TRAINING_SEARCH_MODE == 'halving' else None,
+        'risk_grid': get_risk_param_grid('class_weight_dict'),
+        'category_model_type': CATEGORY_MODEL_TYPE,
+        'category_grid': get_category_param_grid()
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+def dataset_fingerprint(X, y_risk):
+    """Identity and summary of a training set: schema, exact matrix hash, class balance, column moments"""
+    X = np.ascontiguousarray(X)
+    return {
+        'schema_hash': compute_schema_hash(),
+        'search': search_signature(),
+        'matrix_hash': hashlib.sha256(X.tobytes() + np.ascontiguousarray(y_risk).tobytes()).hexdigest()[:16],
+        'n_samples': int(X.shape[0]),
+        'n_features': int(X.shape[1]),
+        'class_balance': (np.bincount(y_risk, minlength=3) / max(1, len(y_risk))).round(6).tolist(),
+        'column_means': X.mean(axis=0).astype(float).round(6).tolist(),
+        'column_stds': X.std(axis=0).astype(float).round(6).tolist()
+    }
+
+def dataset_drift(cached, current):
+    """Distance between two fingerprints of the same layout (0 = identical data)
     
+    The largest of: total class-balance change, mean column shift in cached standard deviations,
+    and relative change in sample count.
+    """
+    if cached['matrix_hash'] == current['matrix_hash']:
+        return 0.0
+    balance = np.abs(np.subtract(cached['class_balance'], current['class_balance'])).sum()
+    stds = np.maximum(np.asarray(cached['column_stds']), 1e-6)
+    shift = (np.abs(np.subtract(cached['column_means'], current['column_means'])) / stds).mean()
+    size = abs(current['n_samples'] - cached['n_samples']) / max(1, cached['n_samples'])
+    return float(max(balance, shift, size))
+
+def _encode_params(params):
+    # The computed class weights depend on the labels - store a marker and recompute on reuse
+    encoded = {}
+    for name, value in params.items():
+        if isinstance(value, dict):
+            value = 'class_weight_dict'
+        elif isinstance(value, np.generic):
+            value = value.item()  # e.g. n_estimators picked by the halving budget
+        encoded[name] = value
+    return encoded
+
+def _decode_params(params, class_weight_dict):
+    return {name: class_weight_dict if value == 'class_weight_dict' else value for name, value in params.items()}
+
+def load_hyperparameter_cache():
+    try:
+        with open(HYPERPARAM_CACHE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f).get('entries', [])
+    except (OSError, ValueError):
+        return []
+
+def find_cached_hyperparameters(fingerprint):
+    """Closest cached tuning result for the same schema, layout and search space, if within the drift limit"""
+    best, best_drift = None, None
+    for entry in load_hyperparameter_cache():
+        cached = entry['fingerprint']
+        if (cached['schema_hash'], cached['search'], cached['n_features']) != \
+                (fingerprint['schema_hash'], fingerprint['search'], fingerprint['n_features']):
+            continue
+        drift = dataset_drift(cached, fingerprint)
+        if best_drift is None or drift < best_drift:
+            best, best_drift = entry, drift
+    if best is None or best_drift > HYPERPARAM_CACHE_MAX_DRIFT:
+        return None, best_drift
+    return best, best_drift
+
+def store_hyperparameters(fingerprint, risk_params, risk_score, category_params, category_score):
+    """Remember a tuning result (newest first, HYPERPARAM_CACHE_ENTRIES kept)"""
+    entries = [entry for entry in load_hyperparameter_cache()
+               if entry['fingerprint']['matrix_hash'] != fingerprint['matrix_hash']]
+    entries.insert(0, {
+        'fingerprint': fingerprint,
+        'risk_params': _encode_params(risk_params),
+        'risk_cv_score': float(risk_score),
+        'category_params': _encode_params(category_params),
+        'category_cv_score': float(category_score),
+        'tuned_at': time.time()
+    })
+    tmp_path = f'{HYPERPARAM_CACHE_PATH}.tmp-{os.getpid()}'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'entries': entries[:HYPERPARAM_CACHE_ENTRIES]}, f, default=str)
+        os.replace(tmp_path, HYPERPARAM_CACHE_PATH)
+    except OSError as e:
+        print(f"Warning: could not save hyperparameter cache: {e}")
+
+def describe_search(search):
+    """Search mode, budget and number of fits for logs and the manifest"""
+    if HALVING_SEARCH_AVAILABLE and isinstance(search, HalvingGridSearchCV):
+        return {
+            'mode': 'halving',
+            'resource': search.resource,
+            'factor': search.factor,
+            'n_candidates': [int(n) for n in search.n_candidates_],
+            'n_resources': [int(n) for n in search.n_resources_],
+            'n_fits': int(sum(search.n_candidates_)) * 5
+        }
+    return {'mode': 'grid', 'n_fits': len(search.cv_results_['params']) * 5}
+
+def search_result(search):
+    """What training keeps from a fitted search (also the search checkpoint's payload)"""
+    return {
+        'model': search.best_estimator_,
+        'best_params': search.best_params_,
+        'best_score': search.best_score_,
+        'split_scores': best_cv_split_scores(search),
+        'info': describe_search(search)
+    }
+
+def fit_searches(searches, on_done=None, resumed=()):
+    """Fit named searches {name: (search, X, y)}, publishing per-model progress as model_progress
+    (models listed in resumed come from checkpoints); on_done(name, search) runs as each one finishes
+    
+    Concurrently, each search is fitted from its own thread of this process. Their joblib calls
+    use the same n_jobs, so they share loky's process-wide reusable executor: the CPU budget stays
+    n_jobs workers and candidates of both searches are interleaved on them.
+    """
+    progress = {name: {'state': 'resumed'} for name in resumed}
+    progress.update((name, {'state': 'queued'}) for name in searches)
+    progress_lock = threading.Lock()
+    
+    def update(name, **fields):
+        with progress_lock:
+            progress[name].update(fields)
+            done = sum(1 for entry in progress.values() if entry['state'] in ('done', 'resumed'))
+            running = [model for model, entry in progress.items() if entry['state'] == 'running']
+            message = (f"Tuning {' and '.join(running)} model{'s' if len(running) > 1 else ''}..." if running
+                       else f'Tuned {done} of {len(progress)} models')
+            set_training_status(progress=50 + 35 * done // len(progress), message=message,
+                                model_progress={model: dict(entry) for model, entry in progress.items()})
+    
+    def fit(name):
+        check_training_cancelled()
+        search, X, y = searches[name]
+        started = time.time()
+        update(name, state='running', started_at=started)
+        try:
+            search.fit(X, y)
+        except TrainingCancelled:
+            update(name, state='cancelled', elapsed=round(time.time() - started, 1))
+            raise
+        except Exception:
+            update(name, state='failed', elapsed=round(time.time() - started, 1))
+            raise
+        if on_done is not None:
+            on_done(name, search)
+        update(name, state='done', elapsed=round(time.time() - started, 1),
+               n_fits=describe_search(search)['n_fits'], best_score=round(float(search.best_score_), 4))
+        return search
+    
+    if TRAINING_CONCURRENT_SEARCH and training_n_jobs() > 1 and len(searches) > 1:
+        print(f"Running {', '.join(searches)} searches concurrently on {training_n_jobs()} workers")
+        with ThreadPoolExecutor(max_workers=len(searches), thread_name_prefix='search') as executor:
+            futures = {name: executor.submit(fit, name) for name in searches}
+            return {name: future.result() for name, future in futures.items()}
+    return {name: fit(name) for name in searches}
+
+# ============================================================================
+# INCREMENTAL TRAINING (warm-start tree rotation)
+# ============================================================================
+
+def rotate_forest(forest, X, y, n_new, seed):
+    """Fit n_new trees on (X, y) with warm_start and drop the n_new oldest, so the forest keeps its size"""
+    size = len(forest.estimators_)
+    n_new = min(n_new, size)
+    # A fixed int random_state would hand the new trees the same seeds every round
+    forest.set_params(warm_start=True, oob_score=False, n_estimators=size + n_new, random_state=seed)
+    forest.fit(X, y)
+    forest.estimators_ = forest.estimators_[n_new:]
+    forest.set_params(warm_start=False, n_estimators=size)
+    # Out-of-bag estimates of the previous fit no longer describe this forest
+    for name in ('oob_score_', 'oob_decision_function_', 'oob_prediction_'):
+        if hasattr(forest, name):
+            delattr(forest, name)
+    return forest
+
+def rotate_category_model(category_model, X, y_categories, n_new, seed):
+    """rotate_forest for either category model shape (one forest per category or one native forest)"""
+    if isinstance(category_model, MultiOutputRegressor):
+        for column, forest in enumerate(category_model.estimators_):
+            rotate_forest(forest, X, y_categories[:, column], n_new, seed + column)
+    else:
+        rotate_forest(category_model, X, y_categories, n_new, seed)
+    return category_model
+
+def load_incremental_base(n_features, risk_classes):
+    """Active version's sklearn models to grow incrementally -> (base, None), or (None, reason) if a full rebuild is due"""
+    version = model_registry.active_version()
+    if version is None:
+        return None, 'no active model version'
+    try:
+        manifest = model_registry.read_manifest(version)
+    except ModelRegistryError as e:
+        return None, str(e)
+    metrics = manifest.get('metrics', {})
+    
+    if manifest.get('schema_hash') != compute_schema_hash():
+        return None, 'the questionnaire schema changed'
+    if metrics.get('category_model_type', 'per_category') != CATEGORY_MODEL_TYPE:
+        return None, f'CATEGORY_MODEL_TYPE changed to {CATEGORY_MODEL_TYPE}'
+    age_hours = (time.time() - metrics.get('full_build_at', manifest.get('created_at', 0))) / 3600
+    if age_hours > TRAINING_FULL_REBUILD_HOURS:
+        return None, f'the last full rebuild was {age_hours:.1f}h ago (limit {TRAINING_FULL_REBUILD_HOURS:g}h)'
+    
+    base = {'version': version, 'manifest': manifest}
+    for name in ('risk_model', 'category_model'):
+        pickle_path = os.path.join(model_registry.version_dir(version), f'{name}.pkl')
+        if not os.path.exists(pickle_path):
+            return None, f'{name}.pkl is missing from {version}'
+        with open(pickle_path, 'rb') as f:
+            base[name] = pickle.load(f)
+    
+    if any(get_model_feature_count(base[name]) != n_features for name in ('risk_model', 'category_model')):
+        return None, 'the feature layout changed'
+    if not np.array_equal(base['risk_model'].classes_, risk_classes):
+        return None, 'the set of risk classes changed'
+    return base, None
+
+def prepare_training_columns(real_couples_data, expected_count):
+    """Real couples plus 500 synthetic ones (shaped after the real ones when there are any) as
+    column arrays, with every risk class present; returns (columns, rng) - rng continues into
+    build_training_matrix"""
     # Always generate synthetic data (500 couples)
     # If we have real couples, use them to inform the synthetic generation
     if not real_couples_data:
         print("No real couples found, using generic synthetic data")
-        synthetic_data = generate_synthetic_data(500)
-        data = synthetic_data
+        columns = concat_training_columns(generate_synthetic_columns(500))
     else:
         print(f"Found {len(real_couples_data)} real couples")
         print(f"Generating 500 synthetic couples based on real couple patterns")
         # Generate 500 synthetic couples based on real couple patterns
-        synthetic_data = generate_synthetic_data_based_on_real_couples(500, real_couples_data)
+        synthetic_columns = generate_synthetic_columns_based_on_real_couples(500, real_couples_data)
+        real_columns = training_records_to_columns(real_couples_data, expected_count)
         
         # Combine real couples with synthetic data
-        print(f"Combining {len(real_couples_data)} real couples with {len(synthetic_data)} synthetic couples")
-        data = real_couples_data + synthetic_data
-        print(f"Total training data: {len(data)} couples (real + synthetic)")
+        print(f"Combining {len(real_couples_data)} real couples with {len(synthetic_columns['risk_level'])} synthetic couples")
+        columns = concat_training_columns(real_columns, synthetic_columns)
+        print(f"Total training data: {len(columns['risk_level'])} couples (real + synthetic)")
         
         # DIAGNOSTIC: Check risk level distribution
-        from collections import Counter
-        real_risk_dist = Counter([c['risk_level'] for c in real_couples_data])
-        synthetic_risk_dist = Counter([c['risk_level'] for c in synthetic_data])
-        total_risk_dist = Counter([c['risk_level'] for c in data])
-        
+        distribution = lambda levels: dict(zip(*np.unique(np.asarray(levels, dtype=str), return_counts=True)))
+        real_risk_dist = distribution(real_columns['risk_level'])
         print(f"\n=== RISK LEVEL DISTRIBUTION ===")
-        print(f"Real couples: {dict(real_risk_dist)}")
-        print(f"Synthetic couples: {dict(synthetic_risk_dist)}")
-        print(f"Total training data: {dict(total_risk_dist)}")
+        print(f"Real couples: {real_risk_dist}")
+        print(f"Synthetic couples: {distribution(synthetic_columns['risk_level'])}")
+        print(f"Total training data: {distribution(columns['risk_level'])}")
         print(f"===============================\n")
         
         # WARNING: If all real couples are Low Risk, this might bias the model
@@ -1373,333 +2504,26 @@ def train_ml_models():
             print(f"⚠️  This may bias the model towards predicting Low Risk for similar couples.")
             print(f"⚠️  Consider reviewing the risk calculation thresholds or couple responses.\n")
     
-    df = pd.DataFrame(data)
-    
     # Update progress: Preparing features
-    with training_lock:
-        training_status['progress'] = 25
-        training_status['message'] = 'Preparing features and encoding data...'
-    
-    # Prepare features
-    X = []
-    y_risk = []
-    y_categories = []
-    
-    total_rows = len(df)
-    for idx, row in df.iterrows():
-        # Update progress during feature preparation (25-35%)
-        if idx % 50 == 0:
-            progress = 25 + int((idx / total_rows) * 10)
-            with training_lock:
-                training_status['progress'] = progress
-                training_status['message'] = f'Preparing features... ({idx}/{total_rows} couples)'
-        # NEW: Calculate age gap
-        age_gap = abs(row['male_age'] - row['female_age'])
-        
-        # NEW: Calculate education/income compatibility
-        education_income_diff = abs(row['education_level'] - row['income_level'])
-        
-        # NEW: Civil status encoding (one-hot: 3 features)
-        civil_status = row.get('civil_status', 'Single')
-        is_single = 1 if civil_status == 'Single' else 0
-        is_living_in = 1 if civil_status == 'Living In' else 0
-        is_separated_divorced = 1 if civil_status in ['Separated', 'Divorced', 'Widowed'] else 0
-        
-        # NEW: Encode employment status (use male partner's employment status)
-        employment_status = row.get('employment_status', 'Unemployed')
-        if employment_status == 'Employed':
-            employment_encoded = 1
-        elif employment_status == 'Self-employed':
-            employment_encoded = 2
-        else:  # Unemployed or unknown
-            employment_encoded = 0
-        
-        # Combine all features (same structure as analysis)
-        features = [
-            row['male_age'],
-            row['female_age'],
-            age_gap,
-            row['years_living_together'],
-            row['education_level'],
-            row['income_level'],
-            education_income_diff,
-            is_single,
-            is_living_in,
-            is_separated_divorced,
-            employment_encoded  # NEW: Employment status
-            # REMOVED: children feature
-        ]
-        
-        # CRITICAL: Use separate male_responses + female_responses (118 features: 59 + 59)
-        # This is REQUIRED for training - no fallback to questionnaire_responses
-        # Training data must include separate male_responses and female_responses
-        if 'male_responses' not in row or 'female_responses' not in row:
-            print(f"ERROR - Training data missing male_responses or female_responses!")
-            print(f"ERROR - Available keys: {list(row.keys())}")
-            raise ValueError("Training data must include separate male_responses and female_responses (from respondent field)")
-        
-        male_responses = row['male_responses']
-        female_responses = row['female_responses']
-        
-        # Validate arrays exist and have correct length
-        if not male_responses or len(male_responses) == 0:
-            raise ValueError(f"male_responses is empty for training sample")
-        if not female_responses or len(female_responses) == 0:
-            raise ValueError(f"female_responses is empty for training sample")
-        
-        expected_count = len(MEAI_QUESTION_MAPPING) if MEAI_QUESTION_MAPPING else 59
-        if len(male_responses) != expected_count:
-            raise ValueError(f"male_responses length ({len(male_responses)}) does not match expected ({expected_count})")
-        if len(female_responses) != expected_count:
-            raise ValueError(f"female_responses length ({len(female_responses)}) does not match expected ({expected_count})")
-        
-        # Add separate responses (118 features total: 59 male + 59 female)
-        if isinstance(male_responses, np.ndarray):
-            features.extend(male_responses.tolist())
-        else:
-            features.extend(male_responses)
-        if isinstance(female_responses, np.ndarray):
-            features.extend(female_responses.tolist())
-        else:
-            features.extend(female_responses)
-        
-        print(f"DEBUG - Training: Added {len(male_responses)} male + {len(female_responses)} female = {len(male_responses) + len(female_responses)} response features")
-        
-        # Add personalized features (synthetic for training)
-        # Generate synthetic personalized features based on risk level
-        if row['risk_level'] == 'High':
-            # High risk: low alignment, high conflict
-            alignment_score = np.random.uniform(0.2, 0.5)
-            conflict_ratio = np.random.uniform(0.3, 0.7)
-            # Category alignments: lower for high risk
-            category_alignments = [np.random.uniform(0.2, 0.5) for _ in range(4)]
-            # More extreme responses for high risk
-            male_agree_ratio = np.random.uniform(0.1, 0.3)
-            male_disagree_ratio = np.random.uniform(0.3, 0.5)
-            female_agree_ratio = np.random.uniform(0.1, 0.3)
-            female_disagree_ratio = np.random.uniform(0.3, 0.5)
-        elif row['risk_level'] == 'Low':
-            # Low risk: high alignment, low conflict
-            alignment_score = np.random.uniform(0.6, 0.9)
-            conflict_ratio = np.random.uniform(0.0, 0.2)
-            # Category alignments: higher for low risk
-            category_alignments = [np.random.uniform(0.6, 0.9) for _ in range(4)]
-            # More balanced responses for low risk
-            male_agree_ratio = np.random.uniform(0.4, 0.6)
-            male_disagree_ratio = np.random.uniform(0.0, 0.2)
-            female_agree_ratio = np.random.uniform(0.4, 0.6)
-            female_disagree_ratio = np.random.uniform(0.0, 0.2)
-        else:  # Medium
-            # Medium risk: mixed patterns
-            alignment_score = np.random.uniform(0.4, 0.7)
-            conflict_ratio = np.random.uniform(0.1, 0.4)
-            # Category alignments: mixed
-            category_alignments = [np.random.uniform(0.3, 0.7) for _ in range(4)]
-            # Moderate extreme responses
-            male_agree_ratio = np.random.uniform(0.2, 0.5)
-            male_disagree_ratio = np.random.uniform(0.1, 0.3)
-            female_agree_ratio = np.random.uniform(0.2, 0.5)
-            female_disagree_ratio = np.random.uniform(0.1, 0.3)
-        
-        # Add personalized features to match analysis structure (6 features)
-        personalized_features = [
-            alignment_score,
-            conflict_ratio,
-            # Category-specific alignments (4 features, one per MEAI category)
-            *category_alignments
-            # REMOVED: male_avg_response, female_avg_response, male_agree_ratio, male_disagree_ratio, female_agree_ratio, female_disagree_ratio
-        ]
-        
-        features.extend(personalized_features)
-        
-        X.append(features)
-        
-        # Risk level encoding
-        risk_mapping = {'Low': 0, 'Medium': 1, 'High': 2}
-        y_risk.append(risk_mapping[row['risk_level']])
-        
-        # Category scores (ensure it's a flat list)
-        category_scores = row['category_scores']
-        if isinstance(category_scores, np.ndarray):
-            y_categories.append(category_scores.tolist())
-        elif isinstance(category_scores, list):
-            y_categories.append(category_scores)
-        else:
-            # Convert to list if it's not already
-            y_categories.append(list(category_scores))
-    
-    # Convert to numpy arrays AFTER the loop completes
-    X = np.array(X)
-    y_risk = np.array(y_risk)
-    y_categories = np.array(y_categories)
+    set_training_status(progress=25, message='Preparing features and encoding data...')
+    rng = np.random.default_rng(42)
     
     # Ensure all 3 risk classes are present
-    unique_risks = np.unique(y_risk)
+    unique_risks = np.unique(encode_risk_levels(columns['risk_level']))
     if len(unique_risks) < 3:
         print(f"Warning: Only {len(unique_risks)} risk classes found (expected 3). Adding synthetic samples to ensure all classes are represented...")
-        
-        # Find missing risk classes
-        all_risk_classes = {0: 'Low', 1: 'Medium', 2: 'High'}
-        missing_classes = [rc for rc in all_risk_classes.keys() if rc not in unique_risks]
-        
-        # Generate synthetic samples for missing classes
-        total_questions = len(MEAI_QUESTION_MAPPING) if MEAI_QUESTION_MAPPING else 31
-        synthetic_samples = []
-        synthetic_risks = []
-        synthetic_categories = []
-        
-        for missing_class in missing_classes:
-            risk_name = all_risk_classes[missing_class]
-            # Generate 10 synthetic samples for each missing class
-            for _ in range(10):
-                # Generate ages
-                male_age = np.random.randint(25, 50)
-                female_age = np.random.randint(23, 48)
-                age_gap = abs(male_age - female_age)
-                
-                # Generate other attributes
-                civil_status = np.random.choice(['Single', 'Living In', 'Widowed'])
-                years_living_together = np.random.randint(0, 10) if civil_status == 'Living In' else 0
-                children = np.random.randint(0, 3)
-                education_level = np.random.randint(0, 4)
-                income_level = np.random.randint(0, 4)
-                education_income_diff = abs(education_level - income_level)
-                
-                # Civil status encoding
-                is_single = 1 if civil_status == 'Single' else 0
-                is_living_in = 1 if civil_status == 'Living In' else 0
-                is_separated_divorced = 1 if civil_status in ['Separated', 'Divorced', 'Widowed'] else 0
-                
-                # Generate questionnaire responses based on risk level
-                if risk_name == 'High':
-                    disagree_ratio = np.random.uniform(0.30, 0.60)
-                elif risk_name == 'Medium':
-                    disagree_ratio = np.random.uniform(0.15, 0.30)
-                else:  # Low
-                    disagree_ratio = np.random.uniform(0.0, 0.15)
-                
-                disagree_count = int(total_questions * disagree_ratio)
-                agree_count = int(total_questions * (1 - disagree_ratio) * 0.6)
-                neutral_count = total_questions - disagree_count - agree_count
-                
-                questionnaire_responses = [2] * disagree_count + [4] * agree_count + [3] * neutral_count
-                np.random.shuffle(questionnaire_responses)
-                
-                # Generate category scores based on risk level
-                if risk_name == 'High':
-                    category_scores = [np.random.uniform(0.5, 1.0) for _ in range(len(MEAI_CATEGORIES))]
-                elif risk_name == 'Medium':
-                    category_scores = [np.random.uniform(0.3, 0.7) for _ in range(len(MEAI_CATEGORIES))]
-                else:  # Low
-                    category_scores = [np.random.uniform(0.0, 0.5) for _ in range(len(MEAI_CATEGORIES))]
-                
-                # CRITICAL: Generate separate male_responses and female_responses
-                # Start with questionnaire_responses, then add variation
-                male_responses_synth = questionnaire_responses.copy()
-                female_responses_synth = questionnaire_responses.copy()
-                
-                # Add variation between partners (simulate real couple differences)
-                for j in range(len(questionnaire_responses)):
-                    # 30% chance of partner disagreement (difference of 1)
-                    if np.random.random() < 0.3:
-                        if np.random.random() < 0.5:
-                            male_responses_synth[j] = max(2, min(4, male_responses_synth[j] + np.random.choice([-1, 1])))
-                        else:
-                            female_responses_synth[j] = max(2, min(4, female_responses_synth[j] + np.random.choice([-1, 1])))
-                    # 10% chance of significant disagreement (difference of 2)
-                    elif np.random.random() < 0.1:
-                        if np.random.random() < 0.5:
-                            male_responses_synth[j] = max(2, min(4, male_responses_synth[j] + np.random.choice([-2, 2])))
-                        else:
-                            female_responses_synth[j] = max(2, min(4, female_responses_synth[j] + np.random.choice([-2, 2])))
-                
-                # Build features (11 demographic features - REMOVED: children)
-                features = [
-                    male_age, female_age, age_gap, years_living_together,
-                    education_level, income_level, education_income_diff,
-                    is_single, is_living_in, is_separated_divorced,
-                    0  # employment_encoded (default to Unemployed for synthetic)
-                ]
-                
-                # Add separate male_responses and female_responses (118 features: 59 + 59)
-                features.extend(male_responses_synth)
-                features.extend(female_responses_synth)
-                
-                # Add personalized features
-                if risk_name == 'High':
-                    alignment_score = np.random.uniform(0.2, 0.5)
-                    conflict_ratio = np.random.uniform(0.3, 0.7)
-                    category_alignments = [np.random.uniform(0.2, 0.5) for _ in range(4)]
-                    male_agree_ratio = np.random.uniform(0.1, 0.3)
-                    male_disagree_ratio = np.random.uniform(0.3, 0.5)
-                    female_agree_ratio = np.random.uniform(0.1, 0.3)
-                    female_disagree_ratio = np.random.uniform(0.3, 0.5)
-                elif risk_name == 'Low':
-                    alignment_score = np.random.uniform(0.6, 0.9)
-                    conflict_ratio = np.random.uniform(0.0, 0.2)
-                    category_alignments = [np.random.uniform(0.6, 0.9) for _ in range(4)]
-                    male_agree_ratio = np.random.uniform(0.4, 0.6)
-                    male_disagree_ratio = np.random.uniform(0.0, 0.2)
-                    female_agree_ratio = np.random.uniform(0.4, 0.6)
-                    female_disagree_ratio = np.random.uniform(0.0, 0.2)
-                else:  # Medium
-                    alignment_score = np.random.uniform(0.4, 0.7)
-                    conflict_ratio = np.random.uniform(0.1, 0.4)
-                    category_alignments = [np.random.uniform(0.3, 0.7) for _ in range(4)]
-                    # REMOVED: male_agree_ratio, male_disagree_ratio, female_agree_ratio, female_disagree_ratio
-                
-                personalized_features = [
-                    alignment_score,
-                    conflict_ratio,
-                    *category_alignments  # 4 category alignments
-                    # REMOVED: male_avg_response, female_avg_response, agree/disagree ratios
-                ]
-                
-                features.extend(personalized_features)
-                
-                synthetic_samples.append(features)
-                synthetic_risks.append(missing_class)
-                synthetic_categories.append(category_scores)
-        
-        # Add synthetic samples to training data
-        if synthetic_samples:
-            X_synthetic = np.array(synthetic_samples)
-            y_risk_synthetic = np.array(synthetic_risks)
-            y_categories_synthetic = np.array(synthetic_categories)
-            
-            X = np.vstack([X, X_synthetic])
-            y_risk = np.concatenate([y_risk, y_risk_synthetic])
-            y_categories = np.vstack([y_categories, y_categories_synthetic])
-            
-            print(f"Added {len(synthetic_samples)} synthetic samples to ensure all risk classes are represented")
-            print(f"Final class distribution: {np.bincount(y_risk)}")
-    
-    # Update progress: Validating data
-    with training_lock:
-        training_status['progress'] = 35
-        training_status['message'] = 'Validating training data...'
-    
-    # Validate training data
-    print("Validating training data...")
-    validation_result = validate_training_data(X, y_risk, y_categories)
-    
-    if not validation_result['valid']:
-        print("ERROR: Training data validation failed:")
-        for error in validation_result['errors']:
-            print(f"  - {error}")
-        return False
-    
-    if validation_result['warnings']:
-        print("WARNINGS during validation:")
-        for warning in validation_result['warnings']:
-            print(f"  - {warning}")
-    
-    print(f"Training with {X.shape[1]} features: {X.shape[0]} samples")
-    
-    # Track original data composition for logging
-    num_real_couples = len(real_couples_data) if real_couples_data else 0
-    num_synthetic_couples = 500  # Always 500 synthetic couples
-    print(f"Data composition: {num_real_couples} real couples + {num_synthetic_couples} synthetic couples = {X.shape[0]} total")
+        missing_classes = [code for code in RISK_LEVEL_CODES.values() if code not in unique_risks]
+        total_questions = columns['male_responses'].shape[1]
+        num_categories = columns['category_scores'].shape[1]
+        extra = generate_missing_class_columns(rng, missing_classes, total_questions, num_categories)
+        columns = concat_training_columns(columns, extra)
+        print(f"Added {len(extra['risk_level'])} synthetic samples to ensure all risk classes are represented")
+    
+    return columns, rng
+
+def balance_training_set(X, y_risk, y_categories):
+    """SMOTETomek-resampled (X, y_risk, y_categories) when the risk classes are clearly imbalanced,
+    else the inputs unchanged"""
     class_dist_before = np.bincount(y_risk)
     print(f"Class distribution before SMOTE: {class_dist_before}")
     
@@ -1722,16 +2546,14 @@ def train_ml_models():
         print(f"  - Current distribution is acceptable for training")
     else:
         # Update progress: Applying SMOTE
-        with training_lock:
-            training_status['progress'] = 40
-            training_status['message'] = 'Applying SMOTE for class balancing...'
+        set_training_status(progress=40, message='Applying SMOTE for class balancing...')
         
         print(f"Applying SMOTE to combined dataset (imbalance ratio: {imbalance_ratio:.2f} > 1.5)")
         print(f"  - Real couples created imbalance, synthetic data is already balanced")
         print(f"  - SMOTE will balance overall distribution while preserving real data patterns")
         try:
             # Use SMOTETomek (combines SMOTE oversampling with Tomek undersampling)
-            smote_tomek = SMOTETomek(random_state=42, n_jobs=-1)
+            smote_tomek = SMOTETomek(random_state=42, n_jobs=training_n_jobs())
             X_resampled, y_risk_resampled = smote_tomek.fit_resample(X, y_risk)
             
             # For category scores, we need to match the resampled indices
@@ -1762,7 +2584,9 @@ def train_ml_models():
             print(f"After SMOTE: {X_resampled.shape[0]} samples (was {X.shape[0]})")
             print(f"Class distribution after SMOTE: {np.bincount(y_risk_resampled)}")
             
-            X = X_resampled
+            X = training_memmap(X_resampled.shape, FEATURE_DTYPE, 'X-resampled')
+            X[:] = X_resampled
+            del X_resampled
             y_risk = y_risk_resampled
             y_categories = y_categories_resampled
         except Exception as e:
@@ -1770,212 +2594,679 @@ def train_ml_models():
             print("This is normal if you have very few samples or all samples in one class")
             # Continue with original data if SMOTE fails
     
-    # Check for class imbalance
-    class_weights = class_weight.compute_class_weight(
-        'balanced',
-        classes=np.unique(y_risk),
-        y=y_risk
-    )
-    class_weight_dict = dict(enumerate(class_weights))
-    print(f"Class distribution: {np.bincount(y_risk)}")
-    print(f"Class weights: {class_weight_dict}")
+    return X, y_risk, y_categories
+
+def train_ml_models(force_retune=False, incremental=False):
+    """Train machine learning models (force_retune ignores cached hyperparameters; incremental
+    grows the active forests instead of rebuilding them, when possible)"""
+    print("Training ML models...")
+    training_started = time.time()
     
-    # Update progress: Training risk model
-    with training_lock:
-        training_status['progress'] = 50
-        training_status['message'] = 'Tuning hyperparameters for risk model...'
+    # Update progress: Loading questions and categories
+    set_training_status(progress=15, message='Loading questions and categories...')
     
-    # Hyperparameter tuning for risk model
-    print("Tuning hyperparameters for risk model...")
-    risk_param_grid = {
-        'n_estimators': [100, 200],
-        'max_depth': [10, 15, None],
-        'min_samples_split': [2, 5],
-        'class_weight': ['balanced', class_weight_dict]
-    }
+    # Ensure questions are loaded before training (training runs in the background, so it can wait on the DB)
+    if schema_needs_refresh():
+        reload_schema(force=True)
     
-    risk_base_model = RandomForestClassifier(random_state=42)
-    risk_grid_search = GridSearchCV(
-        risk_base_model,
-        risk_param_grid,
-        cv=5,
-        scoring='accuracy',
-        n_jobs=-1,
-        verbose=1
-    )
+    # Update progress: Loading real couples
+    set_training_status(progress=20, message='Loading real couples from database...')
     
-    # Update progress during risk model training (50-70%)
-    with training_lock:
-        training_status['progress'] = 60
-        training_status['message'] = 'Training risk model (this may take a few minutes)...'
+    # Load real couples from database for training
+    real_couples_data = load_real_couples_for_training()
+    check_training_cancelled()
+    
+    expected_count = len(MEAI_QUESTION_MAPPING) if MEAI_QUESTION_MAPPING else 59
+    
+    # Each stage's output is checkpointed under a hash of its inputs, so a /train restarted after an
+    # interruption picks up after the last stage that completed
+    resumed_stages = []
+    data_key = checkpoint_key('data', compute_schema_hash(), expected_count, real_couples_data)
+    data, data_hash = load_checkpoint('data', data_key)
+    if data is not None:
+        columns = data['columns']
+        rng = np.random.default_rng()
+        rng.bit_generator.state = data['rng_state']
+        resumed_stages.append('data')
+    else:
+        columns, rng = prepare_training_columns(real_couples_data, expected_count)
+        data_hash = save_checkpoint('data', data_key, {'columns': columns, 'rng_state': rng.bit_generator.state})
+    
+    check_training_cancelled()
+    
+    # Estimate peak memory before allocating anything large (may lower n_jobs or refuse)
+    n_samples = len(columns['risk_level'])
+    n_features = FeatureBuilder(columns['male_responses'].shape[1]).n_features
+    plan_training_memory(n_samples, n_features, np.bincount(encode_risk_levels(columns['risk_level']), minlength=3),
+                         columns['category_scores'].shape[1])
+    
+    # Whole matrix in one float32 block on a disk memmap (layout shared with /analyze via FeatureBuilder)
+    X = training_memmap((n_samples, n_features), FEATURE_DTYPE, 'X')
+    matrix, matrix_hash = load_checkpoint('matrix', checkpoint_key('matrix', data_hash))
+    if matrix is not None:
+        X[:] = matrix['X']
+        y_risk, y_categories = matrix['y_risk'], matrix['y_categories']
+        resumed_stages.append('matrix')
+    else:
+        X, y_risk, y_categories = build_training_matrix(columns, rng, out=X)
+        matrix_hash = save_checkpoint('matrix', checkpoint_key('matrix', data_hash),
+                                      {'X': np.asarray(X), 'y_risk': y_risk, 'y_categories': y_categories})
+    del columns, matrix
+    check_training_cancelled()
+    print(f"Built feature matrix {X.shape} ({X.nbytes / 1024:.0f} KiB {X.dtype}, memory-mapped)")
+    print(f"Class distribution: {np.bincount(y_risk, minlength=3)}")
     
-    risk_grid_search.fit(X, y_risk)
-    risk_model = risk_grid_search.best_estimator_
-    print(f"Best risk model params: {risk_grid_search.best_params_}")
-    print(f"Best risk model CV score: {risk_grid_search.best_score_:.3f}")
+    # Update progress: Validating data
+    set_training_status(progress=35, message='Validating training data...')
     
-    # Update progress: Training category model
-    with training_lock:
-        training_status['progress'] = 70
-        training_status['message'] = 'Tuning hyperparameters for category model...'
-    
-    # Hyperparameter tuning for category model
-    print("Tuning hyperparameters for category model...")
-    category_param_grid = {
-        'estimator__n_estimators': [100, 200],
-        'estimator__max_depth': [10, 15, None],
-        'estimator__min_samples_split': [2, 5]
-    }
+    # Validate training data
+    print("Validating training data...")
+    validation_result = validate_training_data(X, y_risk, y_categories)
     
-    category_base_model = MultiOutputRegressor(RandomForestRegressor(random_state=42))
-    category_grid_search = GridSearchCV(
-        category_base_model,
-        category_param_grid,
-        cv=5,
-        scoring='neg_mean_squared_error',
-        n_jobs=-1,
-        verbose=1
-    )
+    if not validation_result['valid']:
+        print("ERROR: Training data validation failed:")
+        for error in validation_result['errors']:
+            print(f"  - {error}")
+        return False
     
-    # Update progress during category model training (70-85%)
-    with training_lock:
-        training_status['progress'] = 80
-        training_status['message'] = 'Training category model (this may take a few minutes)...'
+    if validation_result['warnings']:
+        print("WARNINGS during validation:")
+        for warning in validation_result['warnings']:
+            print(f"  - {warning}")
     
-    category_grid_search.fit(X, y_categories)
-    category_model = category_grid_search.best_estimator_
-    print(f"Best category model params: {category_grid_search.best_params_}")
-    print(f"Best category model CV score: {category_grid_search.best_score_:.3f}")
+    print(f"Training with {X.shape[1]} features: {X.shape[0]} samples")
     
-    # Update progress: Cross-validation
-    with training_lock:
-        training_status['progress'] = 85
-        training_status['message'] = 'Evaluating models with cross-validation...'
+    # Track original data composition for logging
+    num_real_couples = len(real_couples_data) if real_couples_data else 0
+    num_synthetic_couples = 500  # Always 500 synthetic couples
+    print(f"Data composition: {num_real_couples} real couples + {num_synthetic_couples} synthetic couples = {X.shape[0]} total")
+    balanced, balanced_hash = load_checkpoint('balanced', checkpoint_key('balanced', matrix_hash))
+    if balanced is not None:
+        if balanced['X'].shape != X.shape:
+            X = training_memmap(balanced['X'].shape, FEATURE_DTYPE, 'X-resampled')
+        X[:] = balanced['X']
+        y_risk, y_categories = balanced['y_risk'], balanced['y_categories']
+        resumed_stages.append('balanced')
+        print(f"Resumed balanced training set from checkpoint: {X.shape[0]} samples")
+    else:
+        X, y_risk, y_categories = balance_training_set(X, y_risk, y_categories)
+        balanced_hash = save_checkpoint('balanced', checkpoint_key('balanced', matrix_hash),
+                                        {'X': np.asarray(X), 'y_risk': y_risk, 'y_categories': y_categories})
+    del balanced
+    check_training_cancelled()
+    if resumed_stages:
+        set_training_status(message=f"Resumed {', '.join(resumed_stages)} from checkpoints")
+    
+    # Check for class imbalance
+    class_weights = class_weight.compute_class_weight(
+        'balanced',
+        classes=np.unique(y_risk),
+        y=y_risk
+    )
+    class_weight_dict = dict(enumerate(class_weights))
+    print(f"Class distribution: {np.bincount(y_risk)}")
+    print(f"Class weights: {class_weight_dict}")
     
-    # Cross-validation evaluation
-    risk_cv_scores = cross_val_score(risk_model, X, y_risk, cv=5, scoring='accuracy')
-    print(f"Risk model CV accuracy: {risk_cv_scores.mean():.3f} (+/- {risk_cv_scores.std() * 2:.3f})")
+    # Incremental retrain: keep the active forests and only rotate in trees fit on the current data
+    base = None
+    if incremental and not force_retune:
+        base, reason = load_incremental_base(X.shape[1], np.unique(y_risk))
+        if base is None:
+            print(f"Incremental retrain not possible ({reason}) - running a full rebuild")
+    
+    # Reuse tuned hyperparameters when this training set is close to one already tuned
+    fingerprint = dataset_fingerprint(X, y_risk)
+    cached, drift = (None, None) if force_retune or base is not None else find_cached_hyperparameters(fingerprint)
+    if force_retune:
+        print("Forced re-tune requested - ignoring cached hyperparameters")
+    elif drift is not None and cached is None:
+        print(f"Data drifted {drift:.3f} from the closest tuned dataset (limit {HYPERPARAM_CACHE_MAX_DRIFT}) - re-tuning")
+    
+    if base is not None:
+        base_metrics = base['manifest'].get('metrics', {})
+        n_new = TRAINING_INCREMENTAL_TREES
+        seed = int(hashlib.sha256(base['version'].encode('utf-8')).hexdigest()[:8], 16)
+        print(f"Incremental retrain from {base['version']}: replacing the {n_new} oldest trees of each forest")
+        risk_best_params = base_metrics.get('risk_best_params', {})
+        category_best_params = base_metrics.get('category_best_params', {})
+        risk_best_score = base_metrics.get('risk_cv_accuracy', 0.0)
+        category_best_score = base_metrics.get('category_cv_neg_mse', 0.0)
+        risk_search_info = category_search_info = {
+            'mode': 'incremental', 'base_version': base['version'], 'new_trees': n_new
+        }
+        
+        set_training_status(progress=60, message=f'Growing {n_new} new trees for the risk model...')
+        risk_model = set_forest_n_jobs(base['risk_model'], training_n_jobs())
+        if isinstance(risk_model.get_params().get('class_weight'), dict):
+            risk_model.set_params(class_weight=class_weight_dict)
+        rotate_forest(risk_model, X, y_risk, n_new, seed)
+        
+        set_training_status(progress=80, message=f'Growing {n_new} new trees for the category model...')
+        category_model = set_forest_n_jobs(base['category_model'], training_n_jobs())
+        rotate_category_model(category_model, X, y_categories, n_new, seed)
+        
+        # Nothing is cross-validated here - the full build's scores are carried over (see below)
+        risk_eval_scores = np.array([base_metrics.get('risk_cv_accuracy_mean', risk_best_score)])
+        risk_eval_std = base_metrics.get('risk_cv_accuracy_std')
+        category_eval_score = base_metrics.get('category_eval_neg_mse', category_best_score)
+        evaluation = 'inherited'
+    elif cached is not None:
+        print(f"Reusing hyperparameters tuned on {cached['fingerprint']['n_samples']} samples (drift {drift:.3f})")
+        risk_best_params = _decode_params(cached['risk_params'], class_weight_dict)
+        category_best_params = _decode_params(cached['category_params'], class_weight_dict)
+        risk_best_score = cached['risk_cv_score']
+        category_best_score = cached['category_cv_score']
+        risk_search_info = category_search_info = {
+            'mode': 'cached', 'drift': round(drift, 4), 'tuned_at': cached['tuned_at'],
+            'tuned_on': cached['fingerprint']['matrix_hash']
+        }
+        
+        # No search ran on this data, so evaluate on the out-of-bag samples of the final fits
+        set_training_status(progress=60, message='Training risk model with cached hyperparameters...')
+        risk_model = RandomForestClassifier(random_state=42, oob_score=True, n_jobs=training_n_jobs())
+        risk_model.set_params(**risk_best_params).fit(X, y_risk)
+        risk_eval_scores = np.array([risk_model.oob_score_])
+        risk_eval_std = None  # a single out-of-bag score has no spread
+        
+        set_training_status(progress=80, message='Training category model with cached hyperparameters...')
+        category_model = make_category_model(oob_score=True).set_params(**category_best_params)
+        set_forest_n_jobs(category_model, training_n_jobs()).fit(X, y_categories)
+        category_eval_score = -oob_category_mse(category_model, y_categories)
+        evaluation = 'oob'
+    else:
+        # Hyperparameter tuning for both models (concurrent when the budget has more than one core);
+        # a model whose search finished before an interruption is taken from its checkpoint
+        search_key = checkpoint_key('search', balanced_hash, search_signature())
+        results, searches = {}, {}
+        for name in ('risk', 'category'):
+            results[name], _ = load_checkpoint(f'search-{name}', search_key)
+            if results[name] is not None:
+                resumed_stages.append(f'search-{name}')
+        if results['risk'] is None:
+            searches['risk'] = (make_hyperparameter_search(
+                RandomForestClassifier(random_state=42), get_risk_param_grid(class_weight_dict), 'accuracy', 'n_estimators'
+            ), X, y_risk)
+        if results['category'] is None:
+            print(f"Category model type: {CATEGORY_MODEL_TYPE}")
+            searches['category'] = (make_hyperparameter_search(
+                make_category_model(), get_category_param_grid(), 'neg_mean_squared_error',
+                category_param_prefix() + 'n_estimators'
+            ), X, y_categories)
+        
+        def checkpoint_search(name, search):
+            results[name] = search_result(search)
+            save_checkpoint(f'search-{name}', search_key, results[name])
+        
+        print(f"Tuning hyperparameters for {' and '.join(searches) or 'no'} models...")
+        fit_searches(searches, on_done=checkpoint_search, resumed=[name for name in results if name not in searches])
+        
+        risk_model, category_model = results['risk']['model'], results['category']['model']
+        risk_best_params, risk_best_score = results['risk']['best_params'], results['risk']['best_score']
+        category_best_params, category_best_score = results['category']['best_params'], results['category']['best_score']
+        risk_search_info, category_search_info = results['risk']['info'], results['category']['info']
+        
+        # The search already cross-validated the chosen params - reuse its fold scores
+        risk_eval_scores = results['risk']['split_scores']
+        risk_eval_std = float(risk_eval_scores.std())
+        category_eval_score = category_best_score
+        evaluation = 'cv_results'
+        
+        store_hyperparameters(fingerprint, risk_best_params, risk_best_score, category_best_params, category_best_score)
+    
+    print(f"Risk model search: {risk_search_info}")
+    print(f"Best risk model params: {risk_best_params}")
+    print(f"Best risk model CV score: {risk_best_score:.3f}")
+    print(f"Category model search: {category_search_info}")
+    print(f"Best category model params: {category_best_params}")
+    print(f"Best category model CV score: {category_best_score:.3f}")
+    
+    spread = f" (+/- {risk_eval_std * 2:.3f})" if risk_eval_std is not None else ''
+    print(f"Risk model accuracy ({evaluation}): {risk_eval_scores.mean():.3f}{spread}")
+    print(f"Category model neg MSE ({evaluation}): {category_eval_score:.4f}")
+    
+    check_training_cancelled()
+    
+    # Serving predicts a row at a time in its own workers - don't ship the training parallelism
+    set_forest_n_jobs(risk_model, None)
+    set_forest_n_jobs(category_model, None)
     
     # Create risk encoder
     risk_encoder = LabelEncoder()
     risk_encoder.fit(['Low', 'Medium', 'High'])
     
     # Update progress: Saving models
-    with training_lock:
-        training_status['progress'] = 90
-        training_status['message'] = 'Saving trained models to disk...'
-        
-        # Save models
-    ml_models['risk_model'] = risk_model
-    ml_models['category_model'] = category_model
-    ml_models['risk_encoder'] = risk_encoder
+    set_training_status(progress=90, message='Publishing trained models to the registry...')
     
-    # Save to files - use ml_model folder (where this script is located)
-    script_dir = os.path.dirname(os.path.abspath(__file__))
+    models = {
+        'risk_model': risk_model,
+        'category_model': category_model,
+        'risk_encoder': risk_encoder
+    }
+    metrics = {
+        'risk_best_params': risk_best_params,
+        'risk_cv_accuracy': round(float(risk_best_score), 4),
+        'risk_cv_accuracy_mean': round(float(risk_eval_scores.mean()), 4),
+        'risk_cv_accuracy_std': round(risk_eval_std, 4) if risk_eval_std is not None else None,
+        'category_eval_neg_mse': round(float(category_eval_score), 4),
+        'category_model_type': 'per_category' if isinstance(category_model, MultiOutputRegressor) else 'multi_output',
+        'evaluation': evaluation,
+        'category_best_params': category_best_params,
+        'category_cv_neg_mse': round(float(category_best_score), 4),
+        'risk_search': risk_search_info,
+        'category_search': category_search_info,
+        'n_samples': int(X.shape[0]),
+        'n_features': int(X.shape[1]),
+        'training_mode': 'full',
+        'full_build_at': training_started,
+        'cpu_cores': training_cpu_budget(),
+        'n_jobs': training_n_jobs(),
+        'memory_estimate_mb': training_memory_plan.get('total_mb'),
+        'resumed_stages': resumed_stages
+    }
+    if base is not None:
+        metrics.update(
+            training_mode='incremental',
+            base_version=base['version'],
+            incremental_round=base_metrics.get('incremental_round', 0) + 1,
+            full_build_at=base_metrics.get('full_build_at', base['manifest'].get('created_at'))
+        )
     
+    # Past the last safe point: a SIGTERM from /train/cancel no longer interrupts publishing
+    training_cancel_deferred.set()
     try:
-        risk_model_path = os.path.join(script_dir, 'risk_model.pkl')
-        category_model_path = os.path.join(script_dir, 'category_model.pkl')
-        risk_encoder_path = os.path.join(script_dir, 'risk_encoder.pkl')
-        
-        with open(risk_model_path, 'wb') as f:
-            pickle.dump(risk_model, f)
-        
-        with open(category_model_path, 'wb') as f:
-            pickle.dump(category_model, f)
+        version = publish_model_version(models, metrics, time.time() - training_started)
+        if in_training_process():
+            # Serving workers (including the one that started us) hot-load it from the ACTIVE pointer
+            model_registry.activate(version)
+            removed = model_registry.prune(MODEL_REGISTRY_KEEP)
+            if removed:
+                print(f"Pruned old model versions: {', '.join(removed)}")
+        else:
+            activate_model_version(version, models=models)
         
-        with open(risk_encoder_path, 'wb') as f:
-            pickle.dump(risk_encoder, f)
+        clear_training_checkpoints()
         
         # Update progress: Complete
-        with training_lock:
-            training_status['progress'] = 95
-            training_status['message'] = 'Models saved successfully!'
+        set_training_status(progress=95, message=f'Models published and activated as {version}')
         
-        print(f"ML models trained and saved successfully to {script_dir}")
+        print(f"ML models trained and activated as version {version}")
         return True
     except Exception as e:
-        print(f"Error saving models: {e}")
-        # Models are still in memory, so training was successful
-        # Just couldn't save to disk
+        print(f"Error publishing models: {e}")
+        if in_training_process():
+            return False  # The models only exist in this process, so nothing could serve them
+        # Serve the new models from memory anyway - training was successful,
+        # they just couldn't be written to the registry
+        swap_model_bundle(models, None, None)
         return True  # Still return True since models are loaded in memory
+    finally:
+        training_cancel_deferred.clear()
+
+# ============================================================================
+# MODEL REGISTRY (versioned directories, atomic activation, rollback)
+# ============================================================================
+
+_schema_hash_cache = {'categories': None, 'mapping': None, 'hash': None}
+
+def compute_schema_hash(categories=None, question_mapping=None):
+    """Stable hash of the question schema the feature layout depends on (defaults to the loaded schema)"""
+    if categories is None and question_mapping is None:
+        categories, question_mapping = MEAI_CATEGORIES, MEAI_QUESTION_MAPPING
+        # Schema loaders swap in new objects rather than mutating, so identity means unchanged
+        cache = _schema_hash_cache
+        if cache['categories'] is categories and cache['mapping'] is question_mapping:
+            return cache['hash']
+        schema_hash = compute_schema_hash(list(categories), dict(question_mapping))
+        cache.update(categories=categories, mapping=question_mapping, hash=schema_hash)
+        return schema_hash
+    
+    schema = {
+        'categories': list(categories),
+        'questions': sorted([int(qid), int(cid)] for qid, cid in question_mapping.items())
+    }
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def expected_feature_count(answerable_questions=None):
+    """Feature vector length for a schema: demographic + male and female responses + personalized"""
+    if answerable_questions is None:
+        answerable_questions = len(MEAI_QUESTION_MAPPING)
+    if not answerable_questions:
+        return None
+    return FeatureBuilder(answerable_questions).n_features
+
+def get_feature_layout():
+    """Feature vector layout for the current schema (what the models' columns mean)"""
+    answerable_questions = len(MEAI_QUESTION_MAPPING)
+    return {
+        'demographic': DEMOGRAPHIC_FEATURE_COUNT,
+        'male_responses': answerable_questions,
+        'female_responses': answerable_questions,
+        'personalized': PERSONALIZED_FEATURE_COUNT,
+        'demographic_features': list(DEMOGRAPHIC_FEATURES),
+        'personalized_features': list(PERSONALIZED_FEATURES),
+        'dtype': 'float32',
+        'total': expected_feature_count(answerable_questions),
+        'question_ids': sorted(int(qid) for qid in MEAI_QUESTION_MAPPING)
+    }
+
+def publish_model_version(models, metrics, train_seconds):
+    """Write models to a new registry version directory with its manifest; return the version id"""
+    staging_dir = model_registry.begin_version()
+    try:
+        for name, model in models.items():
+            with open(os.path.join(staging_dir, f'{name}.pkl'), 'wb') as f:
+                pickle.dump(model, f)
+        
+        # Export compact memory-mappable artifacts for serving (tree node arrays only)
+        for name in ('risk_model', 'category_model'):
+            compact = export_compact_model(models[name], os.path.join(staging_dir, name))
+            print(f"Exported {name}.forest: {compact['n_trees']} trees, {compact['bytes'] / 1024:.0f} KiB")
+        
+        import sklearn
+        manifest = {
+            'version': model_registry.new_version_id(),
+            'created_at': time.time(),
+            'train_seconds': round(train_seconds, 1),
+            'schema_hash': compute_schema_hash(),
+            'schema': {'categories': MEAI_CATEGORIES, 'questions': MEAI_QUESTIONS},
+            'feature_layout': get_feature_layout(),
+            'metrics': metrics,
+            'sklearn_version': sklearn.__version__
+        }
+        version = model_registry.publish_version(staging_dir, manifest)
+    except Exception:
+        model_registry.discard_staging(staging_dir)
+        raise
+    print(f"Published model version {version} to {model_registry.root}")
+    return version
+
+def load_model_bundle(model_dir):
+    """Load risk model, category model and encoder from one directory (None unless all three load)"""
+    models = {}
+    for name in ('risk_model', 'category_model'):
+        models[name] = _load_model_artifact(model_dir, name, os.path.join(model_dir, f'{name}.pkl'))
+    
+    risk_encoder_path = os.path.join(model_dir, 'risk_encoder.pkl')
+    if os.path.exists(risk_encoder_path):
+        with open(risk_encoder_path, 'rb') as f:
+            models['risk_encoder'] = pickle.load(f)
+        print(f"Loaded risk_encoder.pkl from {model_dir}")
+    else:
+        models['risk_encoder'] = None
+        print(f"Warning: risk_encoder.pkl not found in {model_dir}")
+    
+    if all(model is not None for model in models.values()):
+        return models
+    return None
+
+def swap_model_bundle(models, version, manifest):
+    """Warm up a loaded bundle, then make it the active one in a single reference swap (old one becomes previous)"""
+    global ml_models
+    # A bundle that already served (rollback to previous) is still warm
+    warmup = None
+    with model_swap_lock:
+        for entry in model_versions.values():
+            if entry is not None and entry['models'] is models:
+                warmup = entry.get('warmup')
+    if warmup is None:
+        warmup = warm_up_models(models, version)
+    
+    with model_swap_lock:
+        current = model_versions['active']
+        if current is not None and current['version'] == version and version is not None:
+            current['models'] = models
+        else:
+            model_versions['previous'] = current
+        model_versions['active'] = {'version': version, 'manifest': manifest, 'models': models, 'warmup': warmup,
+                                    'schema': schema_from_manifest(manifest) if manifest else None}
+        ml_models = models
+    # A slot holding another version for the same schema would only duplicate memory
+    if manifest and manifest.get('schema_hash'):
+        with model_slots_lock:
+            model_slots.pop(manifest['schema_hash'], None)
+    with serving_latency_lock:
+        serving_latency.update(bundle_id=id(models), requests=0, first_ms=None, last_ms=None, total_ms=0.0)
+    update_readiness()
+
+def _get_loaded_version(version):
+    """Return the in-memory bundle for version if it is the active or previous one"""
+    with model_swap_lock:
+        for slot in ('active', 'previous'):
+            entry = model_versions[slot]
+            if entry is not None and entry['version'] == version:
+                return entry['models']
+    return None
+
+def activate_model_version(version, models=None):
+    """Load a registry version (unless already in memory), flip the ACTIVE pointer, then swap it in"""
+    manifest = model_registry.read_manifest(version)
+    if models is None:
+        models = _get_loaded_version(version)
+    if models is None:
+        # Load before touching the pointer so a broken version never becomes active
+        models = load_model_bundle(model_registry.version_dir(version))
+        if models is None:
+            raise ModelRegistryError(f"Model version {version} is incomplete")
+    
+    model_registry.activate(version)
+    swap_model_bundle(models, version, manifest)
+    
+    removed = model_registry.prune(MODEL_REGISTRY_KEEP)
+    if removed:
+        print(f"Pruned old model versions: {', '.join(removed)}")
+    print(f"Activated model version {version}")
+    return version
+
+def rollback_model_version():
+    """Re-activate the previous version (normally still in memory, so no load is needed)"""
+    pointer = model_registry.read_pointer()
+    previous = pointer.get('previous')
+    if not previous:
+        raise ModelRegistryError("No previous model version to roll back to")
+    manifest = model_registry.read_manifest(previous)
+    models = _get_loaded_version(previous)
+    if models is None:
+        models = load_model_bundle(model_registry.version_dir(previous))
+        if models is None:
+            raise ModelRegistryError(f"Model version {previous} is incomplete")
+    
+    model_registry.rollback()
+    swap_model_bundle(models, previous, manifest)
+    print(f"Rolled back from model version {pointer.get('active')} to {previous}")
+    return previous
+
+def get_model_version_info():
+    """Active and previous version ids plus the active manifest summary"""
+    with model_swap_lock:
+        active = model_versions['active']
+        previous = model_versions['previous']
+    manifest = (active or {}).get('manifest') or {}
+    return {
+        'active': active['version'] if active else None,
+        'previous': previous['version'] if previous else None,
+        'schema_hash': manifest.get('schema_hash'),
+        'created_at': manifest.get('created_at')
+    }
+
+# ============================================================================
+# MODEL SLOTS (model sets for other questionnaire schemas, LRU-evicted)
+# ============================================================================
+
+# Lazily loaded bundles for schemas other than the current one, least recently used first
+model_slots = OrderedDict()  # {schema_hash: {'version', 'schema', 'models', 'nbytes', 'hits', 'loaded_at'}}
+model_slots_lock = threading.Lock()
+model_slot_load_lock = threading.Lock()  # One lazy load at a time, so a burst of requests loads a version once
+
+def estimate_bundle_bytes(models, model_dir):
+    """Memory charged to a slot - compact artifact size when memory-mapped, else the pickle size"""
+    total = 0
+    for name, model in models.items():
+        nbytes = getattr(model, 'nbytes', None)
+        if nbytes is None:
+            pickle_path = os.path.join(model_dir, f'{name}.pkl')
+            nbytes = os.path.getsize(pickle_path) if os.path.exists(pickle_path) else 0
+        total += nbytes
+    return int(total)
+
+def find_version_for_schema(schema_hash):
+    """Newest registry version trained on the given schema that recorded the schema itself"""
+    for manifest in model_registry.list_versions():
+        if manifest.get('schema_hash') == schema_hash and manifest.get('schema'):
+            return manifest
+    return None
+
+def _evict_model_slots():
+    """Drop least recently used slots until the budget is met (always keeps the newest slot)"""
+    budget = MODEL_SLOT_MEMORY_MB * 1024 * 1024
+    evicted = []
+    while len(model_slots) > 1 and sum(slot['nbytes'] for slot in model_slots.values()) > budget:
+        schema_hash, slot = model_slots.popitem(last=False)
+        evicted.append(f"{schema_hash} ({slot['version']})")
+    return evicted
+
+def get_model_slot(schema_hash):
+    """(models, schema) for a questionnaire schema hash - a loaded bundle if any, else lazily from the registry"""
+    # The active and previous bundles are reused rather than loaded a second time
+    with model_swap_lock:
+        for entry in model_versions.values():
+            if entry is not None and entry.get('schema') and entry['schema']['hash'] == schema_hash:
+                return entry['models'], entry['schema']
+    
+    with model_slots_lock:
+        slot = model_slots.get(schema_hash)
+        if slot is not None:
+            model_slots.move_to_end(schema_hash)
+            slot['hits'] += 1
+            return slot['models'], slot['schema']
+    
+    with model_slot_load_lock:
+        # Another request may have loaded it while this one waited
+        with model_slots_lock:
+            slot = model_slots.get(schema_hash)
+            if slot is not None:
+                model_slots.move_to_end(schema_hash)
+                slot['hits'] += 1
+                return slot['models'], slot['schema']
+        
+        manifest = find_version_for_schema(schema_hash)
+        if manifest is None:
+            raise ModelRegistryError(f"No model version trained on questionnaire schema {schema_hash}")
+        version = manifest['version']
+        model_dir = model_registry.version_dir(version)
+        started = time.time()
+        models = load_model_bundle(model_dir)
+        if models is None:
+            raise ModelRegistryError(f"Model version {version} is incomplete")
+        schema = schema_from_manifest(manifest)
+        # Warm up before the slot is visible, so no request takes the cold first call
+        warmup = warm_up_models(models, version, schema)
+        
+        slot = {
+            'version': version,
+            'schema': schema,
+            'models': models,
+            'warmup': warmup,
+            'nbytes': estimate_bundle_bytes(models, model_dir),
+            'hits': 1,
+            'loaded_at': time.time()
+        }
+        with model_slots_lock:
+            model_slots[schema_hash] = slot
+            evicted = _evict_model_slots()
+    
+    print(f"Loaded model slot for schema {schema_hash} (version {version}, {slot['nbytes'] / 1024:.0f} KiB) "
+          f"in {time.time() - started:.2f}s")
+    if evicted:
+        print(f"Evicted model slots: {', '.join(evicted)}")
+    return slot['models'], slot['schema']
+
+def get_model_slots_info():
+    """Loaded slots in LRU order (least recently used first) and the memory budget"""
+    with model_slots_lock:
+        slots = [
+            {'schema_hash': schema_hash, 'version': slot['version'], 'bytes': slot['nbytes'],
+             'hits': slot['hits'], 'loaded_at': slot['loaded_at'], 'warmup': slot.get('warmup')}
+            for schema_hash, slot in model_slots.items()
+        ]
+    return {
+        'budget_bytes': int(MODEL_SLOT_MEMORY_MB * 1024 * 1024),
+        'used_bytes': sum(slot['bytes'] for slot in slots),
+        'slots': slots
+    }
+
+def _load_model_artifact(model_dir, name, pickle_path):
+    """Load one model - the memory-mapped compact artifact if available and current, else the pickle"""
+    base_path = os.path.join(model_dir, name)
+    if MODEL_ARTIFACT_FORMAT == 'compact' and artifact_exists(base_path):
+        _, manifest_path = artifact_paths(base_path)
+        # A pickle written after the compact export means the artifact is stale
+        if os.path.exists(pickle_path) and os.path.getmtime(pickle_path) > os.path.getmtime(manifest_path):
+            print(f"Warning: {name}.forest is older than {name}.pkl, loading the pickle instead")
+        else:
+            try:
+                model = load_compact_model(base_path)
+                print(f"Loaded {name}.forest (memory-mapped, {model.nbytes / 1024:.0f} KiB) from {model_dir}")
+                return model
+            except Exception as e:
+                print(f"Error loading {name}.forest, falling back to pickle: {e}")
+    
+    if os.path.exists(pickle_path):
+        with open(pickle_path, 'rb') as f:
+            model = pickle.load(f)
+        print(f"Loaded {name}.pkl from {model_dir}")
+        return model
+    
+    print(f"Warning: {name}.pkl not found in {model_dir}")
+    return None
 
 def load_ml_models():
-    """Load pre-trained ML models from ml_model folder"""
+    """Load the active registry version, falling back to the bootstrap models in the ml_model folder"""
     # Get the directory where this script is located (ml_model folder)
     script_dir = os.path.dirname(os.path.abspath(__file__))
     
-    risk_model_path = os.path.join(script_dir, 'risk_model.pkl')
-    category_model_path = os.path.join(script_dir, 'category_model.pkl')
-    risk_encoder_path = os.path.join(script_dir, 'risk_encoder.pkl')
-    
     try:
-        if os.path.exists(risk_model_path):
-            with open(risk_model_path, 'rb') as f:
-                ml_models['risk_model'] = pickle.load(f)
-            print(f"Loaded risk_model.pkl from {script_dir}")
-        else:
-            print(f"Warning: risk_model.pkl not found in {script_dir}")
-        
-        if os.path.exists(category_model_path):
-            with open(category_model_path, 'rb') as f:
-                ml_models['category_model'] = pickle.load(f)
-            print(f"Loaded category_model.pkl from {script_dir}")
-        else:
-            print(f"Warning: category_model.pkl not found in {script_dir}")
+        models = None
+        version = model_registry.active_version()
+        if version:
+            try:
+                manifest = model_registry.read_manifest(version)
+                models = load_model_bundle(model_registry.version_dir(version))
+                if models is not None:
+                    swap_model_bundle(models, version, manifest)
+                    print(f"Loaded model version {version} from {model_registry.root}")
+                else:
+                    print(f"Warning: active model version {version} is incomplete, using bootstrap models")
+            except ModelRegistryError as e:
+                print(f"Warning: {e}, using bootstrap models")
         
-        if os.path.exists(risk_encoder_path):
-            with open(risk_encoder_path, 'rb') as f:
-                ml_models['risk_encoder'] = pickle.load(f)
-            print(f"Loaded risk_encoder.pkl from {script_dir}")
-        else:
-            print(f"Warning: risk_encoder.pkl not found in {script_dir}")
+        if models is None:
+            models = load_model_bundle(script_dir)
+            if models is not None:
+                swap_model_bundle(models, None, None)
         
         if ml_models.get('risk_model') and ml_models.get('category_model') and ml_models.get('risk_encoder'):
-            # Validate feature counts match expected values
-            # Expected: 11 demographic + 118 responses (59 male + 59 female) + 6 personalized = 135 features
-            expected_feature_count = 135
-            
-            # Check risk model
-            risk_model = ml_models['risk_model']
-            risk_expected = None
-            if hasattr(risk_model, 'n_features_in_'):
-                risk_expected = risk_model.n_features_in_
-            elif hasattr(risk_model, 'n_features_'):
-                risk_expected = risk_model.n_features_
-            elif hasattr(risk_model, 'best_estimator_'):
-                if hasattr(risk_model.best_estimator_, 'n_features_in_'):
-                    risk_expected = risk_model.best_estimator_.n_features_in_
-                elif hasattr(risk_model.best_estimator_, 'n_features_'):
-                    risk_expected = risk_model.best_estimator_.n_features_
-            
-            # Check category model
-            category_model = ml_models['category_model']
-            category_expected = None
-            if hasattr(category_model, 'estimator'):
-                estimator = category_model.estimator
-                if hasattr(estimator, 'n_features_in_'):
-                    category_expected = estimator.n_features_in_
-                elif hasattr(estimator, 'n_features_'):
-                    category_expected = estimator.n_features_
-            elif hasattr(category_model, 'n_features_in_'):
-                category_expected = category_model.n_features_in_
-            elif hasattr(category_model, 'n_features_'):
-                category_expected = category_model.n_features_
+            # Validate feature counts against the current schema:
+            # demographic + responses (male + female per answerable question) + personalized
+            feature_check = check_models_match_schema()
+            expected_feature_count = feature_check['expected_features']
+            risk_expected = feature_check['risk_model_features']
+            category_expected = feature_check['category_model_features']
             
             # Warn if feature counts don't match
-            if risk_expected is not None and risk_expected != expected_feature_count:
+            if expected_feature_count is None:
+                print("Feature count validation skipped: question schema not loaded yet")
+            
+            if expected_feature_count is not None and risk_expected is not None and risk_expected != expected_feature_count:
                 print(f"⚠️  WARNING: Risk model expects {risk_expected} features, but current code generates {expected_feature_count} features!")
                 print(f"⚠️  The model needs to be retrained. Please use the 'Train Models' button in the dashboard.")
                 print(f"⚠️  Predictions will fail until the model is retrained with the correct feature count.")
             
-            if category_expected is not None and category_expected != expected_feature_count:
+            if expected_feature_count is not None and category_expected is not None and category_expected != expected_feature_count:
                 print(f"⚠️  WARNING: Category model expects {category_expected} features, but current code generates {expected_feature_count} features!")
                 print(f"⚠️  The model needs to be retrained. Please use the 'Train Models' button in the dashboard.")
                 print(f"⚠️  Predictions will fail until the model is retrained with the correct feature count.")
             
-            if (risk_expected is not None and risk_expected == expected_feature_count) and \
-               (category_expected is not None and category_expected == expected_feature_count):
+            if feature_check['match']:
                 print(f"✓ Feature count validation passed: Models expect {expected_feature_count} features (matches current code)")
             
             print("All ML models loaded successfully")
@@ -2081,52 +3372,39 @@ def generate_ml_recommendations(couple_profile, risk_level, category_scores):
     }
 
 
+def get_process_memory():
+    """Per-worker memory from /proc (Linux): RSS plus the shared/private split (KiB)"""
+    memory = {'pid': os.getpid(), 'preload': SERVICE_PRELOAD}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty'):
+                    memory[key.lower() + '_kib'] = int(value.split()[0])
+    except OSError:
+        pass
+    return memory
+
 @app.route('/status', methods=['GET'])
 def status():
     """Check service status"""
-    ml_trained = all(model is not None for model in ml_models.values())
-    
-    # Check feature count compatibility
-    expected_feature_count = 135  # 11 demographic + 118 responses + 6 personalized
-    feature_mismatch = False
-    risk_model_features = None
-    category_model_features = None
-    
-    if ml_models.get('risk_model'):
-        risk_model = ml_models['risk_model']
-        if hasattr(risk_model, 'n_features_in_'):
-            risk_model_features = risk_model.n_features_in_
-        elif hasattr(risk_model, 'n_features_'):
-            risk_model_features = risk_model.n_features_
-        elif hasattr(risk_model, 'best_estimator_'):
-            if hasattr(risk_model.best_estimator_, 'n_features_in_'):
-                risk_model_features = risk_model.best_estimator_.n_features_in_
-            elif hasattr(risk_model.best_estimator_, 'n_features_'):
-                risk_model_features = risk_model.best_estimator_.n_features_
-        
-        if risk_model_features is not None and risk_model_features != expected_feature_count:
-            feature_mismatch = True
-    
-    if ml_models.get('category_model'):
-        category_model = ml_models['category_model']
-        if hasattr(category_model, 'estimator'):
-            estimator = category_model.estimator
-            if hasattr(estimator, 'n_features_in_'):
-                category_model_features = estimator.n_features_in_
-            elif hasattr(estimator, 'n_features_'):
-                category_model_features = estimator.n_features_
-        elif hasattr(category_model, 'n_features_in_'):
-            category_model_features = category_model.n_features_in_
-        elif hasattr(category_model, 'n_features_'):
-            category_model_features = category_model.n_features_
-        
-        if category_model_features is not None and category_model_features != expected_feature_count:
-            feature_mismatch = True
+    models = ml_models
+    ml_trained = all(model is not None for model in models.values())
+    
+    # Check feature count compatibility with the current question schema
+    feature_check = check_models_match_schema(models)
+    expected_feature_count = feature_check['expected_features']
+    risk_model_features = feature_check['risk_model_features']
+    category_model_features = feature_check['category_model_features']
+    feature_mismatch = feature_check['match'] is False
     
     return jsonify({
         'status': 'success',
         'service': 'Counseling Topics Service',
         'ml_trained': ml_trained,
+        'model_version': get_model_version_info(),
+        'latency': get_latency_report(),
+        'process': get_process_memory(),
         'feature_validation': {
             'expected_features': expected_feature_count,
             'risk_model_features': int(risk_model_features) if risk_model_features is not None else None,
@@ -2136,126 +3414,712 @@ def status():
         }
     })
 
-def train_models_async():
+# ============================================================================
+# MODEL WARM-UP AND SERVING LATENCY
+# ============================================================================
+
+def build_warmup_payload(rng, index, schema=None):
+    """Synthetic /analyze payload shaped like a real couple for the given (default: current) schema"""
+    answerable_questions = len(resolve_schema(schema)[2])
+    civil_statuses = ['Single', 'Living In', 'Separated', 'Married']
+    return {
+        'couple_id': f'warmup-{index}',
+        'male_age': int(rng.integers(20, 60)),
+        'female_age': int(rng.integers(20, 60)),
+        'civil_status': civil_statuses[index % len(civil_statuses)],
+        'years_living_together': int(rng.integers(0, 10)),
+        'education_level': int(rng.integers(0, 5)),
+        'income_level': int(rng.integers(0, 5)),
+        'employment_status': 'Employed',
+        'male_responses': rng.choice([2, 3, 4], size=answerable_questions).tolist(),
+        'female_responses': rng.choice([2, 3, 4], size=answerable_questions).tolist()
+    }
+
+def warm_up_models(models, version=None, schema=None):
+    """Run synthetic couples through the full /analyze pipeline (features, both models, reasoning, NLG)
+    
+    Pays for first-call imports, lazy allocations and cold caches before the bundle takes
+    traffic. Returns cold (first request) vs warm (median of the rest) latency in ms.
+    A schema warms up a slot bundle for an older questionnaire instead of the active one.
+    """
+    if MODEL_WARMUP_REQUESTS <= 0 or not resolve_schema(schema)[2] or any(m is None for m in models.values()):
+        return None
+    
+    with service_state_lock:
+        if not service_state['initialized']:
+            service_state['phase'] = 'warming_up'
+    
+    rng = np.random.default_rng(0)
+    timings = []
+    errors = []
+    started = time.time()
+    for index in range(max(2, MODEL_WARMUP_REQUESTS)):
+        payload = build_warmup_payload(rng, index, schema)
+        request_started = time.perf_counter()
+        # The pipeline logs heavily; keep warm-up requests (only) out of the service log
+        _log_context.quiet = True
+        try:
+            with app.test_request_context('/analyze', method='POST', json=payload):
+                response = _analyze_request(models, schema)
+                if isinstance(response, tuple):
+                    response = response[0]
+                result = response.get_json(silent=True) or {}
+        finally:
+            _log_context.quiet = False
+        timings.append((time.perf_counter() - request_started) * 1000)
+        if result.get('status') != 'success':
+            errors.append(result.get('message', 'unknown error'))
+    
+    warm = sorted(timings[1:])
+    warmup = {
+        'version': version,
+        'requests': len(timings),
+        'cold_ms': round(timings[0], 2),
+        'warm_ms': round(warm[len(warm) // 2], 2),
+        'ok': not errors,
+        'error': errors[0] if errors else None
+    }
+    if schema is None:
+        _record_component('warmup', warmup['ok'], time.time() - started,
+                          **{key: value for key, value in warmup.items() if key != 'error'})
+    print(f"Warm-up ({version or 'bootstrap models'}): cold {warmup['cold_ms']} ms, "
+          f"warm {warmup['warm_ms']} ms over {warmup['requests']} synthetic requests"
+          + (f" - pipeline error: {warmup['error']}" if errors else ""))
+    return warmup
+
+def record_request_latency(models, elapsed_ms):
+    """Track /analyze latency for the bundle that served it"""
+    with serving_latency_lock:
+        if serving_latency['bundle_id'] != id(models):
+            return
+        serving_latency['requests'] += 1
+        serving_latency['last_ms'] = elapsed_ms
+        serving_latency['total_ms'] += elapsed_ms
+        if serving_latency['first_ms'] is None:
+            serving_latency['first_ms'] = elapsed_ms
+
+def get_latency_report():
+    """Warm-up cold vs warm latency plus live /analyze latency for the active bundle"""
+    with model_swap_lock:
+        active = model_versions['active']
+        warmup = dict(active['warmup']) if active and active.get('warmup') else None
+    with serving_latency_lock:
+        requests = serving_latency['requests']
+        live = {
+            'requests': requests,
+            'first_ms': round(serving_latency['first_ms'], 2) if serving_latency['first_ms'] is not None else None,
+            'last_ms': round(serving_latency['last_ms'], 2) if serving_latency['last_ms'] is not None else None,
+            'mean_ms': round(serving_latency['total_ms'] / requests, 2) if requests else None
+        }
+    return {
+        'warmup': warmup,
+        'cold_warm_gap_ms': round(warmup['cold_ms'] - warmup['warm_ms'], 2) if warmup else None,
+        'serving': live
+    }
+
+# ============================================================================
+# SHARED TRAINING STATUS AND MODEL WATCHER (cross-worker)
+# ============================================================================
+
+def acquire_training_lock():
+    """Take the cross-worker training lock without blocking; returns the lock file or None if held"""
+    if fcntl is None:
+        return None
+    lock_file = open(TRAINING_STATUS_PATH + '.lock', 'a+')
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+def release_training_lock(lock_file):
+    """Release the training lock (the kernel also releases it if the trainer dies)"""
+    if lock_file is None:
+        return
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    finally:
+        lock_file.close()
+
+def training_lock_held():
+    """True if some process (possibly this one) is training right now"""
+    if fcntl is None:
+        thread = training_status.get('thread')
+        return bool(thread and thread.is_alive())
+    lock_file = acquire_training_lock()
+    if lock_file is None:
+        return True
+    release_training_lock(lock_file)
+    return False
+
+def set_training_status(**fields):
+    """Update training status and publish the changed fields to the shared status file
+    
+    Read-modify-write: fields written by another process (the training process's memory estimate
+    and model progress, say) survive this process's updates instead of being overwritten by its
+    own, possibly stale, copy.
+    """
+    fields = {key: value for key, value in fields.items() if key not in ('thread', 'lock_file')}
+    with training_lock:
+        training_status.update(fields)
+        try:
+            with open(TRAINING_STATUS_PATH, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            snapshot = {key: value for key, value in training_status.items() if key not in ('thread', 'lock_file')}
+        snapshot.update(fields)
+        snapshot['pid'] = os.getpid()
+        snapshot['updated_at'] = time.time()
+        tmp_path = f'{TRAINING_STATUS_PATH}.tmp-{os.getpid()}'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, TRAINING_STATUS_PATH)
+        except OSError as e:
+            print(f"Warning: could not write training status file: {e}")
+
+def read_training_status():
+    """Training status as seen by any worker (shared file, else this process's copy)"""
+    try:
+        with open(TRAINING_STATUS_PATH, 'r', encoding='utf-8') as f:
+            shared = json.load(f)
+    except (OSError, ValueError):
+        with training_lock:
+            return {key: value for key, value in training_status.items() if key not in ('thread', 'lock_file')}
+    
+    # The trainer holds the lock for the whole run - if it's free, the trainer exited without finishing
+    if shared.get('in_progress') and not training_lock_held():
+        shared['in_progress'] = False
+        shared['message'] = 'Training stopped unexpectedly'
+        shared['error'] = f"Training process {shared.get('pid')} exited before completing"
+    return shared
+
+def sync_active_model_version():
+    """Load and swap in the registry's active version if another worker activated a different one"""
+    version = model_registry.active_version()
+    if not version or version == get_model_version_info()['active']:
+        return False
+    manifest = model_registry.read_manifest(version)
+    models = _get_loaded_version(version)
+    if models is None:
+        models = load_model_bundle(model_registry.version_dir(version))
+        if models is None:
+            raise ModelRegistryError(f"Model version {version} is incomplete")
+    swap_model_bundle(models, version, manifest)
+    print(f"Worker {os.getpid()}: switched to model version {version}")
+    return True
+
+def _watch_model_version():
+    """Poll the ACTIVE pointer's inode/mtime (one stat per interval) and hot-load new versions"""
+    last_seen = None
+    while True:
+        time.sleep(MODEL_WATCH_INTERVAL)
+        try:
+            st = os.stat(model_registry.pointer_path())
+            marker = (st.st_ino, st.st_mtime_ns)
+        except OSError:
+            continue
+        if marker == last_seen:
+            continue
+        try:
+            sync_active_model_version()
+            last_seen = marker
+        except Exception as e:
+            # Retried on the next tick since last_seen is unchanged
+            print(f"Warning: could not load the active model version: {e}")
+
+def start_model_watcher():
+    """Start this process's model-version watcher thread (one per worker)"""
+    with service_state_lock:
+        thread = service_state.get('watcher')
+        if thread and thread.is_alive():
+            return thread
+        thread = threading.Thread(target=_watch_model_version, name='model-watcher', daemon=True)
+        service_state['watcher'] = thread
+    thread.start()
+    return thread
+
+def train_models_async(lock_file=None, force_retune=False, incremental=False):
     """Train ML models in background thread"""
     import sys
     import traceback
     
-    with training_lock:
-        training_status['in_progress'] = True
-        training_status['progress'] = 0
-        training_status['message'] = 'Starting training...'
-        training_status['error'] = None
-    
     try:
         sys.stdout.flush()
         sys.stderr.flush()
         
-        with training_lock:
-            training_status['progress'] = 10
-            training_status['message'] = 'Loading data and preparing features...'
+        set_training_status(progress=10, message='Loading data and preparing features...')
         
-        success = train_ml_models()
+        success = train_ml_models(force_retune=force_retune, incremental=incremental)
         
         sys.stdout.flush()
         sys.stderr.flush()
         
-        with training_lock:
-            if success:
-                training_status['in_progress'] = False
-                training_status['progress'] = 100
-                training_status['message'] = 'Training completed successfully!'
-            else:
-                training_status['in_progress'] = False
-                training_status['progress'] = 0
-                training_status['message'] = 'Training failed'
-                training_status['error'] = 'Training failed - check server logs for details'
+        if success:
+            # Newly trained models are in memory - let /ready and /analyze pick them up
+            update_readiness()
+            set_training_status(in_progress=False, progress=100, message='Training completed successfully!')
+        else:
+            set_training_status(in_progress=False, progress=0, message='Training failed',
+                                error='Training failed - check server logs for details')
+    except TrainingCancelled:
+        print("Training cancelled")
+        set_training_status(in_progress=False, progress=0, message='Training cancelled', error=None,
+                            cancelled=True)
     except Exception as e:
         error_trace = traceback.format_exc()
         print(f"Training error: {error_trace}", file=sys.stderr)
         sys.stderr.flush()
         
+        set_training_status(in_progress=False, progress=0, message='Training error occurred', error=str(e))
+    finally:
+        remove_training_memmaps()
+        clear_training_cancel()
+        release_training_lock(lock_file)
+        with training_lock:
+            training_status['lock_file'] = None
+
+# ============================================================================
+# TRAINING CANCELLATION (POST /train/cancel, from any worker)
+# ============================================================================
+
+class TrainingCancelled(BaseException):
+    """Raised at a safe point, or by SIGTERM in the training process, once the run was cancelled
+    (a BaseException, like KeyboardInterrupt, so scikit-learn's per-fit error handling can't swallow it)"""
+
+training_cancel_event = threading.Event()  # SIGTERM received (training process only)
+training_cancel_deferred = threading.Event()  # Set while publishing, which SIGTERM must not interrupt
+
+def training_cancel_path():
+    return TRAINING_STATUS_PATH + '.cancel'
+
+def request_training_cancel():
+    """Leave a cancel marker that every worker and the training process can see"""
+    with open(training_cancel_path(), 'w', encoding='utf-8') as f:
+        json.dump({'requested_at': time.time(), 'requested_by': os.getpid()}, f)
+
+def training_cancel_requested():
+    return training_cancel_event.is_set() or os.path.exists(training_cancel_path())
+
+def clear_training_cancel():
+    try:
+        os.remove(training_cancel_path())
+    except FileNotFoundError:
+        pass
+
+def check_training_cancelled():
+    """Safe point between training stages: stop here if the run was cancelled"""
+    if training_cancel_requested():
+        raise TrainingCancelled('Training cancelled on request')
+
+def _handle_training_sigterm(signum, frame):
+    # Unwind the training process from wherever it is, so its finally blocks remove the memmaps
+    training_cancel_event.set()
+    if not training_cancel_deferred.is_set():
+        raise TrainingCancelled('Training cancelled on request')
+
+def terminate_training_process(pid, grace=None):
+    """SIGTERM the training process group, then SIGKILL whatever is still running after grace seconds"""
+    grace = TRAINING_CANCEL_GRACE if grace is None else grace
+    try:
+        if os.getpgid(pid) != pid:
+            # Not the group the training process created - never signal a serving worker's group
+            print(f"Process {pid} does not lead its own process group - not signalling it")
+            return False
+        os.killpg(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return True
+    deadline = time.time() + grace
+    while time.time() < deadline:
+        time.sleep(0.2)
+        try:
+            os.killpg(pid, 0)
+        except ProcessLookupError:
+            print(f"Training process group {pid} stopped")
+            return True
+    print(f"Training process group {pid} still running after {grace:.0f}s - sending SIGKILL")
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    return True
+
+# ============================================================================
+# TRAINING PROCESS (spawned child; reports through the shared status file and the registry)
+# ============================================================================
+
+def in_training_process():
+    return multiprocessing.current_process().name == TRAINING_PROCESS_NAME
+
+def training_memory_limit_mb():
+    """Per-process address-space cap: TRAINING_MEMORY_LIMIT_MB, else the container's memory limit"""
+    if TRAINING_MEMORY_LIMIT_MB >= 0:
+        return TRAINING_MEMORY_LIMIT_MB
+    container = container_memory_mb()
+    return int(container[0]) if container is not None else 0
+
+def apply_training_memory_limit(limit_mb=None):
+    """Cap this process's address space so a runaway allocation fails with MemoryError instead of
+    pushing the dyno into swap or the OOM killer (per process - loky workers inherit their own cap)"""
+    limit_mb = training_memory_limit_mb() if limit_mb is None else limit_mb
+    if resource is None or limit_mb <= 0:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = limit_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    print(f"Training process memory limit: {limit // (1024 * 1024)} MB")
+
+def _exit_with_parent(parent_pid):
+    """Stop training if the worker that started it dies - it holds the training lock"""
+    while True:
+        time.sleep(1)
+        if os.getppid() != parent_pid:
+            print(f"Training process {os.getpid()}: parent worker {parent_pid} exited, stopping")
+            os._exit(1)
+
+def _watch_training_memory():
+    """Hold the whole run (this process group) to the memory budget: stop it once its PSS exceeds it"""
+    pgid = os.getpgid(0)
+    while True:
+        time.sleep(TRAINING_MEMORY_WATCH_INTERVAL)
+        budget = training_memory_plan.get('budget_mb')  # Known once plan_training_memory ran
+        if not budget:
+            continue
+        used = process_group_pss_mb(pgid)
+        if used > budget:
+            print(f"Training process group {pgid} uses {used:.0f} MB, over the {budget:.0f} MB budget - stopping it")
+            set_training_status(error=f'Training used {used:.0f} MB across its processes, over the '
+                                      f'{budget:.0f} MB memory budget (TRAINING_MEMORY_BUDGET_MB)')
+            os.killpg(pgid, signal.SIGTERM)
+            return
+
+def run_training_process(status, force_retune, incremental, parent_pid):
+    """Entry point of the spawned training process (exit code 0 = new version published and active)"""
+    import sys
+    import traceback
+    
+    # Carry on the run's status fields so progress updates don't reset them in the shared file
+    with training_lock:
+        training_status.update(status)
+    threading.Thread(target=_exit_with_parent, args=(parent_pid,), daemon=True).start()
+    # Lead a process group of our own: /train/cancel signals it, which reaches the loky workers too
+    if hasattr(os, 'setsid'):
+        os.setsid()
+    signal.signal(signal.SIGTERM, _handle_training_sigterm)
+    set_training_status(training_pid=os.getpid())
+    apply_training_memory_limit()
+    if hasattr(os, 'setsid'):
+        threading.Thread(target=_watch_training_memory, daemon=True).start()
+    apply_training_cpu_policy()
+    
+    # Start from the snapshot; train_ml_models confirms the schema against the database
+    load_schema_snapshot()
+    try:
+        success = train_ml_models(force_retune=force_retune, incremental=incremental)
+    except TrainingCancelled:
+        print(f"Training process {os.getpid()}: stopped by SIGTERM or a cancel request")
+        sys.exit(TRAINING_CANCELLED_EXIT)
+    except MemoryError:
+        print(f"Training error: {traceback.format_exc()}", file=sys.stderr)
+        set_training_status(error=f'Training ran out of memory (per-process limit {training_memory_limit_mb()} MB)')
+        sys.exit(1)
+    except Exception as e:
+        print(f"Training error: {traceback.format_exc()}", file=sys.stderr)
+        set_training_status(error=str(e))
+        sys.exit(1)
+    finally:
+        remove_training_memmaps()
+        sys.stdout.flush()
+        sys.stderr.flush()
+    if not success:
+        set_training_status(error='Training failed - check server logs for details')
+        sys.exit(1)
+
+def train_models_in_process(lock_file=None, force_retune=False, incremental=False):
+    """Run training in a spawned child process and wait for it (body of the /train monitor thread)"""
+    import sys
+    import traceback
+    
+    try:
+        set_training_status(progress=10, message='Starting training process...')
         with training_lock:
-            training_status['in_progress'] = False
-            training_status['progress'] = 0
-            training_status['message'] = 'Training error occurred'
-            training_status['error'] = str(e)
+            status = {key: value for key, value in training_status.items() if key not in ('thread', 'lock_file')}
+        
+        # spawn, not fork: the child starts from a clean interpreter instead of a copy of this
+        # worker's threads, locks and loaded models
+        context = multiprocessing.get_context('spawn')
+        process = context.Process(target=run_training_process, name=TRAINING_PROCESS_NAME,
+                                  args=(status, force_retune, incremental, os.getpid()))
+        process.start()
+        set_training_status(training_pid=process.pid)
+        print(f"Training process {process.pid} started")
+        process.join()
+        
+        if process.exitcode == 0:
+            # The child activated the new version in the registry - load it here now rather than
+            # waiting for the model watcher
+            sync_active_model_version()
+            update_readiness()
+            set_training_status(in_progress=False, progress=100, message='Training completed successfully!',
+                                error=None)
+        elif training_cancel_requested():
+            print(f"Training process {process.pid} cancelled (exit code {process.exitcode})")
+            set_training_status(in_progress=False, progress=0, message='Training cancelled', error=None,
+                                cancelled=True)
+        else:
+            error = read_training_status().get('error')
+            if not error and process.exitcode < 0:
+                # Native code that can't allocate under RLIMIT_AS tends to crash rather than raise MemoryError
+                error = f'Training process was killed by signal {-process.exitcode}'
+                if training_memory_limit_mb() > 0:
+                    error += f' (per-process memory limit {training_memory_limit_mb()} MB)'
+            elif not error:
+                error = f'Training process exited with code {process.exitcode}'
+            set_training_status(in_progress=False, progress=0, message='Training failed', error=error)
+    except Exception as e:
+        print(f"Training error: {traceback.format_exc()}", file=sys.stderr)
+        sys.stderr.flush()
+        set_training_status(in_progress=False, progress=0, message='Training error occurred', error=str(e))
+    finally:
+        clear_training_cancel()
+        release_training_lock(lock_file)
+        with training_lock:
+            training_status['lock_file'] = None
 
 @app.route('/train', methods=['POST'])
 def train():
     """Start training ML models asynchronously"""
+    # {"force_retune": true} re-runs the hyperparameter search even if cached params would apply;
+    # {"incremental": true} rotates new trees into the active forests instead of rebuilding them;
+    # {"resume": false} discards stage checkpoints left by an interrupted run instead of resuming from them.
+    # Validated before the lock is taken, so a bad body can't leave training marked in progress
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        return jsonify({
+            'status': 'error',
+            'message': 'Request body must be a JSON object, e.g. {"force_retune": true}.'
+        }), 400
+    force_retune = bool(data.get('force_retune', False))
+    incremental = bool(data.get('incremental', False))
+    resume = bool(data.get('resume', True))
+    
+    # Only one worker may train at a time - the lock file is shared by every gunicorn worker
+    lock_file = acquire_training_lock()
     with training_lock:
-        # Check if training is actually running (thread alive check)
-        if training_status['in_progress']:
-            thread = training_status.get('thread')
-            if thread and thread.is_alive():
-                return jsonify({
-                    'status': 'error',
-                    'message': 'Training is already in progress. Please wait for it to complete.'
-                }), 400
-            else:
-                # Thread is dead but status says in_progress - reset it
-                print("Warning: Training status was stuck, resetting...")
-                training_status['in_progress'] = False
-                training_status['progress'] = 0
-                training_status['message'] = ''
-                training_status['error'] = None
-                training_status['thread'] = None
-        
+        thread = training_status.get('thread')
+        busy = (fcntl is not None and lock_file is None) or (thread is not None and thread.is_alive())
+    if busy:
+        release_training_lock(lock_file)
+        return jsonify({
+            'status': 'error',
+            'message': 'Training is already in progress. Please wait for it to complete.'
+        }), 400
+    
+    try:
         # Reset status
-        training_status['in_progress'] = True
-        training_status['progress'] = 0
-        training_status['message'] = 'Starting training...'
-        training_status['error'] = None
-        
-        # Start training in background thread
-        thread = threading.Thread(target=train_models_async, daemon=True)
-        training_status['thread'] = thread
+        set_training_status(in_progress=True, progress=0, message='Starting training...', error=None,
+                            memory_estimate=None, model_progress=None, training_pid=None, cancelled=False,
+                            started_at=time.time())
+        clear_training_cancel()  # A marker left by a worker that died mid-cancel must not stop this run
+        if not resume:
+            clear_training_checkpoints()
+        
+        # Start training in a child process (watched by a background thread) or in the thread itself
+        target = train_models_in_process if TRAINING_EXECUTION == 'process' else train_models_async
+        thread = threading.Thread(target=target, args=(lock_file, force_retune, incremental), daemon=True)
+        with training_lock:
+            training_status['thread'] = thread
+            training_status['lock_file'] = lock_file
         thread.start()
-        
+    except Exception as e:
+        # Nothing is training - give the lock back and don't leave the status stuck in progress
+        print(f"Error starting training: {e}")
+        with training_lock:
+            training_status['thread'] = None
+            training_status['lock_file'] = None
+        set_training_status(in_progress=False, progress=0, message='Training failed to start', error=str(e))
+        release_training_lock(lock_file)
         return jsonify({
-            'status': 'success',
-            'message': 'Training started in background',
-            'training_started': True
-        })
+            'status': 'error',
+            'message': f'Could not start training: {e}'
+        }), 500
+    
+    return jsonify({
+        'status': 'success',
+        'message': 'Training started in background',
+        'training_started': True,
+        'force_retune': force_retune,
+        'incremental': incremental
+    })
+
+@app.route('/train/cancel', methods=['POST'])
+def cancel_training():
+    """Cancel the running training: it stops at its next safe point and, when it runs in a training
+    process, that process and its loky workers are terminated"""
+    status = read_training_status()
+    if not status.get('in_progress'):
+        return jsonify({
+            'status': 'error',
+            'message': 'No training is in progress.'
+        }), 400
+    
+    request_training_cancel()
+    pid = status.get('training_pid')
+    terminating = TRAINING_EXECUTION == 'process' and bool(pid) and pid != os.getpid()
+    if terminating:
+        threading.Thread(target=terminate_training_process, args=(pid,), daemon=True).start()
+    print(f"Training cancellation requested (training process {pid})")
+    
+    return jsonify({
+        'status': 'success',
+        'message': 'Training cancellation requested',
+        'training_pid': pid,
+        'terminating': terminating,
+        'kill_after_seconds': TRAINING_CANCEL_GRACE if terminating else None
+    }), 202
 
 @app.route('/training_status', methods=['GET'])
 def get_training_status():
-    """Get current training status"""
-    with training_lock:
-        return jsonify({
-            'status': 'success',
-            'in_progress': training_status['in_progress'],
-            'progress': training_status['progress'],
-            'message': training_status['message'],
-            'error': training_status['error']
+    """Get current training status (shared across workers)"""
+    status = read_training_status()
+    return jsonify({
+        'status': 'success',
+        'in_progress': status.get('in_progress', False),
+        'progress': status.get('progress', 0),
+        'message': status.get('message', ''),
+        'error': status.get('error'),
+        'worker_pid': status.get('pid'),
+        'memory_estimate': status.get('memory_estimate'),
+        'model_progress': status.get('model_progress'),
+        'cancelled': status.get('cancelled', False),
+        'started_at': status.get('started_at'),
+        'updated_at': status.get('updated_at')
+    })
+
+@app.route('/models', methods=['GET'])
+def list_models():
+    """List registry versions with their manifests and which ones are active/previous"""
+    versions = []
+    for manifest in model_registry.list_versions():
+        versions.append({
+            'version': manifest.get('version'),
+            'created_at': manifest.get('created_at'),
+            'train_seconds': manifest.get('train_seconds'),
+            'schema_hash': manifest.get('schema_hash'),
+            'features': (manifest.get('feature_layout') or {}).get('total'),
+            'metrics': manifest.get('metrics'),
+            'size_bytes': manifest.get('size_bytes')
         })
+    
+    return jsonify({
+        'status': 'success',
+        'loaded': get_model_version_info(),
+        'pointer': model_registry.read_pointer(),
+        'current_schema_hash': compute_schema_hash(),
+        'slots': get_model_slots_info(),
+        'versions': versions
+    })
+
+@app.route('/models/activate', methods=['POST'])
+def activate_model():
+    """Activate a specific registry version"""
+    data = request.get_json(silent=True) or {}
+    version = data.get('version')
+    if not version:
+        return jsonify({'status': 'error', 'message': 'version is required'}), 400
+    
+    try:
+        activate_model_version(version)
+    except ModelRegistryError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except Exception as e:
+        print(f"Error activating model version {version}: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+    
+    return jsonify({'status': 'success', 'message': f'Activated model version {version}',
+                    'model_version': get_model_version_info()})
+
+@app.route('/models/rollback', methods=['POST'])
+def rollback_model():
+    """Roll back to the previously active model version"""
+    try:
+        version = rollback_model_version()
+    except ModelRegistryError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    except Exception as e:
+        print(f"Error rolling back model version: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+    
+    return jsonify({'status': 'success', 'message': f'Rolled back to model version {version}',
+                    'model_version': get_model_version_info()})
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
     """Analyze couple and generate recommendations"""
+    # Only take analysis traffic once schema and models are loaded
+    with service_state_lock:
+        is_ready = service_state['ready']
+        phase = service_state['phase']
+    if not is_ready:
+        message = ('Service is still starting up (schema and models are loading). Please retry shortly.'
+                   if phase != 'models_missing' else
+                   'ML models are not loaded. Train or load models first.')
+        response = jsonify({
+            'status': 'error',
+            'message': message,
+            'phase': phase
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    # CRITICAL: Ensure questions are loaded before analysis (refresh runs in the background)
+    if schema_needs_refresh():
+        print("WARNING - MEAI schema missing or fallback only, requesting background reload...")
+        request_schema_reload()
+    
+    # Submissions answered on an older questionnaire carry its schema hash and are scored by
+    # the model set trained on that schema
+    data = request.get_json(silent=True) or {}
+    requested_schema = data.get('schema_hash')
+    schema = None
+    if requested_schema and requested_schema != compute_schema_hash():
+        try:
+            models, schema = get_model_slot(requested_schema)
+        except ModelRegistryError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e),
+                'schema_hash': requested_schema
+            }), 404
+    else:
+        # One reference for the whole request - a concurrent activation or rollback swaps the
+        # global bundle, but this request keeps using a consistent set of models
+        models = ml_models
+    started = time.perf_counter()
+    response = _analyze_request(models, schema)
+    record_request_latency(models, (time.perf_counter() - started) * 1000)
+    return response
+
+def _analyze_request(models, schema=None):
+    """Full analysis pipeline for the current request's JSON payload using one model bundle"""
+    schema_categories, schema_questions, question_mapping = resolve_schema(schema)
     try:
-        # CRITICAL: Ensure questions are loaded before analysis
-        global MEAI_QUESTIONS, MEAI_QUESTION_MAPPING, MEAI_CATEGORIES
-        if not MEAI_QUESTIONS or len(MEAI_QUESTIONS) == 0:
-            print("WARNING - MEAI_QUESTIONS not loaded, attempting to load...")
-            if not MEAI_CATEGORIES or len(MEAI_CATEGORIES) == 0:
-                load_categories_from_db()
-            load_questions_from_db()
-            print(f"Loaded {len(MEAI_QUESTIONS)} categories with questions")
-            print(f"MEAI_QUESTION_MAPPING has {len(MEAI_QUESTION_MAPPING) if MEAI_QUESTION_MAPPING else 0} items")
-        
         data = request.get_json()
         
         # CRITICAL DEBUG: Log raw received data structure
         if data:
-            print(f"DEBUG - Raw data keys received: {list(data.keys())}")
-            print(f"DEBUG - Raw data has 'male_responses' key: {'male_responses' in data}")
-            print(f"DEBUG - Raw data has 'female_responses' key: {'female_responses' in data}")
+            log(f"DEBUG - Raw data keys received: {list(data.keys())}")
+            log(f"DEBUG - Raw data has 'male_responses' key: {'male_responses' in data}")
+            log(f"DEBUG - Raw data has 'female_responses' key: {'female_responses' in data}")
             if 'male_responses' in data:
-                print(f"DEBUG - Raw male_responses value type: {type(data['male_responses'])}, length: {len(data['male_responses']) if isinstance(data['male_responses'], (list, tuple)) else 'N/A'}")
+                log(f"DEBUG - Raw male_responses value type: {type(data['male_responses'])}, length: {len(data['male_responses']) if isinstance(data['male_responses'], (list, tuple)) else 'N/A'}")
             if 'female_responses' in data:
-                print(f"DEBUG - Raw female_responses value type: {type(data['female_responses'])}, length: {len(data['female_responses']) if isinstance(data['female_responses'], (list, tuple)) else 'N/A'}")
+                log(f"DEBUG - Raw female_responses value type: {type(data['female_responses'])}, length: {len(data['female_responses']) if isinstance(data['female_responses'], (list, tuple)) else 'N/A'}")
         
         # Extract couple profile with conditional field handling
         couple_profile = {
@@ -2274,7 +4138,7 @@ def analyze():
             couple_profile['years_living_together'] = 0
         
         # Extract questionnaire responses (dynamic count based on actual questions)
-        total_questions = len(MEAI_QUESTION_MAPPING) if MEAI_QUESTION_MAPPING else 31  # Fallback to 31
+        total_questions = len(question_mapping) if question_mapping else 31  # Fallback to 31
         questionnaire_responses = data.get('questionnaire_responses', [3] * total_questions)
         
         # PERSONALIZED FEATURES: Extract relationship dynamics
@@ -2283,26 +4147,26 @@ def analyze():
         female_responses = data.get('female_responses', [])
         
         # CRITICAL DEBUG: Check what we actually received
-        print(f"DEBUG - Received data keys: {list(data.keys())}")
-        print(f"DEBUG - male_responses type: {type(male_responses)}, length: {len(male_responses) if isinstance(male_responses, (list, tuple)) else 'N/A'}")
-        print(f"DEBUG - female_responses type: {type(female_responses)}, length: {len(female_responses) if isinstance(female_responses, (list, tuple)) else 'N/A'}")
+        log(f"DEBUG - Received data keys: {list(data.keys())}")
+        log(f"DEBUG - male_responses type: {type(male_responses)}, length: {len(male_responses) if isinstance(male_responses, (list, tuple)) else 'N/A'}")
+        log(f"DEBUG - female_responses type: {type(female_responses)}, length: {len(female_responses) if isinstance(female_responses, (list, tuple)) else 'N/A'}")
         
         # DEBUG: Log what we received
-        print(f"DEBUG - Received male_responses: {len(male_responses) if male_responses else 0} items")
-        print(f"DEBUG - Received female_responses: {len(female_responses) if female_responses else 0} items")
-        print(f"DEBUG - Received questionnaire_responses: {len(questionnaire_responses) if questionnaire_responses else 0} items")
+        log(f"DEBUG - Received male_responses: {len(male_responses) if male_responses else 0} items")
+        log(f"DEBUG - Received female_responses: {len(female_responses) if female_responses else 0} items")
+        log(f"DEBUG - Received questionnaire_responses: {len(questionnaire_responses) if questionnaire_responses else 0} items")
         
         # CRITICAL: REQUIRE male_responses and female_responses from respondent field
         # These MUST come from the couple_responses table with respondent='male' or 'female'
         if not male_responses or len(male_responses) == 0:
-            print(f"ERROR - male_responses is empty or None. Type: {type(male_responses)}, Value: {male_responses}")
+            log(f"ERROR - male_responses is empty or None. Type: {type(male_responses)}, Value: {male_responses}")
             return jsonify({
                 'status': 'error',
                 'message': 'male_responses is required and must not be empty. Data must come from couple_responses table with respondent="male".'
             }), 400
             
         if not female_responses or len(female_responses) == 0:
-            print(f"ERROR - female_responses is empty or None. Type: {type(female_responses)}, Value: {female_responses}")
+            log(f"ERROR - female_responses is empty or None. Type: {type(female_responses)}, Value: {female_responses}")
             return jsonify({
                 'status': 'error',
                 'message': 'female_responses is required and must not be empty. Data must come from couple_responses table with respondent="female".'
@@ -2322,61 +4186,61 @@ def analyze():
             }), 400
         
         # Validate that arrays have the expected length (should be 59)
-        # Calculate expected count from MEAI_QUESTIONS structure (more reliable)
+        # Calculate expected count from schema_questions structure (more reliable)
         expected_count = None
-        if MEAI_QUESTIONS and len(MEAI_QUESTIONS) > 0:
+        if schema_questions and len(schema_questions) > 0:
             # Calculate from actual question structure
             expected_count = 0
-            for cat_questions in MEAI_QUESTIONS.values():
+            for cat_questions in schema_questions.values():
                 for q_data in cat_questions.values():
                     if q_data.get('sub_questions'):
                         expected_count += len(q_data['sub_questions'])
                     else:
                         expected_count += 1
-            print(f"DEBUG - Calculated expected_count from MEAI_QUESTIONS: {expected_count}")
+            log(f"DEBUG - Calculated expected_count from schema_questions: {expected_count}")
         
-        # Fallback to MEAI_QUESTION_MAPPING if available and reasonable
+        # Fallback to question_mapping if available and reasonable
         if expected_count is None or expected_count < 10:
-            if MEAI_QUESTION_MAPPING and len(MEAI_QUESTION_MAPPING) >= 50:
-                expected_count = len(MEAI_QUESTION_MAPPING)
-                print(f"DEBUG - Using MEAI_QUESTION_MAPPING count: {expected_count}")
+            if question_mapping and len(question_mapping) >= 50:
+                expected_count = len(question_mapping)
+                log(f"DEBUG - Using question_mapping count: {expected_count}")
             else:
                 # Final fallback: use 59 (known correct count) or actual data length if reasonable
                 if len(male_responses) == 59 or len(female_responses) == 59:
                     expected_count = 59
-                    print(f"DEBUG - Using known correct count: 59")
+                    log(f"DEBUG - Using known correct count: 59")
                 else:
                     # Use the actual data length if it's reasonable (between 50-70)
                     if 50 <= len(male_responses) <= 70:
                         expected_count = len(male_responses)
-                        print(f"DEBUG - Using actual data length as expected_count: {expected_count}")
+                        log(f"DEBUG - Using actual data length as expected_count: {expected_count}")
                     else:
                         expected_count = 59  # Default fallback
-                        print(f"WARNING - Using default expected_count: {expected_count}")
+                        log(f"WARNING - Using default expected_count: {expected_count}")
         
         # Only validate if we have a reasonable expected_count
         if expected_count and expected_count >= 50:
             if len(male_responses) != expected_count:
-                print(f"ERROR - male_responses length ({len(male_responses)}) does not match expected ({expected_count})")
-                print(f"ERROR - MEAI_QUESTION_MAPPING has {len(MEAI_QUESTION_MAPPING) if MEAI_QUESTION_MAPPING else 0} items")
-                print(f"ERROR - MEAI_QUESTIONS has {len(MEAI_QUESTIONS) if MEAI_QUESTIONS else 0} categories")
+                log(f"ERROR - male_responses length ({len(male_responses)}) does not match expected ({expected_count})")
+                log(f"ERROR - question_mapping has {len(question_mapping) if question_mapping else 0} items")
+                log(f"ERROR - schema_questions has {len(schema_questions) if schema_questions else 0} categories")
                 return jsonify({
                     'status': 'error',
                     'message': f'male_responses must have {expected_count} items (one per answerable question), got {len(male_responses)}'
                 }), 400
                 
             if len(female_responses) != expected_count:
-                print(f"ERROR - female_responses length ({len(female_responses)}) does not match expected ({expected_count})")
-                print(f"ERROR - MEAI_QUESTION_MAPPING has {len(MEAI_QUESTION_MAPPING) if MEAI_QUESTION_MAPPING else 0} items")
-                print(f"ERROR - MEAI_QUESTIONS has {len(MEAI_QUESTIONS) if MEAI_QUESTIONS else 0} categories")
+                log(f"ERROR - female_responses length ({len(female_responses)}) does not match expected ({expected_count})")
+                log(f"ERROR - question_mapping has {len(question_mapping) if question_mapping else 0} items")
+                log(f"ERROR - schema_questions has {len(schema_questions) if schema_questions else 0} categories")
                 return jsonify({
                     'status': 'error',
                     'message': f'female_responses must have {expected_count} items (one per answerable question), got {len(female_responses)}'
                 }), 400
         else:
             # If expected_count is not reliable, just check that arrays match each other
-            print(f"WARNING - Could not determine reliable expected_count ({expected_count}), skipping length validation")
-            print(f"WARNING - male_responses: {len(male_responses)}, female_responses: {len(female_responses)}")
+            log(f"WARNING - Could not determine reliable expected_count ({expected_count}), skipping length validation")
+            log(f"WARNING - male_responses: {len(male_responses)}, female_responses: {len(female_responses)}")
         
         # Validate that arrays match each other in length
         if len(male_responses) != len(female_responses):
@@ -2387,36 +4251,37 @@ def analyze():
         
         # CRITICAL: Verify arrays are not all zeros or all the same value (data quality check)
         if all(r == 0 for r in male_responses) or all(r == male_responses[0] for r in male_responses if len(male_responses) > 0):
-            print(f"WARNING - male_responses appears to have low variance (all values are {male_responses[0] if len(male_responses) > 0 else 'N/A'})")
+            log(f"WARNING - male_responses appears to have low variance (all values are {male_responses[0] if len(male_responses) > 0 else 'N/A'})")
         if all(r == 0 for r in female_responses) or all(r == female_responses[0] for r in female_responses if len(female_responses) > 0):
-            print(f"WARNING - female_responses appears to have low variance (all values are {female_responses[0] if len(female_responses) > 0 else 'N/A'})")
+            log(f"WARNING - female_responses appears to have low variance (all values are {female_responses[0] if len(female_responses) > 0 else 'N/A'})")
         
-        print(f"DEBUG - Validation passed: male_responses={len(male_responses)} items, female_responses={len(female_responses)} items")
+        log(f"DEBUG - Validation passed: male_responses={len(male_responses)} items, female_responses={len(female_responses)} items")
         
         # Calculate actual expected count for debugging
-        if MEAI_QUESTIONS:
+        if schema_questions:
             actual_expected = 0
-            for cat_questions in MEAI_QUESTIONS.values():
+            for cat_questions in schema_questions.values():
                 for q_data in cat_questions.values():
                     if q_data.get('sub_questions'):
                         actual_expected += len(q_data['sub_questions'])
                     else:
                         actual_expected += 1
-            print(f"DEBUG - MEAI_QUESTIONS loaded: {len(MEAI_QUESTIONS)} categories, {actual_expected} answerable questions")
+            log(f"DEBUG - schema_questions loaded: {len(schema_questions)} categories, {actual_expected} answerable questions")
         else:
-            print(f"DEBUG - MEAI_QUESTIONS not loaded!")
-        print(f"DEBUG - MEAI_QUESTION_MAPPING size: {len(MEAI_QUESTION_MAPPING)}")
+            log(f"DEBUG - schema_questions not loaded!")
+        log(f"DEBUG - question_mapping size: {len(question_mapping)}")
         
         # If personalized features are not provided, calculate them
         if not personalized_features or len(personalized_features) == 0:
-            personalized_features = calculate_personalized_features_flask(questionnaire_responses, male_responses, female_responses)
+            personalized_features = calculate_personalized_features_flask(questionnaire_responses, male_responses, female_responses, schema=schema)
         
         # Validate input data before prediction
         validation_result = validate_couple_data(
             couple_profile, 
             questionnaire_responses, 
             male_responses, 
-            female_responses
+            female_responses,
+            schema=schema
         )
         
         if not validation_result['valid']:
@@ -2426,160 +4291,89 @@ def analyze():
             })
         
         if validation_result['warnings']:
-            print("WARNINGS during data validation:")
+            log("WARNINGS during data validation:")
             for warning in validation_result['warnings']:
-                print(f"  - {warning}")
-        
-        # NEW: Calculate age gap
-        age_gap = abs(couple_profile['male_age'] - couple_profile['female_age'])
-        
-        # NEW: Calculate education/income compatibility
-        education_income_diff = abs(couple_profile['education_level'] - couple_profile['income_level'])
-        
-        # NEW: Civil status encoding (one-hot: 3 features)
-        civil_status = couple_profile.get('civil_status', 'Single')
-        is_single = 1 if civil_status == 'Single' else 0
-        is_living_in = 1 if civil_status == 'Living In' else 0
-        is_separated_divorced = 1 if civil_status in ['Separated', 'Divorced', 'Widowed'] else 0
-        
-        # NEW: Encode employment status (use male partner's employment status)
-        # Employed=1, Self-employed=2, Unemployed=0
-        employment_status = couple_profile.get('employment_status', 'Unemployed')
-        if employment_status == 'Employed':
-            employment_encoded = 1
-        elif employment_status == 'Self-employed':
-            employment_encoded = 2
-        else:  # Unemployed or unknown
-            employment_encoded = 0
-        
-        # Prepare features for ML models
-        # FEATURE BREAKDOWN (Total: 135 features):
+                log(f"  - {warning}")
+        
+        # Prepare features for ML models (layout defined once in feature_builder.py)
+        # FEATURE BREAKDOWN (Total: 11 + 2 x answerable questions + 6, i.e. 135 for the 59-question MEAI):
         #   1. Demographic features: 11
         #      - male_age, female_age, age_gap, years_living_together
         #      - education_level, income_level, education_income_diff
         #      - is_single, is_living_in, is_separated_divorced, employment_encoded
-        #   2. Questionnaire responses: 118 (59 male + 59 female)
-        #      - male_responses: 59 features (from respondent='male' in couple_responses)
-        #      - female_responses: 59 features (from respondent='female' in couple_responses)
+        #   2. Questionnaire responses: one per answerable question of the model's schema, per partner
+        #      - male_responses (from respondent='male' in couple_responses)
+        #      - female_responses (from respondent='female' in couple_responses)
         #   3. Personalized features: 6
         #      - alignment_score, conflict_ratio
         #      - category_alignments: 4 features (one per MEAI category)
+        # REQUIRED: male_responses and female_responses come from the respondent field (validated above)
+        log(f"DEBUG - Using male_responses ({len(male_responses)} items) and female_responses ({len(female_responses)} items) from respondent field")
         
-        # Basic demographic features (11 features)
-        features = [
-            couple_profile['male_age'],
-            couple_profile['female_age'],
-            age_gap,
-            couple_profile['years_living_together'],  # 0 for non-Living In couples
-            couple_profile['education_level'],
-            couple_profile['income_level'],
-            education_income_diff,
-            is_single,
-            is_living_in,
-            is_separated_divorced,
-            employment_encoded  # NEW: Employment status
-            # REMOVED: children feature
-        ]
-        
-        print(f"DEBUG - Step 1: Added {len(features)} demographic features")
-        
-        # CRITICAL: Use separate male_responses + female_responses (118 features total)
-        # This gives us 59 + 59 = 118 features instead of 59 combined
-        # REQUIRED: male_responses and female_responses must come from respondent field
-        # We already validated they exist above, so we can safely use them here
-        print(f"DEBUG - Step 2: Using male_responses ({len(male_responses)} items) and female_responses ({len(female_responses)} items) from respondent field")
-        print(f"DEBUG -   male_responses first 3: {male_responses[:3] if len(male_responses) >= 3 else male_responses}")
-        print(f"DEBUG -   female_responses first 3: {female_responses[:3] if len(female_responses) >= 3 else female_responses}")
-        
-        # CRITICAL: Always use separate male_responses + female_responses (118 features total)
-        # This is REQUIRED - no fallback to questionnaire_responses
-        features.extend(male_responses)
-        features.extend(female_responses)
-        
-        print(f"DEBUG - Step 2: After adding responses, total features = {len(features)} (11 demographic + {len(male_responses)} male + {len(female_responses)} female)")
-        
-        # Add personalized features (6 features: alignment_score, conflict_ratio, 4 category_alignments)
         personalized_feature_values = [
             personalized_features.get('alignment_score', 0.5),
             personalized_features.get('conflict_ratio', 0.0),
-            # Category-specific alignments (4 features, one per MEAI category)
             *personalized_features.get('category_alignments', [0.5, 0.5, 0.5, 0.5])
-            # REMOVED: male_avg_response, female_avg_response, male_agree_ratio, male_disagree_ratio, female_agree_ratio, female_disagree_ratio
         ]
+        builder = FeatureBuilder(len(male_responses), len(personalized_feature_values))
+        if len(personalized_feature_values) != PERSONALIZED_FEATURE_COUNT:
+            log(f"ERROR - Expected {PERSONALIZED_FEATURE_COUNT} personalized features, got {len(personalized_feature_values)}")
         
-        features.extend(personalized_feature_values)
-        
-        # CRITICAL: Verify feature count
-        expected_features = 11 + len(male_responses) + len(female_responses) + 6  # 11 demographic + 118 responses + 6 personalized
-        actual_features = len(features)
-        
-        print(f"DEBUG - Feature count breakdown:")
-        print(f"DEBUG -   Demographic features: 11")
-        print(f"DEBUG -   Male responses: {len(male_responses)}")
-        print(f"DEBUG -   Female responses: {len(female_responses)}")
-        print(f"DEBUG -   Personalized features: 6")
-        print(f"DEBUG -   Expected total: {expected_features}")
-        print(f"DEBUG -   Actual total: {actual_features}")
-        
-        if actual_features != expected_features:
-            print(f"ERROR - Feature count mismatch! Expected {expected_features}, got {actual_features}")
-            print(f"ERROR - This suggests male_responses or female_responses are not being used correctly")
-        
-        features_array = np.array(features).reshape(1, -1)
-        print(f"Analysis with {len(features)} features: {features_array.shape}")
+        features_array = builder.build_row(couple_profile, male_responses, female_responses, personalized_feature_values)
+        log(f"Analysis with {features_array.shape[1]} features: {features_array.shape}")
         
         # CRITICAL: Validate feature count matches model's expected features
-        if ml_models['risk_model'] is not None:
-            print(f"DEBUG - Validating feature count against risk model")
-            print(f"DEBUG - Model type: {type(ml_models['risk_model'])}")
-            print(f"DEBUG - Model has n_features_in_: {hasattr(ml_models['risk_model'], 'n_features_in_')}")
-            print(f"DEBUG - Model has n_features_: {hasattr(ml_models['risk_model'], 'n_features_')}")
+        if models['risk_model'] is not None:
+            log(f"DEBUG - Validating feature count against risk model")
+            log(f"DEBUG - Model type: {type(models['risk_model'])}")
+            log(f"DEBUG - Model has n_features_in_: {hasattr(models['risk_model'], 'n_features_in_')}")
+            log(f"DEBUG - Model has n_features_: {hasattr(models['risk_model'], 'n_features_')}")
             
             # Check if model has n_features_in_ attribute (sklearn 0.24+)
-            if hasattr(ml_models['risk_model'], 'n_features_in_'):
-                expected_features = ml_models['risk_model'].n_features_in_
-                print(f"DEBUG - Found n_features_in_: {expected_features}")
-            elif hasattr(ml_models['risk_model'], 'n_features_'):
-                expected_features = ml_models['risk_model'].n_features_
-                print(f"DEBUG - Found n_features_: {expected_features}")
+            if hasattr(models['risk_model'], 'n_features_in_'):
+                expected_features = models['risk_model'].n_features_in_
+                log(f"DEBUG - Found n_features_in_: {expected_features}")
+            elif hasattr(models['risk_model'], 'n_features_'):
+                expected_features = models['risk_model'].n_features_
+                log(f"DEBUG - Found n_features_: {expected_features}")
             else:
                 # Try to infer from the model's estimator (for GridSearchCV)
-                if hasattr(ml_models['risk_model'], 'best_estimator_'):
-                    print(f"DEBUG - Model has best_estimator_, checking estimator attributes")
-                    if hasattr(ml_models['risk_model'].best_estimator_, 'n_features_in_'):
-                        expected_features = ml_models['risk_model'].best_estimator_.n_features_in_
-                        print(f"DEBUG - Found best_estimator_.n_features_in_: {expected_features}")
-                    elif hasattr(ml_models['risk_model'].best_estimator_, 'n_features_'):
-                        expected_features = ml_models['risk_model'].best_estimator_.n_features_
-                        print(f"DEBUG - Found best_estimator_.n_features_: {expected_features}")
+                if hasattr(models['risk_model'], 'best_estimator_'):
+                    log(f"DEBUG - Model has best_estimator_, checking estimator attributes")
+                    if hasattr(models['risk_model'].best_estimator_, 'n_features_in_'):
+                        expected_features = models['risk_model'].best_estimator_.n_features_in_
+                        log(f"DEBUG - Found best_estimator_.n_features_in_: {expected_features}")
+                    elif hasattr(models['risk_model'].best_estimator_, 'n_features_'):
+                        expected_features = models['risk_model'].best_estimator_.n_features_
+                        log(f"DEBUG - Found best_estimator_.n_features_: {expected_features}")
                     else:
                         expected_features = None
-                        print(f"WARNING - Could not find feature count in best_estimator_")
+                        log(f"WARNING - Could not find feature count in best_estimator_")
                 else:
                     expected_features = None
-                    print(f"WARNING - Model does not have n_features_in_, n_features_, or best_estimator_ attributes")
+                    log(f"WARNING - Model does not have n_features_in_, n_features_, or best_estimator_ attributes")
         else:
-            print(f"ERROR - Risk model is None, cannot validate feature count")
+            log(f"ERROR - Risk model is None, cannot validate feature count")
             expected_features = None
             
             actual_features = features_array.shape[1]
             
             if expected_features is not None and actual_features != expected_features:
                 # Detailed diagnostic information
-                print(f"ERROR - Feature count mismatch detected!")
-                print(f"ERROR - Model type: {type(ml_models['risk_model'])}")
-                print(f"ERROR - Model has n_features_in_: {hasattr(ml_models['risk_model'], 'n_features_in_')}")
-                print(f"ERROR - Model has n_features_: {hasattr(ml_models['risk_model'], 'n_features_')}")
-                print(f"ERROR - Model has best_estimator_: {hasattr(ml_models['risk_model'], 'best_estimator_')}")
-                print(f"ERROR - Expected features (from model): {expected_features}")
-                print(f"ERROR - Actual features (from data): {actual_features}")
-                print(f"ERROR - Feature breakdown:")
-                print(f"ERROR -   Demographic features: 11")
-                print(f"ERROR -   Male responses: {len(male_responses)} (first 5: {male_responses[:5] if len(male_responses) >= 5 else male_responses})")
-                print(f"ERROR -   Female responses: {len(female_responses)} (first 5: {female_responses[:5] if len(female_responses) >= 5 else female_responses})")
-                print(f"ERROR -   Personalized features: 6")
-                print(f"ERROR -   Total calculated: {11 + len(male_responses) + len(female_responses) + 6}")
-                print(f"ERROR -   Total actual: {len(features)}")
+                log(f"ERROR - Feature count mismatch detected!")
+                log(f"ERROR - Model type: {type(models['risk_model'])}")
+                log(f"ERROR - Model has n_features_in_: {hasattr(models['risk_model'], 'n_features_in_')}")
+                log(f"ERROR - Model has n_features_: {hasattr(models['risk_model'], 'n_features_')}")
+                log(f"ERROR - Model has best_estimator_: {hasattr(models['risk_model'], 'best_estimator_')}")
+                log(f"ERROR - Expected features (from model): {expected_features}")
+                log(f"ERROR - Actual features (from data): {actual_features}")
+                log(f"ERROR - Feature breakdown:")
+                log(f"ERROR -   Demographic features: 11")
+                log(f"ERROR -   Male responses: {len(male_responses)} (first 5: {male_responses[:5] if len(male_responses) >= 5 else male_responses})")
+                log(f"ERROR -   Female responses: {len(female_responses)} (first 5: {female_responses[:5] if len(female_responses) >= 5 else female_responses})")
+                log(f"ERROR -   Personalized features: 6")
+                log(f"ERROR -   Total calculated: {11 + len(male_responses) + len(female_responses) + 6}")
+                log(f"ERROR -   Total actual: {features_array.shape[1]}")
                 
                 error_msg = (
                     f"Feature count mismatch: Model expects {expected_features} features, "
@@ -2599,21 +4393,21 @@ def analyze():
                             'male_responses': len(male_responses),
                             'female_responses': len(female_responses),
                             'personalized': 6,
-                            'total': len(features)
+                            'total': int(features_array.shape[1])
                         },
                         'diagnostic': {
-                            'model_type': str(type(ml_models['risk_model'])),
+                            'model_type': str(type(models['risk_model'])),
                             'male_responses_sample': male_responses[:5] if len(male_responses) >= 5 else male_responses,
                             'female_responses_sample': female_responses[:5] if len(female_responses) >= 5 else female_responses
                         }
                     }
                 }), 400
             elif expected_features is not None:
-                print(f"DEBUG - Feature count validation passed: {actual_features} features (expected: {expected_features})")
+                log(f"DEBUG - Feature count validation passed: {actual_features} features (expected: {expected_features})")
             else:
-                print(f"WARNING - Could not determine model's expected feature count (model attributes not found)")
-                print(f"WARNING - Proceeding with prediction, but it may fail if feature count is incorrect")
-                print(f"WARNING - Actual features being sent: {actual_features}")
+                log(f"WARNING - Could not determine model's expected feature count (model attributes not found)")
+                log(f"WARNING - Proceeding with prediction, but it may fail if feature count is incorrect")
+                log(f"WARNING - Actual features being sent: {actual_features}")
         
         # HYBRID APPROACH: Calculate actual risk level from disagreement ratio AND use ML prediction
         # This helps catch cases where the model might be biased
@@ -2656,21 +4450,21 @@ def analyze():
         else:
             actual_risk_level = 'Low'
         
-        print(f"DEBUG - Actual Risk Calculation:")
-        print(f"  Question disagreements: {question_disagree_count}, Partner disagreements: {partner_disagree_count:.1f}, Neutrals: {neutral_count}")
-        print(f"  Total weighted disagree count: {total_disagree_count:.2f}")
-        print(f"  Weighted disagree ratio: {actual_disagree_ratio:.3f} ({actual_disagree_ratio*100:.1f}%)")
-        print(f"  Actual risk level: {actual_risk_level}")
+        log(f"DEBUG - Actual Risk Calculation:")
+        log(f"  Question disagreements: {question_disagree_count}, Partner disagreements: {partner_disagree_count:.1f}, Neutrals: {neutral_count}")
+        log(f"  Total weighted disagree count: {total_disagree_count:.2f}")
+        log(f"  Weighted disagree ratio: {actual_disagree_ratio:.3f} ({actual_disagree_ratio*100:.1f}%)")
+        log(f"  Actual risk level: {actual_risk_level}")
         
         # Predict risk level using ML model
-        if ml_models['risk_model'] is not None:
+        if models['risk_model'] is not None:
             try:
-                risk_prediction = ml_models['risk_model'].predict(features_array)[0]
+                risk_prediction = models['risk_model'].predict(features_array)[0]
             except ValueError as e:
                 error_msg = str(e)
                 if 'features' in error_msg.lower() and 'expecting' in error_msg.lower():
                     # Extract expected and actual feature counts from error message if possible
-                    print(f"ERROR - Prediction failed: {error_msg}")
+                    log(f"ERROR - Prediction failed: {error_msg}")
                     return jsonify({
                         'status': 'error',
                         'message': (
@@ -2686,7 +4480,7 @@ def analyze():
                                 'male_responses': len(male_responses),
                                 'female_responses': len(female_responses),
                                 'personalized': 6,
-                                'total': len(features)
+                                'total': int(features_array.shape[1])
                             }
                         }
                     }), 400
@@ -2695,12 +4489,12 @@ def analyze():
                     raise
             risk_levels = ['Low', 'Medium', 'High']
             ml_risk_level = risk_levels[risk_prediction]
-            print(f"DEBUG - ML risk prediction: {ml_risk_level} (index: {risk_prediction})")
+            log(f"DEBUG - ML risk prediction: {ml_risk_level} (index: {risk_prediction})")
             
             # ML confidence based solely on model probabilities
-            risk_probs = ml_models['risk_model'].predict_proba(features_array)[0]
+            risk_probs = models['risk_model'].predict_proba(features_array)[0]
             ml_confidence = float(np.clip(np.max(risk_probs), 0.0, 1.0))
-            print(f"DEBUG - ML probabilities: Low={risk_probs[0]:.3f}, Medium={risk_probs[1]:.3f}, High={risk_probs[2]:.3f}")
+            log(f"DEBUG - ML probabilities: Low={risk_probs[0]:.3f}, Medium={risk_probs[1]:.3f}, High={risk_probs[2]:.3f}")
             
             # HYBRID DECISION: Smart risk level selection
             # Trust actual calculation when it shows Low Risk with high alignment/low conflict
@@ -2716,23 +4510,23 @@ def analyze():
             # This prevents ML model from incorrectly predicting High Risk based on demographics
             if actual_risk_level == 'Low' and alignment_score > 0.7 and conflict_ratio < 0.15:
                 risk_level = actual_risk_level
-                print(f"DEBUG - Using ACTUAL risk level ({actual_risk_level}) over ML prediction ({ml_risk_level})")
-                print(f"DEBUG - Reason: High alignment ({alignment_score:.1%}) and low conflict ({conflict_ratio:.1%}) indicate Low Risk")
+                log(f"DEBUG - Using ACTUAL risk level ({actual_risk_level}) over ML prediction ({ml_risk_level})")
+                log(f"DEBUG - Reason: High alignment ({alignment_score:.1%}) and low conflict ({conflict_ratio:.1%}) indicate Low Risk")
             # If actual calculation shows High Risk, trust it (more reliable than ML for high risk)
             elif actual_risk_level == 'High':
                 risk_level = actual_risk_level
-                print(f"DEBUG - Using ACTUAL risk level ({actual_risk_level}) over ML prediction ({ml_risk_level})")
-                print(f"DEBUG - Reason: Actual disagreement ratio ({actual_disagree_ratio:.1%}) indicates High Risk")
+                log(f"DEBUG - Using ACTUAL risk level ({actual_risk_level}) over ML prediction ({ml_risk_level})")
+                log(f"DEBUG - Reason: Actual disagreement ratio ({actual_disagree_ratio:.1%}) indicates High Risk")
             # If ML suggests higher risk than actual, use ML (might catch patterns actual calculation misses)
             elif risk_level_priority[ml_risk_level] > risk_level_priority[actual_risk_level]:
                 risk_level = ml_risk_level
-                print(f"DEBUG - Using ML risk level ({ml_risk_level}) over actual ({actual_risk_level})")
-                print(f"DEBUG - Reason: ML model suggests higher risk, may catch patterns not in disagreement ratio")
+                log(f"DEBUG - Using ML risk level ({ml_risk_level}) over actual ({actual_risk_level})")
+                log(f"DEBUG - Reason: ML model suggests higher risk, may catch patterns not in disagreement ratio")
             # Otherwise, use actual calculation (more reliable for Low/Medium)
             else:
                 risk_level = actual_risk_level
-                print(f"DEBUG - Using ACTUAL risk level ({actual_risk_level}) over ML prediction ({ml_risk_level})")
-                print(f"DEBUG - Reason: Actual calculation is more reliable for this risk level")
+                log(f"DEBUG - Using ACTUAL risk level ({actual_risk_level}) over ML prediction ({ml_risk_level})")
+                log(f"DEBUG - Reason: Actual calculation is more reliable for this risk level")
         else:
             return jsonify({
                 'status': 'error',
@@ -2740,26 +4534,11 @@ def analyze():
             })
         
         # Predict category scores with personalized adjustments
-        if ml_models['category_model'] is not None:
+        if models['category_model'] is not None:
             # Validate feature count for category model as well
-            category_model = ml_models['category_model']
-            # For MultiOutputRegressor, check the underlying estimator
-            if hasattr(category_model, 'estimator'):
-                estimator = category_model.estimator
-                if hasattr(estimator, 'n_features_in_'):
-                    expected_features = estimator.n_features_in_
-                elif hasattr(estimator, 'n_features_'):
-                    expected_features = estimator.n_features_
-                else:
-                    expected_features = None
-            else:
-                # Direct model
-                if hasattr(category_model, 'n_features_in_'):
-                    expected_features = category_model.n_features_in_
-                elif hasattr(category_model, 'n_features_'):
-                    expected_features = category_model.n_features_
-                else:
-                    expected_features = None
+            category_model = models['category_model']
+            # Native multi-output forest, MultiOutputRegressor or compact artifact
+            expected_features = get_model_feature_count(category_model)
             
             actual_features = features_array.shape[1]
             
@@ -2770,7 +4549,7 @@ def analyze():
                     f"This usually means the model was trained with a different feature set. "
                     f"Please retrain the model using the 'Train Models' button in the dashboard."
                 )
-                print(f"ERROR - {error_msg}")
+                log(f"ERROR - {error_msg}")
                 return jsonify({
                     'status': 'error',
                     'message': error_msg,
@@ -2782,18 +4561,18 @@ def analyze():
                             'male_responses': len(male_responses),
                             'female_responses': len(female_responses),
                             'personalized': 6,
-                            'total': len(features)
+                            'total': int(features_array.shape[1])
                         }
                     }
                 }), 400
             
             try:
-                category_scores = ml_models['category_model'].predict(features_array)[0]
+                category_scores = models['category_model'].predict(features_array)[0]
                 category_scores = np.clip(category_scores, 0.0, 1.0)
             except ValueError as e:
                 error_msg = str(e)
                 if 'features' in error_msg.lower() and 'expecting' in error_msg.lower():
-                    print(f"ERROR - Category model prediction failed: {error_msg}")
+                    log(f"ERROR - Category model prediction failed: {error_msg}")
                     return jsonify({
                         'status': 'error',
                         'message': (
@@ -2809,7 +4588,7 @@ def analyze():
                                 'male_responses': len(male_responses),
                                 'female_responses': len(female_responses),
                                 'personalized': 6,
-                                'total': len(features)
+                                'total': int(features_array.shape[1])
                             }
                         }
                     }), 400
@@ -2826,10 +4605,10 @@ def analyze():
         # Format focus categories for response - SHOW ALL CATEGORIES
         # Three-level priority system: 0-30%, 30-60%, 60-100%
         focus_categories = []
-        print(f"Processing {len(MEAI_CATEGORIES)} categories: {MEAI_CATEGORIES}")
-        print(f"Category scores: {category_scores}")
+        log(f"Processing {len(schema_categories)} categories: {schema_categories}")
+        log(f"Category scores: {category_scores}")
         
-        for cat, score in zip(MEAI_CATEGORIES, category_scores):
+        for cat, score in zip(schema_categories, category_scores):
             # Show ALL categories (not just above 20%)
             # Determine priority level based on 3-level system
             if score > 0.6:  # 60-100%
@@ -2839,7 +4618,7 @@ def analyze():
             else:  # 0-30%
                 priority_level = 'Low'
                 
-            print(f"Category: {cat}, Score: {score:.3f}, Priority: {priority_level}")
+            log(f"Category: {cat}, Score: {score:.3f}, Priority: {priority_level}")
             
             focus_categories.append({
                 'name': cat,
@@ -2847,7 +4626,7 @@ def analyze():
                 'priority': priority_level
             })
         
-        print(f"Generated {len(focus_categories)} focus categories")
+        log(f"Generated {len(focus_categories)} focus categories")
         
         # Generate specific reasoning based on actual couple features
         # Pass actual_disagree_ratio, ml_risk_level, and actual_risk_level for detailed reasoning
@@ -2859,14 +4638,16 @@ def analyze():
                 risk_level,
                 actual_disagree_ratio=actual_disagree_ratio,
                 ml_risk_level=ml_risk_level,
-                actual_risk_level=actual_risk_level
+                actual_risk_level=actual_risk_level,
+                schema=schema
             )
         except NameError:
             # Fallback if variables not defined (shouldn't happen, but safe)
             risk_reasoning = generate_risk_reasoning(
                 couple_profile, 
                 personalized_features, 
-                risk_level
+                risk_level,
+                schema=schema
             )
         counseling_reasoning = generate_counseling_reasoning(focus_categories, category_scores, ml_confidence)
         
@@ -2890,6 +4671,7 @@ def analyze():
             'risk_reasoning': risk_reasoning,
             'counseling_reasoning': counseling_reasoning,
             'analysis_method': 'Random Forest Counseling Topics with Personalized Features',
+            'schema_hash': schema['hash'] if schema else compute_schema_hash(),
             'generated_at': pd.Timestamp.now().isoformat()
         })
         
@@ -2901,13 +4683,48 @@ def analyze():
 
 @app.route('/health', methods=['GET'])
 def health():
-    """Health check endpoint"""
+    """Liveness check endpoint - answers as soon as the process is up"""
     return jsonify({
         'status': 'healthy',
         'service': 'Counseling Topics Service',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'uptime_seconds': round(time.time() - service_state['started_at'], 1)
     })
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness check endpoint - reports what is loaded and whether /analyze can be served"""
+    with service_state_lock:
+        state = {
+            'ready': service_state['ready'],
+            'phase': service_state['phase'],
+            'initializing': service_state['initializing'],
+            'components': {name: dict(info) for name, info in service_state['components'].items()},
+            'error': service_state['error']
+        }
+    schema_check = check_models_match_schema()
+    with schema_state_lock:
+        schema_info = {
+            'source': schema_state['source'],
+            'loaded_at': schema_state['loaded_at'],
+            'reload_failures': schema_state['failures'],
+            'next_reload_in_seconds': max(0.0, round(schema_state['next_attempt_at'] - time.time(), 1)),
+            'last_error': schema_state['last_error']
+        }
+    
+    return jsonify({
+        'status': 'ready' if state['ready'] else 'not_ready',
+        'ready': state['ready'],
+        'phase': state['phase'],
+        'initializing': state['initializing'],
+        'components': state['components'],
+        'models_match_schema': schema_check['match'],
+        'feature_validation': schema_check,
+        'schema': schema_info,
+        'model_version': get_model_version_info(),
+        'error': state['error']
+    }), 200 if state['ready'] else 503
+
 def generate_personalized_recommendations(risk_level, category_scores, focus_categories, personalized_features, male_responses, female_responses, couple_profile=None):
     """Generate natural language recommendations using NLG engine"""
     try:
@@ -2934,7 +4751,7 @@ def generate_personalized_recommendations(risk_level, category_scores, focus_cat
         # Fallback to original rule-based system if NLG engine not available
         return generate_rule_based_recommendations(risk_level, category_scores, focus_categories, personalized_features, male_responses, female_responses)
     except Exception as e:
-        print(f"NLG Error: {e}")
+        log(f"NLG Error: {e}")
         # Fallback to original rule-based system
         return generate_rule_based_recommendations(risk_level, category_scores, focus_categories, personalized_features, male_responses, female_responses)
 
@@ -3052,8 +4869,9 @@ def generate_rule_based_recommendations(risk_level, category_scores, focus_categ
     
     return recommendations
 
-def generate_risk_reasoning(couple_profile, personalized_features, risk_level, actual_disagree_ratio=None, ml_risk_level=None, actual_risk_level=None):
+def generate_risk_reasoning(couple_profile, personalized_features, risk_level, actual_disagree_ratio=None, ml_risk_level=None, actual_risk_level=None, schema=None):
     """Generate detailed reasoning for risk level based on actual couple features"""
+    schema_categories, schema_questions, question_mapping = resolve_schema(schema)
     reasoning_parts = []
     
     # PRIMARY REASONING: Why this risk level?
@@ -3226,9 +5044,9 @@ def generate_risk_reasoning(couple_profile, personalized_features, risk_level, a
     
     # Category-specific analysis
     category_alignments = personalized_features.get('category_alignments', [0.5, 0.5, 0.5, 0.5])
-    if len(category_alignments) >= 4 and MEAI_CATEGORIES:
+    if len(category_alignments) >= 4 and schema_categories:
         reasoning_parts.append("\n📋 MEAI CATEGORY ANALYSIS:")
-        for i, (category, alignment) in enumerate(zip(MEAI_CATEGORIES, category_alignments)):
+        for i, (category, alignment) in enumerate(zip(schema_categories, category_alignments)):
             if alignment < 0.4:
                 reasoning_parts.append(f"   • ⚠️ {category}: {int(alignment * 100)}% alignment (Low - needs attention)")
             elif alignment > 0.7:
@@ -3323,22 +5141,101 @@ def generate_counseling_reasoning(focus_categories, category_scores, ml_confiden
     else:
         return f"Counseling recommendation based on: {'; '.join(reasoning_parts)}"
 
-# Initialize service on import (for gunicorn on Heroku)
-def initialize_service():
-    """Initialize the service - load categories, questions, and models"""
+def get_model_feature_count(model):
+    """Return the number of input features a fitted model expects (None if unknown)"""
+    if model is None:
+        return None
+    # Plain estimators, GridSearchCV wrappers and MultiOutputRegressor all expose the count somewhere
+    for candidate in (model, getattr(model, 'best_estimator_', None), getattr(model, 'estimator', None)):
+        if candidate is None:
+            continue
+        if hasattr(candidate, 'n_features_in_'):
+            return int(candidate.n_features_in_)
+        if hasattr(candidate, 'n_features_'):
+            return int(candidate.n_features_)
+    return None
+
+def check_models_match_schema(models=None):
+    """Compare the loaded (or given) models' feature counts with the currently loaded question schema"""
+    expected_features = expected_feature_count()
+    models = ml_models if models is None else models
+    risk_features = get_model_feature_count(models.get('risk_model'))
+    category_features = get_model_feature_count(models.get('category_model'))
+    
+    match = None
+    if expected_features is not None and risk_features is not None and category_features is not None:
+        match = risk_features == expected_features and category_features == expected_features
+    
+    return {
+        'expected_features': expected_features,
+        'risk_model_features': risk_features,
+        'category_model_features': category_features,
+        'match': match
+    }
+
+def _record_component(name, loaded, seconds, **details):
+    """Record load result and timing for one initialization component"""
+    with service_state_lock:
+        service_state['components'][name] = {
+            'loaded': bool(loaded),
+            'seconds': round(seconds, 3),
+            **details
+        }
+
+def update_readiness():
+    """Recompute readiness after models or schema change (startup, training)"""
+    models_loaded = all(model is not None for model in ml_models.values())
+    schema_loaded = bool(MEAI_QUESTIONS)
+    schema_check = check_models_match_schema()
+    with service_state_lock:
+        service_state['models_match_schema'] = schema_check['match']
+        service_state['ready'] = service_state['initialized'] and models_loaded and schema_loaded
+        if service_state['initialized']:
+            if service_state['ready']:
+                service_state['phase'] = 'ready'
+            else:
+                service_state['phase'] = 'models_missing' if not models_loaded else 'schema_missing'
+    return schema_check
+
+# Initialize service in the background (for gunicorn on Heroku)
+def initialize_service(allow_db=True):
+    """Initialize the service - load categories, questions, and models
+    
+    With allow_db=False (gunicorn preload master) the schema comes only from the
+    snapshot; workers refresh it from the database after fork.
+    """
     print("Initializing Counseling Topics Service...")
     
+    with service_state_lock:
+        service_state['initializing'] = True
+        service_state['error'] = None
+    
     try:
-        # Load MEAI categories from database
-        load_categories_from_db()
+        # Load MEAI categories, questions and sub-questions - from the local snapshot when
+        # available (then refreshed from the database in the background), else from the database
+        with service_state_lock:
+            service_state['phase'] = 'loading_schema'
+        started = time.time()
+        if load_schema_snapshot():
+            if allow_db:
+                request_schema_reload()
+        elif allow_db:
+            reload_schema(force=True)
+        with schema_state_lock:
+            schema_source = schema_state['source']
+        _record_component('schema', bool(MEAI_QUESTIONS), time.time() - started,
+                          source=schema_source,
+                          categories=len(MEAI_CATEGORIES),
+                          answerable_questions=len(MEAI_QUESTION_MAPPING))
         print(f"MEAI Categories loaded: {len(MEAI_CATEGORIES)} categories")
-        
-        # Load MEAI questions and sub-questions from database
-        load_questions_from_db()
         print(f"MEAI Questions loaded: {len(MEAI_QUESTIONS)} categories with questions")
         
         # Load existing models if available
+        with service_state_lock:
+            service_state['phase'] = 'loading_models'
+        started = time.time()
         models_loaded = load_ml_models()
+        _record_component('models', models_loaded, time.time() - started)
         
         if models_loaded:
             print("✅ All ML models loaded successfully")
@@ -3346,25 +5243,93 @@ def initialize_service():
             print("⚠️  ML models not loaded - training required")
             print("   Use /train endpoint to train models")
         
+        with service_state_lock:
+            service_state['initialized'] = True
+        update_readiness()
+        
+        # Follow activations made by other workers (preloaded workers start theirs after fork)
+        if not SERVICE_PRELOAD:
+            start_model_watcher()
+        
         print("Service initialized successfully!")
         return True
     except Exception as e:
         print(f"❌ Error initializing service: {e}")
         import traceback
         traceback.print_exc()
+        with service_state_lock:
+            service_state['phase'] = 'failed'
+            service_state['error'] = str(e)
         return False
+    finally:
+        with service_state_lock:
+            service_state['initializing'] = False
+
+def start_background_initialization():
+    """Start initialize_service in a daemon thread so the app can answer probes immediately"""
+    with service_state_lock:
+        thread = service_state.get('thread')
+        if service_state['initialized'] or (thread and thread.is_alive()):
+            return thread
+        # Mark as initializing before the thread runs so early requests don't race it to the DB
+        service_state['initializing'] = True
+        thread = threading.Thread(target=initialize_service, name='service-init', daemon=True)
+        service_state['thread'] = thread
+    thread.start()
+    return thread
 
-# Initialize on module load (for gunicorn)
-if not MEAI_CATEGORIES:
-    initialize_service()
+def on_worker_fork():
+    """Reset per-process state in a gunicorn worker forked from a preloaded master (see gunicorn.conf.py)"""
+    global training_lock, service_state_lock, schema_state_lock, schema_reload_lock, model_swap_lock
+    global serving_latency_lock, model_slots_lock, model_slot_load_lock
+    
+    # A master thread may have held these at fork time - the child's copies would stay locked forever
+    training_lock = threading.Lock()
+    model_swap_lock = threading.Lock()
+    model_slots_lock = threading.Lock()
+    model_slot_load_lock = threading.Lock()
+    serving_latency_lock = threading.Lock()
+    service_state_lock = threading.Lock()
+    schema_state_lock = threading.Lock()
+    schema_reload_lock = threading.Lock()
+    training_status['thread'] = None
+    training_status['lock_file'] = None
+    service_state['thread'] = None
+    service_state['watcher'] = None
+    schema_state['thread'] = None
+    
+    # Don't replay the master's random sequence in every worker (NLG template choice, sampling)
+    np.random.seed()
+    random.seed()
+    
+    # DB connections are opened per call and closed before returning, and the preload master
+    # never connects (allow_db=False), so no socket is shared with the master or other workers.
+    # Each worker confirms the schema against the database in the background.
+    if schema_needs_refresh():
+        request_schema_reload()
+    
+    # Threads don't survive fork - start this worker's model watcher (also picks up any
+    # version activated after the master loaded its models)
+    start_model_watcher()
+
+# Initialize on module load (for gunicorn) - but not in the spawned training process, which
+# re-imports this module and loads only what training needs
+if multiprocessing.current_process().name == 'MainProcess':
+    if SERVICE_PRELOAD:
+        # Preloaded in the gunicorn master: load once, synchronously, so forked workers share the pages
+        initialize_service(allow_db=False)
+    else:
+        # One copy per worker, loaded in the background without blocking the worker from binding
+        start_background_initialization()
 
 if __name__ == '__main__':
     # Only run Flask dev server if running directly (not via gunicorn)
     print("Starting Counseling Topics Service (development mode)...")
     
-    # Initialize if not already done
-    if not MEAI_CATEGORIES:
-        initialize_service()
+    # Wait for the background initialization when running the dev server directly
+    init_thread = start_background_initialization()
+    if init_thread:
+        init_thread.join()
     
     print("Service ready!")
     print("Counseling Topics Models: Available" if all(model is not None for model in ml_models.values()) else "Counseling Topics Models: Training needed")